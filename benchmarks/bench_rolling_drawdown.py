@@ -0,0 +1,108 @@
+"""
+Benchmark the rolling max drawdown and runup of `stats()`.
+
+Compares `_rolling_max_dd()` and `_rolling_max_ru()` with the previous
+implementation, which accumulated over an `as_strided`
+N x (period + 1) windowed view, for the yearly, monthly, and weekly
+windows of one equity curve.  The time and the tracemalloc peak memory
+of the six computations are reported, and the results are asserted to
+be bit-identical.
+
+Usage
+-----
+$ python benchmarks/bench_rolling_drawdown.py
+"""
+
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+import pandas as pd
+
+# Import the pinkfish of this checkout, installed or not.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pinkfish.pfstatistics as pfstatistics
+
+
+def _windowed_view(x, window_size):
+    y = as_strided(x, shape=(x.size - window_size + 1, window_size),
+                   strides=(x.strides[0], x.strides[0]))
+    return y
+
+
+def _old_rolling_max_dd(ser, period, min_periods=1):
+    """
+    `_rolling_max_dd()` before the O(N) block decomposition.
+    """
+    window_size = period + 1
+    x = ser.values
+    if min_periods < window_size:
+        pad = np.empty(window_size - min_periods)
+        pad.fill(x[0])
+        x = np.concatenate((pad, x))
+    y = _windowed_view(x, window_size)
+    running_max_y = np.maximum.accumulate(y, axis=1)
+    dd = (y - running_max_y) / running_max_y * 100
+    rmdd = dd.min(axis=1)
+    return pd.Series(data=rmdd, index=ser.index, name=ser.name)
+
+
+def _old_rolling_max_ru(ser, period, min_periods=1):
+    """
+    `_rolling_max_ru()` before the O(N) block decomposition.
+    """
+    window_size = period + 1
+    x = ser.values
+    if min_periods < window_size:
+        pad = np.empty(window_size - min_periods)
+        pad.fill(x[0])
+        x = np.concatenate((pad, x))
+    y = _windowed_view(x, window_size)
+    running_min_y = np.minimum.accumulate(y, axis=1)
+    ru = (y - running_min_y) / running_min_y * 100
+    rmru = ru.max(axis=1)
+    return pd.Series(data=rmru, index=ser.index, name=ser.name)
+
+
+def _equity_curve(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10000 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, n)))
+    return pd.Series(close, index=pd.date_range('1990-01-01', periods=n, freq='min'),
+                     name='close')
+
+
+def _rolling(max_dd, max_ru, close):
+    periods = pfstatistics.get_trading_days()
+    return ([max_dd(close, period) for period in periods] +
+            [max_ru(close, period) for period in periods])
+
+
+def _measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    for n in [2520, 7560, 393120]:
+        close = _equity_curve(n)
+        old, old_time, old_peak = _measure(
+            _rolling, _old_rolling_max_dd, _old_rolling_max_ru, close)
+        new, new_time, new_peak = _measure(
+            _rolling, pfstatistics._rolling_max_dd, pfstatistics._rolling_max_ru, close)
+        for expected, result in zip(old, new):
+            pd.testing.assert_series_equal(result, expected, check_exact=True)
+        print(f'{n:>9,} bars: {old_time * 1000:8.1f} ms / {old_peak / 2**20:7.1f} MB'
+              f'  ->  {new_time * 1000:6.1f} ms / {new_peak / 2**20:5.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
 from .fetch import (
+    FetchError,
     fetch_timeseries,
     fetch_fxmacrodata_timeseries,
     select_tradeperiod,
     finalize_timeseries,
     remove_cache_symbols,
     update_cache_symbols,
+    migrate_cache_symbols,
     get_symbol_metadata,
     get_quote
 )
@@ -12,6 +14,8 @@ from .fetch import (
 from .trade import (
     Direction,
     Margin,
+    Account,
+    get_default_account,
     TradeLog,
     TradeState,
     DailyBal
@@ -22,7 +26,10 @@ from .pfstatistics import (
     SP500_BEGIN,
     get_trading_days,
     currency_metrics,
+    stats_many_metrics,
     stats,
+    stats_many,
+    OnlineStats,
     currency,
     summary,
     optimizer_summary
@@ -36,10 +43,45 @@ from .plot import (
     optimizer_plot_bar_graph
 )
 
+from .panel import (
+    PANEL_FIELDS,
+    Panel,
+    build_panel,
+    load_panel
+)
+
+from .sharedmem import (
+    publish_timeseries,
+    attach_timeseries,
+    attach_arrays
+)
+
+from .optimizer import (
+    optimizer_sweep
+)
+
+from .vectorized import (
+    vectorized_backtest
+)
+
 from .benchmark import (
     Benchmark
 )
 
+from .streaming import (
+    StreamingSMA,
+    StreamingEMA,
+    StreamingMAX,
+    StreamingMIN,
+    StreamingBacktest,
+    load_streaming_backtest
+)
+
+from .bars import (
+    Bar,
+    Bars
+)
+
 from .portfolio import (
     Portfolio,
     technical_indicator
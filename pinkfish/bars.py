@@ -0,0 +1,137 @@
+"""
+Array-backed bar iteration.
+
+`ts.itertuples()` builds a namedtuple for every row, which is slow for
+wide timeseries, e.g. a portfolio of hundreds of symbols.  `Bars`
+copies the float64 columns of a timeseries into one 2D NumPy array
+once, and yields a lightweight `Bar` for each row.  A `Bar` looks up a
+column through a precomputed column-index map, so a price lookup is
+O(1) no matter how many columns the timeseries has.
+
+A `Bar` can be used wherever a row from `ts.itertuples()` is used,
+e.g. `row.Index`, `row.close`, and `Portfolio.get_price(row, symbol)`.
+
+Examples
+--------
+>>> for i, row in enumerate(self.portfolio.bars(self.ts)):
+...     date = row.Index.to_pydatetime()
+...     price = self.portfolio.get_price(row, 'SPY')
+"""
+
+import numpy as np
+
+
+class Bar:
+    """
+    A row of a timeseries.
+
+    Columns are accessed as attributes, e.g. `row.SPY_close`, or by
+    name, e.g. `row['SPY_close']`, which also works for column names
+    that aren't valid attribute names.
+
+    Attributes
+    ----------
+    Index : pd.Timestamp
+        The date of the bar.
+    pos : int
+        The position of the bar in the timeseries.
+    """
+
+    __slots__ = ('_bars', 'pos', 'Index')
+
+    def __init__(self, bars, pos):
+        self._bars = bars
+        self.pos = pos
+        self.Index = bars.dates[pos]
+
+    def __getattr__(self, column):
+        if column in Bar.__slots__ or column.startswith('__'):
+            raise AttributeError(column)
+        try:
+            return self._bars.get_value(self.pos, column)
+        except KeyError:
+            raise AttributeError(column) from None
+
+    def __getitem__(self, column):
+        return self._bars.get_value(self.pos, column)
+
+    def __repr__(self):
+        return f'Bar(Index={self.Index!r}, pos={self.pos})'
+
+
+class Bars:
+    """
+    An array-backed view of a timeseries for iteration.
+
+    Methods
+    -------
+     - get_value()
+       Return the value of a column at a position.
+    """
+
+    def __init__(self, ts):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        ts : pd.DataFrame
+            The timeseries.
+
+        Attributes
+        ----------
+        index : pd.DatetimeIndex
+            The dates of the timeseries.
+        dates : list of pd.Timestamp
+            The dates of the timeseries as a list, for fast lookup.
+        values : np.ndarray
+            The float64 columns of the timeseries as a 2D array of
+            shape (bars, columns).
+        column_index : dict of int
+            Dict of key value pair of column:position of a float64
+            column in `values`.
+        """
+        self.index = ts.index
+        self.dates = ts.index.tolist()
+        float_columns = [column for column, dtype in ts.dtypes.items()
+                         if dtype == np.float64]
+        self.values = ts[float_columns].to_numpy(dtype=np.float64)
+        self.column_index = {column: j for j, column in enumerate(float_columns)}
+        # Other columns, e.g. bool calendar columns, keep their own type.
+        self._other = {column: ts[column].tolist() for column in ts.columns
+                       if column not in self.column_index}
+
+    def get_value(self, pos, column):
+        """
+        Return the value of a column at a position.
+
+        Parameters
+        ----------
+        pos : int
+            The position of the bar in the timeseries.
+        column : str
+            The column name.
+
+        Returns
+        -------
+        object
+            The value, a float for a float64 column.
+        """
+        j = self.column_index.get(column)
+        if j is not None:
+            return self.values.item(pos, j)
+        return self._other[column][pos]
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError('bar index out of range')
+        return Bar(self, pos)
+
+    def __iter__(self):
+        for pos in range(len(self.dates)):
+            yield Bar(self, pos)
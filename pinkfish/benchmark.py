@@ -116,8 +116,8 @@ class Benchmark:
         Invest an equal percent in each investment option and
         rebalance every year.
         """
-        trade.TradeLog.cash = self.capital
-        trade.TradeLog.margin = trade.Margin.CASH
+        self.portfolio.account.cash = self.capital
+        self.portfolio.account.margin = trade.Margin.CASH
 
         # These dicts are used to track close and weights for
         # each symbol in portfolio
@@ -127,31 +127,31 @@ class Benchmark:
         weights = {symbol:weight for symbol in self.portfolio.symbols}
 
         # Trading algorithm
-        for i, row in enumerate(self.ts.itertuples()):
-
+        def _rebalance(i, row):
             end_flag = utility.is_last_row(self.ts, i)
-            start_flag = (i==0)
-
-            # Buy on first trading day
-            # Rebalance on the first trading day of each year
-            # Close all positions on last trading day
-            if row.first_doty or end_flag or start_flag:
 
-                # If last row, then zero out all weights.
-                if end_flag:
-                    weights = utility.set_dict_values(weights, 0)
+            # If last row, then zero out all weights.
+            w = utility.set_dict_values(weights, 0) if end_flag else weights
 
-                # Adjust weights of all symbols in portfolio
-                self.portfolio.adjust_percents(row, weights, field='close')
+            # Adjust weights of all symbols in portfolio
+            self.portfolio.adjust_percents(row, w, field='close')
 
-            # Record daily balance.
-            self.portfolio.record_daily_balance(row)
+        # Buy on first trading day
+        # Rebalance on the first trading day of each year
+        # Close all positions on last trading day
+        # The daily balance is recorded for every bar by run_events().
+        events = self.ts['first_doty'].to_numpy(dtype=bool, copy=True)
+        if len(events) > 0:
+            events[0] = events[-1] = True
+        self.portfolio.run_events(self.ts, events, _rebalance)
 
     def run(self):
         """
         Run the strategy.
         """
-        self.portfolio = portfolio.Portfolio()
+        # The benchmark has its own account, so it can run alongside
+        # a strategy without touching the strategy's cash.
+        self.portfolio = portfolio.Portfolio(account=trade.Account())
         self.ts = self.portfolio.fetch_timeseries(
             self.symbols, self.start, self.end,
             fields=['close'], dir_name=self.dir_name, use_adj=self.use_adj,
@@ -177,7 +177,8 @@ class Benchmark:
         """
         Get the stats.
         """
-        self.stats = pfstatistics.stats(self.ts, self.tlog, self.dbal, self.capital)
+        self.stats = pfstatistics.stats(self.ts, self.tlog, self.dbal, self.capital,
+                                        account=self.portfolio.account)
 
 Strategy = Benchmark
 """
@@ -2,11 +2,14 @@
 Fetch time series data.
 """
 
+import configparser
 import datetime
 from pathlib import Path
 import sys
+import threading
 import warnings
 
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
@@ -25,6 +28,19 @@ import pinkfish.utility as utility
 
 FXMACRODATA_API_ROOT = 'https://fxmacrodata.com/api/v1'
 
+
+class FetchError(Exception):
+    """
+    Base exception for timeseries that can't be retrieved.
+    """
+
+
+_download_lock = threading.Lock()
+"""
+threading.Lock : Serializes calls to `yf.download()`, which keeps its
+results in module level state and isn't thread safe.
+"""
+
 def _get_cache_dir(dir_name):
     """
     Get the data dir path.
@@ -54,6 +70,139 @@ def _get_cache_dir(dir_name):
     return dir_path
 
 
+CACHE_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npz': '.npz'
+}
+"""
+dict : Dict of key value pair of cache format:file suffix.
+
+'csv' is human readable, but slow to parse.  'parquet' and 'feather'
+require pyarrow.  'npz' stores each column as a raw NumPy array and
+has no extra dependencies.
+"""
+
+
+def _get_cache_format(cache_format=None):
+    """
+    Get the symbol cache format.
+
+    Parameters
+    ----------
+    cache_format : str, optional
+        The cache format (default is None, which implies use the
+        'cache_format' in the pinkfish config, or 'csv' if it isn't
+        set).
+
+    Returns
+    -------
+    str
+        The cache format.
+
+    Raises
+    ------
+    ValueError
+        If the cache format isn't one of `CACHE_FORMATS`.
+    """
+    if cache_format is None:
+        cache_format = 'csv'
+        try:
+            conf = utility.read_config()
+            cache_format = conf['cache_format']
+        except (configparser.NoSectionError, configparser.NoOptionError):
+            # No config file, or no [global] base_dir.
+            pass
+
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f'Invalid cache_format {cache_format!r}, '
+                         f'must be one of {list(CACHE_FORMATS)}')
+    return cache_format
+
+
+def _write_cache(ts, filepath):
+    """
+    Write a raw timeseries to the cache, based on the file suffix.
+
+    Parameters
+    ----------
+    ts : pd.DataFrame
+        The timeseries as returned by yfinance, with a 'Date' index.
+    filepath : Path
+        The cache file.
+
+    Returns
+    -------
+    None
+    """
+    suffix = filepath.suffix
+    if suffix == '.csv':
+        ts.to_csv(filepath, encoding='utf-8')
+    elif suffix == '.parquet':
+        ts.to_parquet(filepath)
+    elif suffix == '.feather':
+        ts.reset_index().to_feather(filepath)
+    elif suffix == '.npz':
+        arrays = {f'col{i}': ts[col].to_numpy() for i, col in enumerate(ts.columns)}
+        with open(filepath, 'wb') as f:
+            np.savez(f, index=ts.index.to_numpy(),
+                     columns=np.array(ts.columns, dtype=str), **arrays)
+    else:
+        raise ValueError(f'Unknown cache file type {filepath}')
+
+
+def _read_cache(filepath):
+    """
+    Read a raw timeseries from the cache, based on the file suffix.
+
+    Parameters
+    ----------
+    filepath : Path
+        The cache file.
+
+    Returns
+    -------
+    pd.DataFrame
+        The timeseries with the column names as returned by yfinance
+        and a 'Date' index.
+    """
+    suffix = filepath.suffix
+    if suffix == '.csv':
+        ts = pd.read_csv(filepath, index_col='Date', parse_dates=True)
+    elif suffix == '.parquet':
+        ts = pd.read_parquet(filepath)
+    elif suffix == '.feather':
+        ts = pd.read_feather(filepath).set_index('Date')
+    elif suffix == '.npz':
+        with np.load(filepath) as data:
+            columns = list(data['columns'])
+            ts = pd.DataFrame({col: data[f'col{i}'] for i, col in enumerate(columns)},
+                              index=pd.DatetimeIndex(data['index'], name='Date'))
+    else:
+        raise ValueError(f'Unknown cache file type {filepath}')
+    return ts
+
+
+def _get_cache_file(cache_dir, symbol, cache_format):
+    """
+    Return the path of the cache file of a symbol.
+    """
+    return Path(cache_dir) / f'{symbol}{CACHE_FORMATS[cache_format]}'
+
+
+def _get_cached_symbols(cache_dir):
+    """
+    Return the symbols that have a cache file in any format.
+
+    Filter out any filename prefixed with '__'.
+    """
+    suffixes = set(CACHE_FORMATS.values())
+    filenames = [f for f in Path(cache_dir).iterdir()
+                 if f.suffix in suffixes and not f.name.startswith('__')]
+    return list(dict.fromkeys(f.stem for f in filenames))
+
+
 def _adj_column_names(ts):
     """
     Make all column names lower case.
@@ -138,62 +287,162 @@ def fetch_fxmacrodata_timeseries(pair, start, end, api_key=None,
     return ts
 
 
-def fetch_timeseries(symbol, dir_name='symbol-cache', use_cache=True, from_year=None):
+def _get_from_year(from_year):
     """
-    Read time series data.
+    Return the start year for timeseries retrieval.
+    """
+    if from_year is None:
+        from_year = 1900 if not sys.platform.startswith('win') else 1971
+    return from_year
+
+
+def _get_cache_symbol(symbol):
+    """
+    Return the symbol used for the cache file of `symbol`.
+
+    pinkfish allows the use of a suffix starting with a '_', like
+    SPY_SHRT, so extract the symbol.  Make symbol names uppercase.
+    """
+    return symbol.upper().split('_')[0]
+
+
+_COLUMN_ORDER = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
 
-    Use cached version if it exists and use_cache is True, otherwise
-    retrive, cache, then read.
+
+def _download_many(symbols, start, threads=True):
+    """
+    Download the timeseries of several symbols with one request.
 
     Parameters
     ----------
-    symbol : str
-        The symbol for a security.
+    symbols : list of str
+        The symbols to download.
+    start : datetime.datetime
+        The first date to download.
+    threads : bool or int, optional
+        The number of threads yfinance uses for the request (default
+        is True, which lets yfinance decide).
+
+    Returns
+    -------
+    dict
+        Dict of key value pair of symbol:timeseries, with the columns
+        as returned by yfinance.  The value is a FetchError for a
+        symbol that couldn't be downloaded.
+    """
+    try:
+        with _download_lock:
+            df = yf.download(symbols, start=start, progress=False, auto_adjust=False,
+                             group_by='ticker', threads=threads)
+    except Exception as e:
+        return {symbol: FetchError(str(e)) for symbol in symbols}
+
+    results = {}
+    tickers = set(df.columns.get_level_values(0)) if isinstance(df.columns, pd.MultiIndex) else set()
+    for symbol in symbols:
+        if symbol not in tickers:
+            results[symbol] = FetchError(f'No Data for {symbol}')
+            continue
+        # The timeseries are aligned to the union of the dates, so
+        # remove the dates on which this symbol didn't trade.
+        ts = df[symbol][_COLUMN_ORDER].dropna(how='all')
+        if ts.empty:
+            results[symbol] = FetchError(f'No Data for {symbol}')
+            continue
+        if not ts['Volume'].isna().any():
+            ts['Volume'] = ts['Volume'].astype('int64')
+        ts.columns.name = None
+        results[symbol] = ts
+    return results
+
+
+def _cache_symbols(symbols, dir_name='symbol-cache', use_cache=True, from_year=None,
+                   cache_format=None, threads=True):
+    """
+    Download the symbols that aren't cached with one batched request.
+
+    Parameters
+    ----------
+    symbols : list of str
+        The symbols, which may have a '_' suffix, e.g. SPY_SHRT.
     dir_name : str, optional
         The leaf data dir name (default is 'symbol-cache').
     use_cache: bool, optional
-        True to use data cache.  False to retrieve from the internet 
-        (default is True).
+        True to only download the symbols that aren't cached.  False
+        to download all symbols (default is True).
     from_year: int, optional
         The start year for timeseries retrieval (default is None,
         which implies that all the available data is retrieved).
+    cache_format : str, optional {'csv', 'parquet', 'feather', 'npz'}
+        The format of the cache files to write (default is None, which
+        implies use the 'cache_format' in the pinkfish config, or 'csv').
+    threads : bool or int, optional
+        The number of threads yfinance uses for the request (default
+        is True, which lets yfinance decide).
 
     Returns
     -------
-    pd.DataFrame
-        The timeseries of a symbol.
+    dict of FetchError
+        Dict of key value pair of symbol:error for each symbol that
+        couldn't be downloaded.
     """
-    if from_year is None:
-        from_year = 1900 if not sys.platform.startswith('win') else 1971
+    cache_format = _get_cache_format(cache_format)
+    cache_dir = _get_cache_dir(dir_name)
 
-    # Make symbol names uppercase.
-    symbol = symbol.upper()
+    def _is_cached(cache_symbol):
+        return (_get_cache_file(cache_dir, cache_symbol, cache_format).is_file()
+                or _get_cache_file(cache_dir, cache_symbol, 'csv').is_file())
 
-    # pinkfish allows the use of a suffix starting with a '_',
-    # like SPY_SHRT, so extract the symbol.
-    symbol = symbol.split('_')[0]
+    cache_symbols = {symbol: _get_cache_symbol(symbol) for symbol in symbols}
+    missing = [cache_symbol for cache_symbol in dict.fromkeys(cache_symbols.values())
+               if not (use_cache and _is_cached(cache_symbol))]
+    if not missing:
+        return {}
+
+    start = datetime.datetime(_get_from_year(from_year), 1, 1)
+    results = _download_many(missing, start, threads=threads)
+    for cache_symbol, ts in results.items():
+        if not isinstance(ts, FetchError):
+            _write_cache(ts, _get_cache_file(cache_dir, cache_symbol, cache_format))
+
+    return {symbol: results[cache_symbol] for symbol, cache_symbol in cache_symbols.items()
+            if isinstance(results.get(cache_symbol), FetchError)}
 
-    timeseries_cache = _get_cache_dir(dir_name) / f'{symbol}.csv'
+
+def _fetch_timeseries(symbol, dir_name='symbol-cache', use_cache=True, from_year=None,
+                      cache_format=None):
+    """
+    Read time series data, raising FetchError if it can't be retrieved.
+
+    See `fetch_timeseries()`.
+    """
+    cache_format = _get_cache_format(cache_format)
+    from_year = _get_from_year(from_year)
+    symbol = _get_cache_symbol(symbol)
+
+    cache_dir = _get_cache_dir(dir_name)
+    timeseries_cache = _get_cache_file(cache_dir, symbol, cache_format)
+    csv_cache = _get_cache_file(cache_dir, symbol, 'csv')
 
     if timeseries_cache.is_file() and use_cache:
         pass
+    elif csv_cache.is_file() and use_cache:
+        _write_cache(_read_cache(csv_cache), timeseries_cache)
     else:
         try:
-            ts = yf.download(symbol, start=datetime.datetime(from_year, 1, 1),
-            		         progress=False, auto_adjust=False, multi_level_index=False)
-            if ts.empty:
-                print(f'No Data for {symbol}')
-                return None
+            with _download_lock:
+                ts = yf.download(symbol, start=datetime.datetime(from_year, 1, 1),
+                                 progress=False, auto_adjust=False, multi_level_index=False)
         except Exception as e:
-            print(f'\n{e}')
-            return None
-        else:
-            # Reorder columns, then write to csv.
-            column_order = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
-            ts = ts[column_order]
-            ts.to_csv(timeseries_cache, encoding='utf-8')
+            raise FetchError(f'\n{e}') from e
+        if ts.empty:
+            raise FetchError(f'No Data for {symbol}')
 
-    ts = pd.read_csv(timeseries_cache, index_col='Date', parse_dates=True)
+        # Reorder columns, then write to cache.
+        ts = ts[_COLUMN_ORDER]
+        _write_cache(ts, timeseries_cache)
+
+    ts = _read_cache(timeseries_cache)
     ts = _adj_column_names(ts)
 
     # Remove rows that have duplicated index.
@@ -201,6 +450,45 @@ def fetch_timeseries(symbol, dir_name='symbol-cache', use_cache=True, from_year=
     return ts
 
 
+def fetch_timeseries(symbol, dir_name='symbol-cache', use_cache=True, from_year=None,
+                     cache_format=None):
+    """
+    Read time series data.
+
+    Use cached version if it exists and use_cache is True, otherwise
+    retrive, cache, then read.  If a binary `cache_format` is used and
+    only a CSV cache exists for the symbol, the CSV is converted to the
+    binary format rather than retrieved again.
+
+    Parameters
+    ----------
+    symbol : str
+        The symbol for a security.
+    dir_name : str, optional
+        The leaf data dir name (default is 'symbol-cache').
+    use_cache: bool, optional
+        True to use data cache.  False to retrieve from the internet 
+        (default is True).
+    from_year: int, optional
+        The start year for timeseries retrieval (default is None,
+        which implies that all the available data is retrieved).
+    cache_format : str, optional {'csv', 'parquet', 'feather', 'npz'}
+        The format of the cache file (default is None, which implies
+        use the 'cache_format' in the pinkfish config, or 'csv').
+
+    Returns
+    -------
+    pd.DataFrame
+        The timeseries of a symbol.
+    """
+    try:
+        return _fetch_timeseries(symbol, dir_name=dir_name, use_cache=use_cache,
+                                 from_year=from_year, cache_format=cache_format)
+    except FetchError as e:
+        print(e)
+        return None
+
+
 def _adj_prices(ts):
     """
     Back adjust prices relative to adj_close for dividends and splits.
@@ -373,6 +661,7 @@ def remove_cache_symbols(symbols=None, dir_name='symbol-cache'):
     """
     Remove cached timeseries for list of symbols.
 
+    The cache files of the symbols are removed in every cache format.
     Filter out any symbols prefixed with '__'.
 
     Parameters
@@ -393,34 +682,126 @@ def remove_cache_symbols(symbols=None, dir_name='symbol-cache'):
         # If symbols is not a list, cast it to a list.
         if not isinstance(symbols, list):
             symbols = [symbols]
-        filenames = [symbol.upper() + '.csv' for symbol in symbols]
+        symbols = [symbol.upper() for symbol in symbols]
     else:
-        filenames = [f.name for f in cache_dir.iterdir() if f.suffix == '.csv']
+        symbols = _get_cached_symbols(cache_dir)
 
-    # Filter out any filename prefixed with '__'.
-    filenames = [f for f in filenames if not f.startswith('__')]
+    # Filter out any symbol prefixed with '__'.
+    symbols = [symbol for symbol in symbols if not symbol.startswith('__')]
 
     print('removing symbols:')
-    for i, f in enumerate(filenames):
-        symbol = Path(f).stem
+    for i, symbol in enumerate(symbols):
         print(symbol + ' ', end='')
         if i % 10 == 0 and i != 0:
             print()
 
-        filepath = cache_dir / f
-        if filepath.exists():
-            filepath.unlink()
-        else:
-            print(f'\n({f} not found)')
+        found = False
+        for cache_format in CACHE_FORMATS:
+            filepath = _get_cache_file(cache_dir, symbol, cache_format)
+            if filepath.exists():
+                filepath.unlink()
+                found = True
+        if not found:
+            print(f'\n({symbol} not found)')
     print()
 
 
-def update_cache_symbols(symbols=None, dir_name='symbol-cache', from_year=None):
+def _update_cache_incremental(symbols, cache_dir, cache_format, overlap):
+    """
+    Append the missing bars to the cached timeseries of the symbols.
+
+    The symbols are grouped by the date from which they need new
+    bars, and each group is downloaded with one batched request.  The
+    last `overlap` cached bars are downloaded again and compared with
+    the cache.  If a bar before the last cached bar has changed, the
+    adjusted history was restated, e.g. for a split or dividend, so the
+    symbol is refreshed in full instead.  The last cached bar itself is
+    always replaced, since it may have been a partial bar.
+
+    Symbols that aren't cached are returned in `refresh`, so they are
+    retrieved in full, from `from_year`, by the caller.
+
+    Returns
+    -------
+    updated : list of str
+        The symbols that were updated incrementally.
+    refresh : list of str
+        The symbols that need a full refresh.
+    errors : dict of FetchError
+        Dict of key value pair of symbol:error.
+    """
+    updated = []; refresh = []; errors = {}
+
+    # Group the cached symbols by the first date to download.
+    cached = {}
+    groups = {}
+    for symbol in symbols:
+        cache_file = _get_cache_file(cache_dir, symbol, cache_format)
+        if not cache_file.is_file():
+            cache_file = _get_cache_file(cache_dir, symbol, 'csv')
+        if not cache_file.is_file():
+            refresh.append(symbol)
+            continue
+        ts = _read_cache(cache_file)
+        ts = ts[~ts.index.duplicated(keep='first')]
+        if len(ts) < overlap:
+            refresh.append(symbol)
+            continue
+        cached[symbol] = (ts, cache_file)
+        groups.setdefault(ts.index[-overlap], []).append(symbol)
+
+    for start, group in groups.items():
+        results = _download_many(group, start.to_pydatetime())
+        for symbol in group:
+            new_ts = results[symbol]
+            if isinstance(new_ts, FetchError):
+                errors[symbol] = new_ts
+                continue
+            ts, cache_file = cached[symbol]
+            new_ts.index = new_ts.index.astype(ts.index.dtype)
+            new_ts.index.name = ts.index.name
+
+            # Check the bars before the last cached bar for a restatement.
+            check = ts.index[-overlap:-1]
+            if (not check.isin(new_ts.index).all()
+                or not np.allclose(ts.loc[check, ['Close', 'Adj Close']],
+                                   new_ts.loc[check, ['Close', 'Adj Close']],
+                                   rtol=1e-6, equal_nan=True)):
+                refresh.append(symbol)
+                continue
+
+            last_date = ts.index[-1]
+            new_ts = new_ts[new_ts.index >= last_date]
+            if new_ts.empty:
+                updated.append(symbol)
+                continue
+            target = _get_cache_file(cache_dir, symbol, cache_format)
+            if (target == cache_file and target.suffix == '.csv'
+                    and new_ts.index[0] == last_date
+                    and np.allclose(ts.iloc[-1], new_ts.iloc[0], rtol=1e-6, equal_nan=True)):
+                # The last cached bar is unchanged, so only append.
+                new_ts.iloc[1:].to_csv(target, mode='a', header=False, encoding='utf-8')
+            else:
+                ts = pd.concat([ts[ts.index < last_date], new_ts])
+                _write_cache(ts, target)
+            updated.append(symbol)
+
+    return updated, refresh, errors
+
+
+def update_cache_symbols(symbols=None, dir_name='symbol-cache', from_year=None,
+                         cache_format=None, incremental=False, overlap=5):
     """
     Update cached timeseries for list of symbols.
 
     Filter out any filename prefixed with '__'.
 
+    By default, the full history of each symbol is retrieved again.
+    With `incremental` True, only the bars after the last cached date
+    are retrieved, in batched requests, and appended to the cache.
+    A symbol is refreshed in full only if it isn't cached or its
+    adjusted history changed, e.g. for a split or dividend.
+
     Parameters
     ----------
     symbols : str or list, optional
@@ -431,6 +812,16 @@ def update_cache_symbols(symbols=None, dir_name='symbol-cache', from_year=None):
     from_year: int, optional
         The start year for timeseries retrieval (default is None,
         which implies that all the available data is retrieved).
+    cache_format : str, optional {'csv', 'parquet', 'feather', 'npz'}
+        The format of the cache files to write (default is None, which
+        implies use the 'cache_format' in the pinkfish config, or 'csv').
+    incremental : bool, optional
+        True to append only the missing bars to the cache (default
+        is False).
+    overlap : int, optional
+        The number of cached bars to retrieve again and check for a
+        restatement in incremental mode (default is 5).  Must be at
+        least 2.
 
     Returns
     -------
@@ -443,12 +834,25 @@ def update_cache_symbols(symbols=None, dir_name='symbol-cache', from_year=None):
         if not isinstance(symbols, list):
             symbols = [symbols]
     else:
-        filenames = [f for f in cache_dir.iterdir() if f.suffix == '.csv' and not f.name.startswith('__')]
-        symbols = [f.stem for f in filenames]
+        symbols = _get_cached_symbols(cache_dir)
 
     # Make symbol names uppercase.
     symbols = [symbol.upper() for symbol in symbols]
 
+    if incremental:
+        if overlap < 2:
+            raise ValueError(f'overlap must be at least 2, overlap={overlap}')
+        cache_format = _get_cache_format(cache_format)
+        updated, refresh, errors = _update_cache_incremental(
+            symbols, cache_dir, cache_format, overlap)
+        errors.update(_cache_symbols(refresh, dir_name=dir_name, use_cache=False,
+                                     from_year=from_year, cache_format=cache_format))
+        print(f'Updated {len(updated)} symbols incrementally, '
+              f'{len(refresh)} in full.')
+        for symbol, e in errors.items():
+            print(f'({symbol}: {e})')
+        return
+
     print('Updating symbols:')
     for i, symbol in enumerate(symbols):
         print(f"{symbol} ", end='')
@@ -456,16 +860,15 @@ def update_cache_symbols(symbols=None, dir_name='symbol-cache', from_year=None):
             print()
 
         try:
-            fetch_timeseries(symbol, dir_name=dir_name, use_cache=False, from_year=from_year)
+            fetch_timeseries(symbol, dir_name=dir_name, use_cache=False,
+                             from_year=from_year, cache_format=cache_format)
         except Exception as e:
             print(f'\n({e})')
     print()
 
 
-from pathlib import Path
-import pandas as pd
-
-def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None):
+def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None,
+                        cache_format=None):
     """
     Get symbol metadata for list of symbols.
 
@@ -481,6 +884,9 @@ def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None):
     from_year: int, optional
         The start year for timeseries retrieval (default is None,
         which implies that all the available data is retrieved).
+    cache_format : str, optional {'csv', 'parquet', 'feather', 'npz'}
+        The format of the cache files to read (default is None, which
+        implies use the 'cache_format' in the pinkfish config, or 'csv').
 
     Returns
     -------
@@ -494,8 +900,7 @@ def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None):
         if not isinstance(symbols, list):
             symbols = [symbols]
     else:
-        filenames = [f for f in cache_dir.iterdir() if f.suffix == '.csv' and not f.name.startswith('__')]
-        symbols = [f.stem for f in filenames]
+        symbols = _get_cached_symbols(cache_dir)
 
     # Make symbol names uppercase.
     symbols = [symbol.upper() for symbol in symbols]
@@ -503,7 +908,8 @@ def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None):
     metadata = []
     for i, symbol in enumerate(symbols):
         try:
-            ts = fetch_timeseries(symbol, dir_name=dir_name, use_cache=True, from_year=from_year)
+            ts = fetch_timeseries(symbol, dir_name=dir_name, use_cache=True,
+                                  from_year=from_year, cache_format=cache_format)
             start = ts.index[0].to_pydatetime()
             end = ts.index[-1].to_pydatetime()
             num_years = _difference_in_years(start, end)
@@ -518,6 +924,70 @@ def get_symbol_metadata(symbols=None, dir_name='symbol-cache', from_year=None):
     return df
 
 
+def migrate_cache_symbols(symbols=None, dir_name='symbol-cache', cache_format=None,
+                          remove_csv=False):
+    """
+    Convert cached CSV timeseries to a binary cache format.
+
+    This is a one time conversion of an existing CSV cache, so that the
+    timeseries don't need to be retrieved again.  Filter out any
+    filename prefixed with '__'.
+
+    Parameters
+    ----------
+    symbols : str or list, optional
+        The symbol(s) for which to convert the cached timeseries
+        (default is None, which implies convert all CSV files).
+    dir_name : str, optional
+        The leaf data dir name (default is 'symbol-cache').
+    cache_format : str, optional {'parquet', 'feather', 'npz'}
+        The format to convert to (default is None, which implies use
+        the 'cache_format' in the pinkfish config).
+    remove_csv : bool, optional
+        True to remove each CSV file after it is converted
+        (default is False).
+
+    Returns
+    -------
+    None
+
+    Examples
+    --------
+    >>> pf.migrate_cache_symbols(cache_format='npz', remove_csv=True)
+    """
+    cache_format = _get_cache_format(cache_format)
+    if cache_format == 'csv':
+        raise ValueError("cache_format must be a binary format, not 'csv'")
+
+    cache_dir = Path(_get_cache_dir(dir_name))
+
+    if symbols:
+        # If symbols is not a list, cast it to a list.
+        if not isinstance(symbols, list):
+            symbols = [symbols]
+        symbols = [symbol.upper() for symbol in symbols]
+    else:
+        symbols = [f.stem for f in cache_dir.iterdir()
+                   if f.suffix == '.csv' and not f.name.startswith('__')]
+
+    print(f'Migrating symbols to {cache_format}:')
+    for i, symbol in enumerate(symbols):
+        print(f"{symbol} ", end='')
+        if i % 10 == 0 and i != 0:
+            print()
+
+        csv_cache = _get_cache_file(cache_dir, symbol, 'csv')
+        try:
+            ts = _read_cache(csv_cache)
+            _write_cache(ts, _get_cache_file(cache_dir, symbol, cache_format))
+        except Exception as e:
+            print(f'\n({e})')
+        else:
+            if remove_csv:
+                csv_cache.unlink()
+    print()
+
+
 #####################################################################
 # REAL TIME QUOTE
 
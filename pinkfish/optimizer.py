@@ -0,0 +1,137 @@
+"""
+Parameter sweeps.
+
+Run a strategy over a grid of option values on a pool of worker
+processes and summarize the results with `optimizer_summary()`.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+import pinkfish.pfstatistics as pfstatistics
+
+
+def _grid_points(grid):
+    """
+    Return the list of option dicts for the cartesian product of `grid`.
+    """
+    keys = list(grid.keys())
+    values = [list(grid[key]) for key in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def _grid_label(point):
+    """
+    Return the column label for a grid point.
+
+    A single parameter is labeled by its value, e.g. '7', so that
+    the table looks like one built by hand in an optimize notebook.
+    Multiple parameters are labeled 'key=value, key=value'.
+    """
+    if len(point) == 1:
+        return str(next(iter(point.values())))
+    return ', '.join(f'{key}={value}' for key, value in point.items())
+
+
+def _run_strategy(strategy_class, args, options):
+    """
+    Run one strategy and return its stats.
+
+    This is the worker function, so it must be importable by the
+    worker processes.
+    """
+    strategy = strategy_class(*args, options)
+    strategy.run()
+    return strategy.stats
+
+
+def optimizer_sweep(strategy_class, args, options, grid, metrics,
+                    workers=None, progress=True):
+    """
+    Run a strategy over a parameter grid on a process pool.
+
+    A strategy is created for each point in the cartesian product of
+    `grid` with `strategy_class(*args, options)`, where `options` is
+    a copy of the base options updated with the grid point.  Each
+    strategy is run in a worker process and only its stats are sent
+    back.  The results are ordered by grid point, regardless of the
+    order in which the workers finish.
+
+    Parameters
+    ----------
+    strategy_class : class
+        The strategy class, e.g. `strategy.Strategy`.  It must be
+        defined in an importable module, not in a notebook cell, so
+        the worker processes can unpickle it.
+    args : tuple
+        The positional arguments of the strategy before `options`,
+        e.g. (symbol, capital, start, end).
+    options : dict
+        The base options for the strategy.
+    grid : dict of list
+        Dict of key value pair of option:values to sweep, e.g.
+        {'period': range(2, 15), 'sma': [70, 200]}.
+    metrics : tuple
+        The metrics to be used in the summary.
+    workers : int, optional
+        The number of worker processes (default is None, which
+        implies use the number of CPUs).  Use 1 to run every
+        strategy in this process.
+    progress : bool, optional
+        True to print the label of each grid point as it completes
+        (default is True).
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Summary of strategies vs metrics, in the same layout as
+        `optimizer_summary()`.  There is one column per grid point.
+
+    Examples
+    --------
+    >>> grid = {'period': range(2, 15), 'sma': range(20, 210, 10)}
+    >>> df = pf.optimizer_sweep(strategy.Strategy,
+    ...                         (symbol, capital, start, end),
+    ...                         options, grid, metrics, workers=8)
+    >>> pf.optimizer_plot_bar_graph(df, 'sharpe_ratio')
+    """
+    points = _grid_points(grid)
+    labels = [_grid_label(point) for point in points]
+    point_options = []
+    for point in points:
+        opts = options.copy()
+        opts.update(point)
+        point_options.append(opts)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(points)))
+
+    def _progress(i, done):
+        if progress:
+            print(labels[i], end=' ')
+            if done % 10 == 0 or done == len(points):
+                print()
+
+    results = [None] * len(points)
+    if workers == 1:
+        for i, opts in enumerate(point_options):
+            results[i] = _run_strategy(strategy_class, args, opts)
+            _progress(i, i + 1)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_run_strategy, strategy_class, args, opts): i
+                       for i, opts in enumerate(point_options)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                results[i] = future.result()
+                _progress(i, done)
+
+    strategies = pd.Series(dtype=object)
+    for label, opts, stats in zip(labels, point_options, results):
+        strategies[label] = SimpleNamespace(options=opts, stats=stats)
+    return pfstatistics.optimizer_summary(strategies, metrics)
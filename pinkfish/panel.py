@@ -0,0 +1,273 @@
+"""
+Memory-mapped panel store.
+
+A panel holds the timeseries of a whole universe of symbols in one
+time x symbol x field array, aligned to a master date index.  The array
+is saved as a single `.npy` file and memory-mapped when it's loaded,
+so loading a universe doesn't parse any files, only the pages that are
+sliced are read from disk, and processes that load the same panel
+share those pages through the OS page cache.
+
+Build the panel once from the symbol cache with `build_panel()`, then
+use `load_panel()` and pass the panel to `Portfolio.fetch_timeseries()`.
+
+Examples
+--------
+>>> pf.build_panel(symbols, panel_name='sp500')
+>>> panel = pf.load_panel('sp500')
+>>> portfolio = pf.Portfolio()
+>>> ts = portfolio.fetch_timeseries(symbols, start, end, panel=panel)
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+import pinkfish.fetch as fetch
+
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
+"""
+list of str : The fields stored in a panel by default.
+"""
+
+
+class Panel:
+    """
+    A time x symbol x field array of timeseries.
+
+    Methods
+    -------
+     - timeseries()
+       Return the timeseries of a symbol.
+
+     - select()
+       Return a timeseries with SYMBOL_field columns.
+    """
+
+    def __init__(self, data, dates, symbols, fields):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            The (dates, symbols, fields) array, usually a read-only
+            memory map.  Missing values are NaN.
+        dates : np.ndarray
+            The master date index.
+        symbols : list of str
+            The symbols, in the order of axis 1 of `data`.
+        fields : list of str
+            The fields, in the order of axis 2 of `data`.
+
+        Attributes
+        ----------
+        data : np.ndarray
+            The (dates, symbols, fields) array.
+        dates : pd.DatetimeIndex
+            The master date index.
+        symbols : list of str
+            The symbols in the panel.
+        fields : list of str
+            The fields in the panel.
+        symbol_index : dict of int
+            Dict of key value pair of symbol:position in axis 1.
+        field_index : dict of int
+            Dict of key value pair of field:position in axis 2.
+        """
+        self.data = data
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.symbols = list(symbols)
+        self.fields = list(fields)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.field_index = {field: i for i, field in enumerate(self.fields)}
+
+    def __contains__(self, symbol):
+        return fetch._get_cache_symbol(symbol) in self.symbol_index
+
+    def _date_slice(self, start, end):
+        """
+        Return the slice of the master date index from start to end.
+        """
+        i = 0 if start is None else self.dates.searchsorted(start, side='left')
+        j = len(self.dates) if end is None else self.dates.searchsorted(end, side='right')
+        return slice(i, j)
+
+    def _symbol_pos(self, symbol):
+        # A symbol with a '_' suffix, e.g. SPY_SHRT, is the symbol in
+        # the cache, as in `fetch_timeseries()`.
+        try:
+            return self.symbol_index[fetch._get_cache_symbol(symbol)]
+        except KeyError:
+            raise KeyError(f'{symbol} is not in the panel') from None
+
+    def timeseries(self, symbol):
+        """
+        Return the timeseries of a symbol.
+
+        The timeseries is in the same form as `fetch_timeseries()`
+        returns, i.e. one column per field and only the dates on which
+        the symbol has data.
+
+        Parameters
+        ----------
+        symbol : str
+            The symbol for a security.
+
+        Returns
+        -------
+        pd.DataFrame
+            The timeseries of a symbol.
+        """
+        values = np.asarray(self.data[:, self._symbol_pos(symbol), :])
+        valid = ~np.isnan(values).all(axis=1)
+        ts = pd.DataFrame(values[valid], index=self.dates[valid], columns=self.fields)
+        return ts
+
+    def select(self, symbols, fields=['open', 'high', 'low', 'close'],
+               start=None, end=None):
+        """
+        Return a timeseries with SYMBOL_field columns.
+
+        Only the requested date range is read from the panel.
+
+        Parameters
+        ----------
+        symbols : list of str
+            The symbols to select.  They are uppercased, and a symbol
+            with a '_' suffix, e.g. SPY_SHRT, selects the symbol in the
+            panel, as in `timeseries()`.
+        fields : list of str, optional
+            The fields to select for each symbol (default is
+            ['open', 'high', 'low', 'close']).
+        start : datetime.datetime, optional
+            The first date to select (default is None, which implies
+            the first date in the panel).
+        end : datetime.datetime, optional
+            The last date to select (default is None, which implies
+            the last date in the panel).
+
+        Returns
+        -------
+        pd.DataFrame
+            The timeseries of the symbols, e.g. column SPY_close, or
+            SPY_SHRT_close.
+        """
+        symbols = [symbol.upper() for symbol in symbols]
+        rows = self._date_slice(start, end)
+        s = [self._symbol_pos(symbol) for symbol in symbols]
+        f = [self.field_index[field] for field in fields]
+        values = self.data[rows][:, s][:, :, f]
+        columns = [symbol + '_' + field for symbol in symbols for field in fields]
+        return pd.DataFrame(values.reshape(len(values), -1),
+                            index=self.dates[rows], columns=columns)
+
+
+def _get_panel_dir(panel_name, dir_name):
+    """
+    Return the directory of a panel.
+    """
+    return fetch._get_cache_dir(dir_name) / panel_name
+
+
+def build_panel(symbols, panel_name='panel', dir_name='panel-cache',
+                fields=PANEL_FIELDS, symbol_dir_name='symbol-cache',
+                use_cache=True, from_year=None, cache_format=None):
+    """
+    Build a panel from the symbol cache and save it to disk.
+
+    Symbols that can't be fetched are left out of the panel.
+
+    Parameters
+    ----------
+    symbols : list of str
+        The symbols in the universe.  A '_' suffix, e.g. SPY_SHRT, is
+        dropped, as in the symbol cache.
+    panel_name : str, optional
+        The name of the panel (default is 'panel').
+    dir_name : str, optional
+        The leaf data dir name for panels (default is 'panel-cache').
+    fields : list of str, optional
+        The fields to store for each symbol (default is
+        ['open', 'high', 'low', 'close', 'adj_close', 'volume']).
+    symbol_dir_name : str, optional
+        The leaf data dir name of the symbol cache (default is
+        'symbol-cache').
+    use_cache: bool, optional
+        True to use the symbol cache.  False to retrieve from the
+        internet (default is True).
+    from_year: int, optional
+        The start year for timeseries retrieval (default is None,
+        which implies that all the available data is retrieved).
+    cache_format : str, optional {'csv', 'parquet', 'feather', 'npz'}
+        The format of the symbol cache (default is None, which implies
+        use the 'cache_format' in the pinkfish config, or 'csv').
+
+    Returns
+    -------
+    Panel
+        The panel, memory-mapped from disk.
+    """
+    symbols = list(dict.fromkeys(fetch._get_cache_symbol(symbol) for symbol in symbols))
+    fields = list(fields)
+
+    frames = {}
+    for symbol in symbols:
+        try:
+            ts = fetch.fetch_timeseries(symbol, dir_name=symbol_dir_name,
+                                        use_cache=use_cache, from_year=from_year,
+                                        cache_format=cache_format)
+        except Exception as e:
+            print(f'\n({e})')
+            continue
+        if ts is not None:
+            frames[symbol] = ts[fields]
+
+    dates = pd.DatetimeIndex(sorted(set().union(*(ts.index for ts in frames.values()))))
+    symbols = list(frames)
+
+    panel_dir = _get_panel_dir(panel_name, dir_name)
+    panel_dir.mkdir(parents=True, exist_ok=True)
+
+    data = np.lib.format.open_memmap(panel_dir / 'data.npy', mode='w+', dtype=np.float64,
+                                     shape=(len(dates), len(symbols), len(fields)))
+    data[:] = np.nan
+    for i, ts in enumerate(frames.values()):
+        data[dates.get_indexer(ts.index), i, :] = ts.to_numpy(dtype=np.float64)
+    data.flush()
+    del data
+
+    np.save(panel_dir / 'dates.npy', dates.to_numpy(dtype='datetime64[ns]'))
+    with open(panel_dir / 'meta.json', 'w') as f:
+        json.dump({'symbols': symbols, 'fields': fields}, f)
+
+    return load_panel(panel_name, dir_name=dir_name)
+
+
+def load_panel(panel_name='panel', dir_name='panel-cache'):
+    """
+    Load a panel from disk.
+
+    The panel data is memory-mapped read-only, so this is fast
+    regardless of the size of the universe.
+
+    Parameters
+    ----------
+    panel_name : str, optional
+        The name of the panel (default is 'panel').
+    dir_name : str, optional
+        The leaf data dir name for panels (default is 'panel-cache').
+
+    Returns
+    -------
+    Panel
+        The panel.
+    """
+    panel_dir = _get_panel_dir(panel_name, dir_name)
+    with open(panel_dir / 'meta.json') as f:
+        meta = json.load(f)
+    data = np.load(panel_dir / 'data.npy', mmap_mode='r')
+    dates = np.load(panel_dir / 'dates.npy')
+    return Panel(data, dates, meta['symbols'], meta['fields'])
@@ -318,6 +318,7 @@ The stats() function returns the following metrics in a pd.Series.
     instead of the total standard deviation.
 """
 
+import bisect
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import math
@@ -325,7 +326,6 @@ import operator
 import sys
 
 import numpy as np
-from numpy.lib.stride_tricks import as_strided
 import pandas as pd
 
 import pinkfish.trade as trade
@@ -461,8 +461,10 @@ def _pct_time_in_market(dbal):
 ########################################################################
 # LEVERAGE
 
-def _margin():
-    return trade.TradeLog.margin
+def _margin(account):
+    if account is None:
+        account = trade.get_default_account()
+    return account.margin
 
 def _avg_leverage(dbal):
     return dbal['leverage'].mean()
@@ -600,17 +602,14 @@ def _subsequence(s, c):
     and `c` is '0', then the longest subsequence of only '0's has
     length 3.
     """
-    count = 0
-    maxlen = 0
-
-    for bit in s:
-        if bit == c:
-            count += 1
-            if count > maxlen:
-                maxlen = count
-        else:
-            count = 0
-    return maxlen
+    if isinstance(s, str):
+        s = list(s)
+    # The runs of `c` start and end where the padded mask changes.
+    mask = np.concatenate(([False], np.asarray(s) == c, [False]))
+    edges = np.flatnonzero(mask[1:] != mask[:-1])
+    if len(edges) == 0:
+        return 0
+    return int((edges[1::2] - edges[::2]).max())
 
 def _max_consecutive_winning_trades(tlog):
     if _num_winning_trades(tlog) == 0: return 0
@@ -622,11 +621,14 @@ def _max_consecutive_losing_trades(tlog):
 
 @utility.no_empty_container('tlog', [])
 def _get_trade_bars(ts, tlog, op):
-    l = []
-    for row in tlog.itertuples():
-        if op(row.pl_cash, 0):
-            l.append(len(ts[row.entry_date:row.exit_date].index))
-    return l
+    """
+    Returns the number of bars of `ts` from entry to exit, inclusive,
+    of the trades for which op(pl_cash, 0) is True.
+    """
+    tlog = tlog[op(tlog['pl_cash'], 0)]
+    entry = ts.index.searchsorted(tlog['entry_date'].to_numpy(), side='left')
+    exit = ts.index.searchsorted(tlog['exit_date'].to_numpy(), side='right')
+    return np.maximum(exit - entry, 0)
 
 def _avg_bars_winning_trades(ts, tlog):
     if _num_winning_trades(tlog) == 0: return 0
@@ -701,27 +703,100 @@ def _drawdown_loss_recovery_period(peak_date, trough_date , recovery_date):
         recovery_period = abs(trough_date-recovery_date).days
     return loss_period, recovery_period
 
-def _windowed_view(x, window_size):
-    """
-    Create a 2d windowed view of a 1d array.
+def _drawdown(value, peak):
+    return (value - peak) / peak * 100
 
-    `x` must be a 1d numpy array.
+def _accumulate(ufunc, xb, reverse=False):
+    """
+    Accumulate `ufunc` along axis 1 of the 3d array `xb`.
 
-    `numpy.lib.stride_tricks.as_strided` is used to create the view.
-    The data is not copied.
+    With many columns, i.e. a large axis 2, accumulating one slice
+    at a time is faster than `ufunc.accumulate(xb, axis=1)`.
+    """
+    if reverse:
+        return _accumulate(ufunc, xb[:, ::-1])[:, ::-1]
+    if xb.shape[2] < 64:
+        return ufunc.accumulate(xb, axis=1)
+    out = np.empty_like(xb)
+    out[:, 0] = xb[:, 0]
+    for i in range(1, xb.shape[1]):
+        ufunc(out[:, i-1], xb[:, i], out=out[:, i])
+    return out
+
+def _rolling_max_drawdown(x, period, runup=False, min_periods=1):
+    """
+    Compute the rolling maximum drawdown, or runup, of each column of `x`.
 
-    Example:
+    `x` must be a 2d array with one column per equity curve.
+    `min_periods` should satisfy 1 <= min_periods <= window_size.
 
-    >>> x = np.array([1, 2, 3, 4, 5, 6])
-    >>> _windowed_view(x, 3)
-    array([[1, 2, 3],
-           [2, 3, 4],
-           [3, 4, 5],
-           [4, 5, 6]])
+    Each window is padded at the front with the first value, and the
+    drawdown of each day is measured from the running peak of the
+    window, the same as taking the running max of an N x window view
+    of the series.  That takes O(N * period) time and memory though;
+    this takes O(N).
+
+    The padded series is split into blocks of `period` + 1 days, so
+    each window is the suffix of one block followed by the prefix of
+    the next.  The max drawdown of a window is the worst of the max
+    drawdown of the suffix, the max drawdown of the prefix, and the
+    drawdown from the peak of the suffix to the trough of the prefix,
+    which are all running accumulations over the blocks.
+
+    Each value of the result is the drawdown of one day in the window
+    from one of the peaks before it, but that peak isn't always the
+    running peak of the window.  For drawdowns of less than 50%, and
+    runups of less than 100%, the subtraction in the drawdown is exact
+    and the result is identical.  The other windows, and the curves
+    with balances that aren't positive, are recomputed one window at
+    a time.
+
+    Returns a 2d array with len(x) - min_periods + 1 rows.
     """
-    y = as_strided(x, shape=(x.size - window_size + 1, window_size),
-                   strides=(x.strides[0], x.strides[0]))
-    return y
+    if runup:
+        better, worse, exact = np.minimum, np.maximum, lambda r: r < 99
+    else:
+        better, worse, exact = np.maximum, np.minimum, lambda r: r > -49
+    x = np.asarray(x, dtype=float)
+    S = x.shape[1]
+    window_size = period + 1
+    x = np.concatenate((np.repeat(x[:1], window_size - min_periods, axis=0), x))
+    num_blocks = -(-len(x) // window_size)
+    pad = np.repeat(x[-1:], num_blocks*window_size - len(x), axis=0)
+    xb = np.concatenate((x, pad)).reshape(num_blocks, window_size, S)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Prefix of each block.
+        peak = _accumulate(better, xb)
+        dd = _accumulate(worse, _drawdown(xb, peak))
+        trough = _accumulate(worse, xb)
+        # Suffix of each block.
+        suffix_peak = _accumulate(better, xb, reverse=True)
+        suffix_trough = _accumulate(worse, xb, reverse=True)
+        suffix_dd = np.zeros_like(xb)
+        suffix_dd[:, :-1] = _drawdown(suffix_trough[:, 1:], xb[:, :-1])
+        suffix_dd = _accumulate(worse, worse(suffix_dd, 0), reverse=True)
+
+        rmdd = np.empty_like(xb)
+        rmdd[:, -1] = dd[:, -1]
+        rmdd[1:, :-1] = worse(worse(suffix_dd[:-1, 1:], dd[1:, :-1]),
+                              _drawdown(trough[1:, :-1], suffix_peak[:-1, 1:]))
+    rmdd = rmdd.reshape(-1, S)[window_size - 1:len(x)]
+    n = len(rmdd)
+
+    rows, cols = np.nonzero(~exact(rmdd))
+    nonpositive = np.flatnonzero(~(x.min(axis=0) > 0))
+    if len(nonpositive) > 0:
+        keep = ~np.isin(cols, nonpositive)
+        rows = np.concatenate((rows[keep], np.repeat(np.arange(n), len(nonpositive))))
+        cols = np.concatenate((cols[keep], np.tile(nonpositive, n)))
+    chunk = max(1, 2**20 // window_size)
+    for i in range(0, len(rows), chunk):
+        r, c = rows[i:i+chunk], cols[i:i+chunk]
+        y = x[r[:, None] + np.arange(window_size), c[:, None]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rmdd[r, c] = worse.reduce(_drawdown(y, better.accumulate(y, axis=1)), axis=1)
+    return rmdd
 
 def _rolling_max_dd(ser, period, min_periods=1):
     """
@@ -732,16 +807,8 @@ def _rolling_max_dd(ser, period, min_periods=1):
 
     Returns an 1d array with length len(x) - min_periods + 1.
     """
-    window_size = period + 1
-    x = ser.values
-    if min_periods < window_size:
-        pad = np.empty(window_size - min_periods)
-        pad.fill(x[0])
-        x = np.concatenate((pad, x))
-    y = _windowed_view(x, window_size)
-    running_max_y = np.maximum.accumulate(y, axis=1)
-    dd = (y - running_max_y) / running_max_y * 100
-    rmdd = dd.min(axis=1)
+    x = ser.to_numpy(dtype=float)[:, None]
+    rmdd = _rolling_max_drawdown(x, period, min_periods=min_periods)[:, 0]
     return pd.Series(data=rmdd, index=ser.index, name=ser.name)
 
 def _rolling_max_ru(ser, period, min_periods=1):
@@ -753,16 +820,8 @@ def _rolling_max_ru(ser, period, min_periods=1):
 
     Returns an 1d array with length len(x) - min_periods + 1.
     """
-    window_size = period + 1
-    x = ser.values
-    if min_periods < window_size:
-        pad = np.empty(window_size - min_periods)
-        pad.fill(x[0])
-        x = np.concatenate((pad, x))
-    y = _windowed_view(x, window_size)
-    running_min_y = np.minimum.accumulate(y, axis=1)
-    ru = (y - running_min_y) / running_min_y * 100
-    rmru = ru.max(axis=1)
+    x = ser.to_numpy(dtype=float)[:, None]
+    rmru = _rolling_max_drawdown(x, period, runup=True, min_periods=min_periods)[:, 0]
     return pd.Series(data=rmru, index=ser.index, name=ser.name)
 
 
@@ -800,11 +859,319 @@ def _sortino_ratio(rets, risk_free=0.00, period=TRADING_DAYS_PER_YEAR):
         sortino = (mean*period - risk_free) / (dev * np.sqrt(period))
     return sortino
 
+def _sharpe_ratios(rets, risk_free=0.00, period=TRADING_DAYS_PER_YEAR):
+    """
+    `_sharpe_ratio()` of each column of the 2d array `rets`.
+    """
+    dev = rets.std(axis=0)
+    mean = rets.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (mean*period - risk_free) / (dev * np.sqrt(period))
+    return np.where(dev == 0, 0, sharpe)
+
+def _sortino_ratios(rets, risk_free=0.00, period=TRADING_DAYS_PER_YEAR):
+    """
+    `_sortino_ratio()` of each column of the 2d array `rets`.
+    """
+    mean = rets.mean(axis=0)
+    negative = rets < 0
+    count = negative.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        negative_mean = np.where(negative, rets, 0).sum(axis=0) / count
+        dev = np.sqrt(np.where(negative, (rets - negative_mean)**2, 0).sum(axis=0) / count)
+        sortino = (mean*period - risk_free) / (dev * np.sqrt(period))
+    return np.where((count == 0) | (dev == 0), 0, sortino)
+
 
 ########################################################################
 # STATS - this is the primary call used to generate the results
 
-def stats(ts, tlog, dbal, capital):
+class _StatsContext:
+    """
+    The inputs of `stats()` and the intermediate results shared by
+    several metrics.  Each intermediate result is computed once, the
+    first time a metric needs it.
+    """
+
+    def __init__(self, ts, tlog, dbal, capital, account):
+        self.ts = ts
+        self.tlog = tlog
+        self.dbal = dbal
+        self.capital = capital
+        self.account = account
+        self.start = ts.index[0]
+        self.end = ts.index[-1]
+        self._cache = {}
+
+    def _cached(self, key, func, *args):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = func(*args)
+            return value
+
+    @property
+    def cagr(self):
+        return self._cached('cagr', _annual_return_rate, self.dbal['close'].iloc[-1],
+                            self.capital, self.start, self.end)
+
+    @property
+    def closed_out_drawdown(self):
+        return self._cached('closed_out_drawdown', _max_closed_out_drawdown,
+                            self.dbal['close'])
+
+    @property
+    def returns(self):
+        return self._cached('returns', self.dbal['close'].pct_change)
+
+    def rolling_max_dd(self, period):
+        return self._cached(('rolling_max_dd', period), _rolling_max_dd,
+                            self.dbal['close'], period)
+
+    def rolling_max_ru(self, period):
+        return self._cached(('rolling_max_ru', period), _rolling_max_ru,
+                            self.dbal['close'], period)
+
+    def pct_change(self, period):
+        return self._cached(('pct_change', period), _pct_change,
+                            self.dbal['close'], period)
+
+
+_METRICS = {}
+"""
+dict : Dict of key value pair of metric:function, in the order of the
+`stats()` output.  The function takes a `_StatsContext` and returns a
+dict of key value pair of metric:value for the metrics that are
+computed together.
+"""
+
+
+def _metrics(*names):
+    """
+    Decorator for registering a function that computes `names`.
+    """
+    def decorator(func):
+        for name in names:
+            _METRICS[name] = func
+        return func
+    return decorator
+
+
+# OVERALL RESULTS
+
+@_metrics('start', 'end')
+def _stats_period(c):
+    return {'start': c.start.strftime('%Y-%m-%d'),
+            'end': c.end.strftime('%Y-%m-%d')}
+
+@_metrics('beginning_balance')
+def _stats_beginning_balance(c):
+    return {'beginning_balance': _beginning_balance(c.capital)}
+
+@_metrics('ending_balance')
+def _stats_ending_balance(c):
+    return {'ending_balance': _ending_balance(c.dbal)}
+
+@_metrics('total_net_profit')
+def _stats_total_net_profit(c):
+    return {'total_net_profit': _total_net_profit(c.tlog)}
+
+@_metrics('gross_profit')
+def _stats_gross_profit(c):
+    return {'gross_profit': _gross_profit(c.tlog)}
+
+@_metrics('gross_loss')
+def _stats_gross_loss(c):
+    return {'gross_loss': _gross_loss(c.tlog)}
+
+@_metrics('profit_factor')
+def _stats_profit_factor(c):
+    return {'profit_factor': _profit_factor(c.tlog)}
+
+@_metrics('return_on_initial_capital')
+def _stats_return_on_initial_capital(c):
+    return {'return_on_initial_capital': _return_on_initial_capital(c.tlog, c.capital)}
+
+@_metrics('annual_return_rate')
+def _stats_annual_return_rate(c):
+    return {'annual_return_rate': c.cagr}
+
+@_metrics('trading_period')
+def _stats_trading_period(c):
+    return {'trading_period': _trading_period(c.start, c.end)}
+
+@_metrics('pct_time_in_market')
+def _stats_pct_time_in_market(c):
+    return {'pct_time_in_market': _pct_time_in_market(c.dbal)}
+
+# LEVERAGE
+
+@_metrics('margin')
+def _stats_margin(c):
+    return {'margin': _margin(c.account)}
+
+@_metrics('avg_leverage', 'max_leverage', 'min_leverage')
+def _stats_leverage(c):
+    return {'avg_leverage': _avg_leverage(c.dbal),
+            'max_leverage': _max_leverage(c.dbal),
+            'min_leverage': _min_leverage(c.dbal)}
+
+# SUMS
+
+@_metrics('total_num_trades')
+def _stats_total_num_trades(c):
+    return {'total_num_trades': _total_num_trades(c.tlog)}
+
+@_metrics('trades_per_year')
+def _stats_trades_per_year(c):
+    return {'trades_per_year': _trades_per_year(c.tlog, c.start, c.end)}
+
+@_metrics('num_winning_trades', 'num_losing_trades', 'num_even_trades',
+          'pct_profitable_trades')
+def _stats_num_trades(c):
+    return {'num_winning_trades': _num_winning_trades(c.tlog),
+            'num_losing_trades': _num_losing_trades(c.tlog),
+            'num_even_trades': _num_even_trades(c.tlog),
+            'pct_profitable_trades': _pct_profitable_trades(c.tlog)}
+
+# CASH PROFITS AND LOSSES
+
+@_metrics('avg_profit_per_trade', 'avg_profit_per_winning_trade',
+          'avg_loss_per_losing_trade', 'ratio_avg_profit_win_loss',
+          'largest_profit_winning_trade', 'largest_loss_losing_trade')
+def _stats_cash(c):
+    return {'avg_profit_per_trade': _avg_profit_per_trade(c.tlog),
+            'avg_profit_per_winning_trade': _avg_profit_per_winning_trade(c.tlog),
+            'avg_loss_per_losing_trade': _avg_loss_per_losing_trade(c.tlog),
+            'ratio_avg_profit_win_loss': _ratio_avg_profit_win_loss(c.tlog),
+            'largest_profit_winning_trade': _largest_profit_winning_trade(c.tlog),
+            'largest_loss_losing_trade': _largest_loss_losing_trade(c.tlog)}
+
+# POINTS
+
+@_metrics('num_winning_points', 'num_losing_points', 'total_net_points',
+          'avg_points', 'largest_points_winning_trade',
+          'largest_points_losing_trade', 'avg_pct_gain_per_trade',
+          'largest_pct_winning_trade', 'largest_pct_losing_trade',
+          'expected_shortfall')
+def _stats_points(c):
+    return {'num_winning_points': _num_winning_points(c.tlog),
+            'num_losing_points': _num_losing_points(c.tlog),
+            'total_net_points': _total_net_points(c.tlog),
+            'avg_points': _avg_points(c.tlog),
+            'largest_points_winning_trade': _largest_points_winning_trade(c.tlog),
+            'largest_points_losing_trade': _largest_points_losing_trade(c.tlog),
+            'avg_pct_gain_per_trade': _avg_pct_gain_per_trade(c.tlog),
+            'largest_pct_winning_trade': _largest_pct_winning_trade(c.tlog),
+            'largest_pct_losing_trade': _largest_pct_losing_trade(c.tlog),
+            'expected_shortfall': _expected_shortfall(c.tlog)}
+
+# STREAKS
+
+@_metrics('max_consecutive_winning_trades', 'max_consecutive_losing_trades')
+def _stats_streaks(c):
+    return {'max_consecutive_winning_trades': _max_consecutive_winning_trades(c.tlog),
+            'max_consecutive_losing_trades': _max_consecutive_losing_trades(c.tlog)}
+
+@_metrics('avg_bars_winning_trades', 'avg_bars_losing_trades')
+def _stats_bars(c):
+    return {'avg_bars_winning_trades': _avg_bars_winning_trades(c.ts, c.tlog),
+            'avg_bars_losing_trades': _avg_bars_losing_trades(c.ts, c.tlog)}
+
+# DRAWDOWN
+
+@_metrics('max_closed_out_drawdown', 'max_closed_out_drawdown_peak_date',
+          'max_closed_out_drawdown_trough_date',
+          'max_closed_out_drawdown_recovery_date', 'drawdown_loss_period',
+          'drawdown_recovery_period')
+def _stats_closed_out_drawdown(c):
+    dd = c.closed_out_drawdown
+    s = {'max_closed_out_drawdown': dd['max'],
+         'max_closed_out_drawdown_peak_date': dd['peak_date'],
+         'max_closed_out_drawdown_trough_date': dd['trough_date'],
+         'max_closed_out_drawdown_recovery_date': dd['recovery_date']}
+    s['drawdown_loss_period'], s['drawdown_recovery_period'] = \
+    _drawdown_loss_recovery_period(dd['peak_date'], dd['trough_date'],
+                                   dd['recovery_date'])
+    return s
+
+@_metrics('annualized_return_over_max_drawdown')
+def _stats_return_over_max_drawdown(c):
+    dd = c.closed_out_drawdown
+    if dd['max'] == 0:
+        return {'annualized_return_over_max_drawdown': 0}
+    return {'annualized_return_over_max_drawdown': abs(c.cagr / dd['max'])}
+
+@_metrics('max_intra_day_drawdown')
+def _stats_intra_day_drawdown(c):
+    dd = _max_intra_day_drawdown(c.dbal['high'], c.dbal['low'])
+    return {'max_intra_day_drawdown': dd['max']}
+
+def _stats_rolling_drawdown(name, period):
+    @_metrics(f'avg_{name}_closed_out_drawdown', f'max_{name}_closed_out_drawdown')
+    def _stats(c):
+        dd = c.rolling_max_dd(period())
+        return {f'avg_{name}_closed_out_drawdown': np.average(dd),
+                f'max_{name}_closed_out_drawdown': min(dd)}
+    return _stats
+
+# The trading days are read when the metric is computed, so they
+# follow select_trading_days().
+_stats_rolling_drawdown('yearly', lambda: TRADING_DAYS_PER_YEAR)
+_stats_rolling_drawdown('monthly', lambda: TRADING_DAYS_PER_MONTH)
+_stats_rolling_drawdown('weekly', lambda: TRADING_DAYS_PER_WEEK)
+
+# RUNUP
+
+def _stats_rolling_runup(name, period):
+    @_metrics(f'avg_{name}_closed_out_runup', f'max_{name}_closed_out_runup')
+    def _stats(c):
+        ru = c.rolling_max_ru(period())
+        return {f'avg_{name}_closed_out_runup': np.average(ru),
+                f'max_{name}_closed_out_runup': max(ru)}
+    return _stats
+
+_stats_rolling_runup('yearly', lambda: TRADING_DAYS_PER_YEAR)
+_stats_rolling_runup('monthly', lambda: TRADING_DAYS_PER_MONTH)
+_stats_rolling_runup('weekly', lambda: TRADING_DAYS_PER_WEEK)
+
+# PERCENT CHANGE
+
+def _stats_pct_change(name, plural, std, period):
+    @_metrics(f'pct_profitable_{plural}', f'best_{name}', f'worst_{name}',
+              f'avg_{name}', f'{std}_std')
+    def _stats(c):
+        pc = c.pct_change(period())
+        if len(pc) == 0:
+            return {}
+        return {f'pct_profitable_{plural}': (pc > 0).sum() / len(pc) * 100,
+                f'best_{name}': pc.max(),
+                f'worst_{name}': pc.min(),
+                f'avg_{name}': np.average(pc),
+                f'{std}_std': pc.std()}
+    return _stats
+
+_stats_pct_change('year', 'years', 'annual', lambda: TRADING_DAYS_PER_YEAR)
+_stats_pct_change('month', 'months', 'monthly', lambda: TRADING_DAYS_PER_MONTH)
+_stats_pct_change('week', 'weeks', 'weekly', lambda: TRADING_DAYS_PER_WEEK)
+_stats_pct_change('day', 'days', 'daily', lambda: 1)
+
+# RATIOS
+
+@_metrics('sharpe_ratio', 'sharpe_ratio_max', 'sharpe_ratio_min')
+def _stats_sharpe_ratio(c):
+    sr = _sharpe_ratio(c.returns)
+    sr_std = math.sqrt((1 + 0.5*sr**2) / len(c.dbal))
+    return {'sharpe_ratio': sr,
+            'sharpe_ratio_max': sr + 3*sr_std, #3 std=>99.73%
+            'sharpe_ratio_min': sr - 3*sr_std}
+
+@_metrics('sortino_ratio')
+def _stats_sortino_ratio(c):
+    return {'sortino_ratio': _sortino_ratio(c.returns)}
+
+
+def stats(ts, tlog, dbal, capital, account=None, metrics=None):
     """
     Compute trading stats.
 
@@ -818,151 +1185,834 @@ def stats(ts, tlog, dbal, capital):
         The daily balance.
     capital : int
         The amount of money available for trading.
+    account : pf.Account, optional
+        The account used in the backtest, for reporting the margin
+        (default is None, which implies the default account of the
+        current thread).
+    metrics : list of str, optional
+        The metrics to compute (default is None, which implies all
+        metrics).  Only the work needed for these metrics is done,
+        and the intermediate results they share, e.g. the daily
+        returns, are computed once.
 
     Examples
     --------
     >>> stats = pf.stats(ts, tlog, dbal, capital)
+    >>> stats = pf.stats(ts, tlog, dbal, capital,
+    ...                  metrics=['sharpe_ratio', 'annual_return_rate'])
 
     Returns
     -------
     stats : pd.Series
-        The statistics for the strategy.
+        The statistics for the strategy.  If `metrics` is given, the
+        statistics are in the order of `metrics`.  The percent change
+        metrics are left out if the daily balance is too short.
     """
+    if metrics is None:
+        metrics = list(_METRICS)
+    else:
+        unknown = [metric for metric in metrics if metric not in _METRICS]
+        if unknown:
+            raise ValueError(f'unknown metrics: {unknown}')
 
-    start = ts.index[0]
-    end = ts.index[-1]
+    c = _StatsContext(ts, tlog, dbal, capital, account)
+    values = {}
+    computed = set()
+    for metric in metrics:
+        func = _METRICS[metric]
+        if func not in computed:
+            computed.add(func)
+            values.update(func(c))
 
     stats = pd.Series(dtype='object')
+    for metric in metrics:
+        if metric in values:
+            stats[metric] = values[metric]
+    # All numeric metrics would otherwise be inferred as float64.
+    return stats.astype('object')
 
-    # OVERALL RESULTS
-    stats['start'] = start.strftime('%Y-%m-%d')
-    stats['end'] = end.strftime('%Y-%m-%d')
-    stats['beginning_balance'] = _beginning_balance(capital)
-    stats['ending_balance'] = _ending_balance(dbal)
-    stats['total_net_profit'] = _total_net_profit(tlog)
-    stats['gross_profit'] = _gross_profit(tlog)
-    stats['gross_loss'] = _gross_loss(tlog)
-    stats['profit_factor'] = _profit_factor(tlog)
-    stats['return_on_initial_capital'] = _return_on_initial_capital(tlog, capital)
-    cagr = _annual_return_rate(dbal['close'].iloc[-1], capital, start, end)
-    stats['annual_return_rate'] = cagr
-    stats['trading_period'] = _trading_period(start, end)
-    stats['pct_time_in_market'] = _pct_time_in_market(dbal)
-
-    # LEVERAGE
-    stats['margin'] = _margin()
-    stats['avg_leverage'] = _avg_leverage(dbal)
-    stats['max_leverage'] = _max_leverage(dbal)
-    stats['min_leverage'] = _min_leverage(dbal)
-
-    # SUMS
-    stats['total_num_trades'] = _total_num_trades(tlog)
-    stats['trades_per_year'] = _trades_per_year(tlog, start, end)
-    stats['num_winning_trades'] = _num_winning_trades(tlog)
-    stats['num_losing_trades'] = _num_losing_trades(tlog)
-    stats['num_even_trades'] = _num_even_trades(tlog)
-    stats['pct_profitable_trades'] = _pct_profitable_trades(tlog)
-
-    # CASH PROFITS AND LOSSES
-    stats['avg_profit_per_trade'] = _avg_profit_per_trade(tlog)
-    stats['avg_profit_per_winning_trade'] = _avg_profit_per_winning_trade(tlog)
-    stats['avg_loss_per_losing_trade'] = _avg_loss_per_losing_trade(tlog)
-    stats['ratio_avg_profit_win_loss'] = _ratio_avg_profit_win_loss(tlog)
-    stats['largest_profit_winning_trade'] = _largest_profit_winning_trade(tlog)
-    stats['largest_loss_losing_trade'] = _largest_loss_losing_trade(tlog)
-
-    # POINTS
-    stats['num_winning_points'] = _num_winning_points(tlog)
-    stats['num_losing_points'] = _num_losing_points(tlog)
-    stats['total_net_points'] = _total_net_points(tlog)
-    stats['avg_points'] = _avg_points(tlog)
-    stats['largest_points_winning_trade'] = _largest_points_winning_trade(tlog)
-    stats['largest_points_losing_trade'] = _largest_points_losing_trade(tlog)
-    stats['avg_pct_gain_per_trade'] = _avg_pct_gain_per_trade(tlog)
-    stats['largest_pct_winning_trade'] = _largest_pct_winning_trade(tlog)
-    stats['largest_pct_losing_trade'] = _largest_pct_losing_trade(tlog)
-    stats['expected_shortfall'] = _expected_shortfall(tlog)
-
-    # STREAKS
-    stats['max_consecutive_winning_trades'] = _max_consecutive_winning_trades(tlog)
-    stats['max_consecutive_losing_trades'] = _max_consecutive_losing_trades(tlog)
-    stats['avg_bars_winning_trades'] = _avg_bars_winning_trades(ts, tlog)
-    stats['avg_bars_losing_trades'] = _avg_bars_losing_trades(ts, tlog)
-
-    # DRAWDOWN
-    dd = _max_closed_out_drawdown(dbal['close'])
-    stats['max_closed_out_drawdown'] = dd['max']
-    stats['max_closed_out_drawdown_peak_date'] = dd['peak_date']
-    stats['max_closed_out_drawdown_trough_date'] = dd['trough_date']
-    stats['max_closed_out_drawdown_recovery_date'] = dd['recovery_date']
-    stats['drawdown_loss_period'], stats['drawdown_recovery_period'] = \
-    _drawdown_loss_recovery_period(dd['peak_date'], dd['trough_date'],
-                                   dd['recovery_date'])
-    if dd['max'] == 0:
-        stats['annualized_return_over_max_drawdown'] = 0
+
+########################################################################
+# STATS MANY - the stats of many strategies at once
+
+class _ManyStatsContext:
+    """
+    The inputs of `stats_many()` and the intermediate results shared
+    by several metrics.  The values are arrays with one element, or
+    column, per strategy.
+    """
+
+    def __init__(self, close, capital, tlogs, dates):
+        self.close = close
+        self.capital = capital
+        self.tlogs = tlogs
+        self.dates = dates
+        self._cache = {}
+
+    def _cached(self, key, func):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = func()
+            return value
+
+    @property
+    def ending_balance(self):
+        return self.close[-1]
+
+    @property
+    def cagr(self):
+        def _cagr():
+            B = np.maximum(self.ending_balance, 0)
+            n = _difference_in_years(self.dates[0], self.dates[-1])
+            return (np.power(B / self.capital, 1 / n) - 1) * 100
+        return self._cached('cagr', _cagr)
+
+    @property
+    def max_closed_out_drawdown(self):
+        def _max_dd():
+            running_max = np.maximum.accumulate(self.close, axis=0)
+            dd = _drawdown(self.close, running_max).min(axis=0)
+            return np.minimum(dd, 0)
+        return self._cached('max_closed_out_drawdown', _max_dd)
+
+    @property
+    def returns(self):
+        return self._cached('returns',
+                            lambda: self.close[1:] / self.close[:-1] - 1)
+
+    @property
+    def trades(self):
+        """
+        The number of trades of each strategy, and the pl_cash and
+        strategy of every trade.
+        """
+        def _trades():
+            sizes = np.array([len(tlog) for tlog in self.tlogs], dtype=int)
+            pl_cash = np.concatenate(
+                [tlog['pl_cash'].to_numpy(dtype=float) for tlog in self.tlogs] + [[]])
+            return sizes, pl_cash, np.repeat(np.arange(len(sizes)), sizes)
+        return self._cached('trades', _trades)
+
+    @property
+    def total_net_profit(self):
+        def _total_net_profit():
+            sizes, _, _ = self.trades
+            cumul_total = np.concatenate(
+                [tlog['cumul_total'].to_numpy(dtype=float) for tlog in self.tlogs] + [[]])
+            total = np.zeros(len(sizes))
+            total[sizes > 0] = cumul_total[np.cumsum(sizes)[sizes > 0] - 1]
+            return total
+        return self._cached('total_net_profit', _total_net_profit)
+
+    def trade_sum(self, values):
+        sizes, _, strategy = self.trades
+        return np.bincount(strategy, weights=values, minlength=len(sizes))
+
+
+_MANY_METRICS = {}
+"""
+dict : Dict of key value pair of metric:function, in the order of the
+`stats_many()` output.  The function takes a `_ManyStatsContext` and
+returns a dict of key value pair of metric:values for the metrics that
+are computed together.  The `needs` attribute of the function is the
+optional inputs it needs, i.e. 'tlogs' or 'dates'.
+"""
+
+
+def _many_metrics(*names, needs=()):
+    """
+    Decorator for registering a function that computes `names` for
+    `stats_many()`.
+    """
+    def decorator(func):
+        func.needs = needs
+        for name in names:
+            _MANY_METRICS[name] = func
+        return func
+    return decorator
+
+
+@_many_metrics('beginning_balance')
+def _many_beginning_balance(c):
+    return {'beginning_balance': c.capital}
+
+@_many_metrics('ending_balance')
+def _many_ending_balance(c):
+    return {'ending_balance': c.ending_balance}
+
+@_many_metrics('total_net_profit', 'gross_profit', 'gross_loss', 'profit_factor',
+               'return_on_initial_capital', needs=('tlogs',))
+def _many_profit(c):
+    _, pl_cash, _ = c.trades
+    gross_profit = c.trade_sum(np.where(pl_cash > 0, pl_cash, 0))
+    gross_loss = c.trade_sum(np.where(pl_cash < 0, pl_cash, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(gross_profit == 0, 0,
+                                 np.where(gross_loss == 0, 1000,
+                                          gross_profit / gross_loss * -1))
+    return {'total_net_profit': c.total_net_profit,
+            'gross_profit': gross_profit,
+            'gross_loss': gross_loss,
+            'profit_factor': profit_factor,
+            'return_on_initial_capital': c.total_net_profit / c.capital * 100}
+
+@_many_metrics('annual_return_rate', needs=('dates',))
+def _many_annual_return_rate(c):
+    return {'annual_return_rate': c.cagr}
+
+@_many_metrics('total_num_trades', 'num_winning_trades', 'num_losing_trades',
+               'num_even_trades', 'pct_profitable_trades', needs=('tlogs',))
+def _many_num_trades(c):
+    sizes, pl_cash, _ = c.trades
+    num_winning_trades = c.trade_sum(pl_cash > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_profitable_trades = np.where(sizes == 0, 0, num_winning_trades / sizes * 100)
+    return {'total_num_trades': sizes,
+            'num_winning_trades': num_winning_trades,
+            'num_losing_trades': c.trade_sum(pl_cash < 0),
+            'num_even_trades': c.trade_sum(pl_cash == 0),
+            'pct_profitable_trades': pct_profitable_trades}
+
+@_many_metrics('avg_profit_per_trade', needs=('tlogs',))
+def _many_avg_profit_per_trade(c):
+    sizes, _, _ = c.trades
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg = np.where(sizes == 0, 0, c.total_net_profit / sizes)
+    return {'avg_profit_per_trade': avg}
+
+@_many_metrics('max_closed_out_drawdown')
+def _many_closed_out_drawdown(c):
+    return {'max_closed_out_drawdown': c.max_closed_out_drawdown}
+
+@_many_metrics('annualized_return_over_max_drawdown', needs=('dates',))
+def _many_return_over_max_drawdown(c):
+    dd = c.max_closed_out_drawdown
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(dd == 0, 0, np.abs(c.cagr / dd))
+    return {'annualized_return_over_max_drawdown': ratio}
+
+def _many_rolling(name, kind, period, runup):
+    @_many_metrics(f'avg_{name}_closed_out_{kind}', f'max_{name}_closed_out_{kind}')
+    def _stats(c):
+        # A column at a time would be slow, and all columns at once
+        # would need several arrays the size of `close`.
+        n, S = c.close.shape
+        chunk = max(1, 2**21 // n)
+        avg, best = np.empty(S), np.empty(S)
+        for i in range(0, S, chunk):
+            rmdd = _rolling_max_drawdown(c.close[:, i:i+chunk], period(), runup)
+            avg[i:i+chunk] = rmdd.mean(axis=0)
+            best[i:i+chunk] = rmdd.max(axis=0) if runup else rmdd.min(axis=0)
+        return {f'avg_{name}_closed_out_{kind}': avg,
+                f'max_{name}_closed_out_{kind}': best}
+    return _stats
+
+_many_rolling('yearly', 'drawdown', lambda: TRADING_DAYS_PER_YEAR, False)
+_many_rolling('monthly', 'drawdown', lambda: TRADING_DAYS_PER_MONTH, False)
+_many_rolling('weekly', 'drawdown', lambda: TRADING_DAYS_PER_WEEK, False)
+_many_rolling('yearly', 'runup', lambda: TRADING_DAYS_PER_YEAR, True)
+_many_rolling('monthly', 'runup', lambda: TRADING_DAYS_PER_MONTH, True)
+_many_rolling('weekly', 'runup', lambda: TRADING_DAYS_PER_WEEK, True)
+
+def _many_pct_change(name, plural, std, period):
+    @_many_metrics(f'pct_profitable_{plural}', f'best_{name}', f'worst_{name}',
+                   f'avg_{name}', f'{std}_std')
+    def _stats(c):
+        p = period()
+        if len(c.close) <= p:
+            return {}
+        pc = (c.close[p:] - c.close[:-p]) / c.close[:-p] * 100
+        return {f'pct_profitable_{plural}': (pc > 0).sum(axis=0) / len(pc) * 100,
+                f'best_{name}': pc.max(axis=0),
+                f'worst_{name}': pc.min(axis=0),
+                f'avg_{name}': pc.mean(axis=0),
+                f'{std}_std': pc.std(axis=0, ddof=1) if len(pc) > 1 else np.nan}
+    return _stats
+
+_many_pct_change('year', 'years', 'annual', lambda: TRADING_DAYS_PER_YEAR)
+_many_pct_change('month', 'months', 'monthly', lambda: TRADING_DAYS_PER_MONTH)
+_many_pct_change('week', 'weeks', 'weekly', lambda: TRADING_DAYS_PER_WEEK)
+_many_pct_change('day', 'days', 'daily', lambda: 1)
+
+@_many_metrics('sharpe_ratio', 'sharpe_ratio_max', 'sharpe_ratio_min')
+def _many_sharpe_ratio(c):
+    sr = _sharpe_ratios(c.returns)
+    sr_std = np.sqrt((1 + 0.5*sr**2) / len(c.close))
+    return {'sharpe_ratio': sr,
+            'sharpe_ratio_max': sr + 3*sr_std,
+            'sharpe_ratio_min': sr - 3*sr_std}
+
+@_many_metrics('sortino_ratio')
+def _many_sortino_ratio(c):
+    return {'sortino_ratio': _sortino_ratios(c.returns)}
+
+
+def stats_many(close, capital, tlogs=None, dates=None, metrics=None):
+    """
+    Compute trading stats for many strategies at once.
+
+    The daily balances of all the strategies are held in one 2d
+    array, so the drawdowns, runups, percent changes, and ratios of
+    every strategy are computed together by numpy, instead of by one
+    `stats()` call per strategy.  The metrics have the same names as
+    in `stats()`, and the same values, to within floating point
+    rounding.  Only a subset of the `stats()` metrics is available,
+    see `stats_many_metrics`.
+
+    Parameters
+    ----------
+    close : pd.DataFrame or np.ndarray
+        The daily closing balance of each strategy, one column per
+        strategy, e.g. the 'close' column of each daily balance.
+        Every strategy must cover the same days.
+    capital : int or array-like
+        The amount of money available for trading, either the same
+        for every strategy or one per strategy.
+    tlogs : list of pd.DataFrame, optional
+        The trade log of each strategy, in the order of the columns
+        of `close`, or a dict keyed by column (default is None, which
+        leaves out the trade metrics).
+    dates : sequence of datetime, optional
+        The dates of the rows of `close` (default is None, which
+        implies the index of `close` if it is a pd.DatetimeIndex).
+        The annual return rate metrics are left out without dates.
+    metrics : list of str, optional
+        The metrics to compute (default is None, which implies all the
+        metrics available from the inputs).
+
+    Examples
+    --------
+    >>> close = pd.DataFrame({name: s.dbal['close'] for name, s in strategies.items()})
+    >>> tlogs = {name: s.tlog for name, s in strategies.items()}
+    >>> df = pf.stats_many(close, capital, tlogs)
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Summary of metrics vs strategies, laid out like
+        `optimizer_summary()`, but with the values unformatted.
+    """
+    if isinstance(close, pd.DataFrame):
+        columns = close.columns
+        if dates is None and isinstance(close.index, pd.DatetimeIndex):
+            dates = close.index
+        close = close.to_numpy(dtype=float)
+    else:
+        close = np.asarray(close, dtype=float)
+        columns = pd.RangeIndex(close.shape[1])
+    if isinstance(tlogs, (dict, pd.Series)):
+        tlogs = [tlogs[column] for column in columns]
+    capital = np.broadcast_to(np.asarray(capital, dtype=float), len(columns))
+
+    inputs = {'tlogs': tlogs, 'dates': dates}
+    if metrics is None:
+        metrics = [metric for metric, func in _MANY_METRICS.items()
+                   if all(inputs[need] is not None for need in func.needs)]
     else:
-        stats['annualized_return_over_max_drawdown'] = abs(cagr / dd['max'])
-    dd = _max_intra_day_drawdown(dbal['high'], dbal['low'])
-    stats['max_intra_day_drawdown'] = dd['max']
-    dd = _rolling_max_dd(dbal['close'], TRADING_DAYS_PER_YEAR)
-    stats['avg_yearly_closed_out_drawdown'] = np.average(dd)
-    stats['max_yearly_closed_out_drawdown'] = min(dd)
-    dd = _rolling_max_dd(dbal['close'], TRADING_DAYS_PER_MONTH)
-    stats['avg_monthly_closed_out_drawdown'] = np.average(dd)
-    stats['max_monthly_closed_out_drawdown'] = min(dd)
-    dd = _rolling_max_dd(dbal['close'], TRADING_DAYS_PER_WEEK)
-    stats['avg_weekly_closed_out_drawdown'] = np.average(dd)
-    stats['max_weekly_closed_out_drawdown'] = min(dd)
-
-    # RUNUP
-    ru = _rolling_max_ru(dbal['close'], TRADING_DAYS_PER_YEAR)
-    stats['avg_yearly_closed_out_runup'] = np.average(ru)
-    stats['max_yearly_closed_out_runup'] = ru.max()
-    ru = _rolling_max_ru(dbal['close'], TRADING_DAYS_PER_MONTH)
-    stats['avg_monthly_closed_out_runup'] = np.average(ru)
-    stats['max_monthly_closed_out_runup'] = max(ru)
-    ru = _rolling_max_ru(dbal['close'], TRADING_DAYS_PER_WEEK)
-    stats['avg_weekly_closed_out_runup'] = np.average(ru)
-    stats['max_weekly_closed_out_runup'] = max(ru)
-
-    # PERCENT CHANGE
-    pc = _pct_change(dbal['close'], TRADING_DAYS_PER_YEAR)
-    if len(pc) > 0:
-        stats['pct_profitable_years'] = (pc > 0).sum() / len(pc) * 100
-        stats['best_year'] = pc.max()
-        stats['worst_year'] = pc.min()
-        stats['avg_year'] = np.average(pc)
-        stats['annual_std'] = pc.std()
-    pc = _pct_change(dbal['close'], TRADING_DAYS_PER_MONTH)
-    if len(pc) > 0:
-        stats['pct_profitable_months'] = (pc > 0).sum() / len(pc) * 100
-        stats['best_month'] = pc.max()
-        stats['worst_month'] = pc.min()
-        stats['avg_month'] = np.average(pc)
-        stats['monthly_std'] = pc.std()
-    pc = _pct_change(dbal['close'], TRADING_DAYS_PER_WEEK)
-    if len(pc) > 0:
-        stats['pct_profitable_weeks'] = (pc > 0).sum() / len(pc) * 100
-        stats['best_week'] = pc.max()
-        stats['worst_week'] = pc.min()
-        stats['avg_week'] = np.average(pc)
-        stats['weekly_std'] = pc.std()
-    pc = _pct_change(dbal['close'], 1)
-    if len(pc) > 0:
-        stats['pct_profitable_days'] = (pc > 0).sum() / len(pc) * 100
-        stats['best_day'] = pc.max()
-        stats['worst_day'] = pc.min()
-        stats['avg_day'] = np.average(pc)
-        stats['daily_std'] = pc.std()
-
-    # RATIOS
-    sr = _sharpe_ratio(dbal['close'].pct_change())
-    sr_std = math.sqrt((1 + 0.5*sr**2) / len(dbal))
-    stats['sharpe_ratio'] = sr
-    stats['sharpe_ratio_max'] = sr + 3*sr_std #3 std=>99.73%
-    stats['sharpe_ratio_min'] = sr - 3*sr_std
-    stats['sortino_ratio'] = _sortino_ratio(dbal['close'].pct_change())
-    return stats
+        unknown = [metric for metric in metrics if metric not in _MANY_METRICS]
+        if unknown:
+            raise ValueError(f'unknown metrics: {unknown}')
+        for metric in metrics:
+            missing = [need for need in _MANY_METRICS[metric].needs
+                       if inputs[need] is None]
+            if missing:
+                raise ValueError(f'{metric} needs {missing[0]}')
+
+    c = _ManyStatsContext(close, capital, tlogs, dates)
+    values = {}
+    computed = set()
+    for metric in metrics:
+        func = _MANY_METRICS[metric]
+        if func not in computed:
+            computed.add(func)
+            values.update(func(c))
+
+    metrics = [metric for metric in metrics if metric in values]
+    data = [np.broadcast_to(values[metric], len(columns)) for metric in metrics]
+    return pd.DataFrame(data, index=metrics, columns=columns, dtype=float)
+
+
+stats_many_metrics = tuple(_MANY_METRICS)
+"""
+tuple : The metrics available from `stats_many()`.
+"""
+
+
+########################################################################
+# ONLINE STATS - the stats of a strategy, updated one day at a time
+
+class _RunningMoments:
+    """
+    The running mean and standard deviation of a stream of values,
+    using Welford's algorithm.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+    def std(self, ddof=0):
+        if self.n <= ddof:
+            return np.nan
+        return math.sqrt(self._m2 / (self.n - ddof))
+
+
+class _RollingWindow:
+    """
+    The last `size` values of a stream, padded at the front with the
+    first value, as in `_rolling_max_drawdown()`.
+
+    The values are kept in a buffer twice the size of the window,
+    which is shifted back to the front when it is full, so a push is
+    amortized O(1) and the window is a view into the buffer.
+    """
+
+    def __init__(self, size, first):
+        self._buf = np.full(2 * size, first, dtype=float)
+        self._size = size
+        self._end = size - 1
+
+    def push(self, x):
+        if self._end == len(self._buf):
+            self._buf[:self._size-1] = self._buf[self._end-self._size+1:]
+            self._end = self._size - 1
+        self._buf[self._end] = x
+        self._end += 1
+        return self._buf[self._end-self._size:self._end]
+
+
+class _RunningDrawdown:
+    """
+    The max drawdown of a stream, with the dates of its peak, trough,
+    and recovery, as in `_max_closed_out_drawdown()`.
+    """
+
+    def __init__(self):
+        self.peak = -math.inf
+        self.peak_date = None
+        self.max = None
+        self.max_peak = None
+        self.max_peak_date = None
+        self.trough_date = None
+        self.recovery_date = None
+
+    def add(self, date, high, low):
+        if high > self.peak:
+            self.peak, self.peak_date = high, date
+        dd = _drawdown(low, self.peak)
+        if self.max is None or dd < self.max:
+            self.max = dd
+            self.max_peak, self.max_peak_date = self.peak, self.peak_date
+            self.trough_date = date
+            self.recovery_date = None
+        elif self.recovery_date is None and high > self.max_peak:
+            self.recovery_date = date
+
+
+def _online_ratio(mean, dev, risk_free=0.00, period=TRADING_DAYS_PER_YEAR):
+    """
+    The sharpe or sortino ratio, from the mean and deviation of the
+    returns, as in `_sharpe_ratio()` and `_sortino_ratio()`.
+    """
+    if math.isclose(dev, 0):
+        return 0
+    return (mean*period - risk_free) / (dev * np.sqrt(period))
+
+
+class OnlineStats:
+    """
+    The stats of a strategy, updated one day at a time.
+
+    `stats()` computes the metrics from the whole daily balance and
+    trade log.  An `OnlineStats` is instead fed the daily balance of
+    one day, and the trades closed that day, at a time, e.g. in live
+    trading.  It keeps running sums, extrema, streaks, and Welford
+    means and variances, so an update is O(1), except for the rolling
+    drawdown and runup, which are O(period).  `stats()` may be called
+    at any time, and returns the same metrics as `pf.stats()`.
+
+    The trading days per year, month, and week are read when the
+    instance is created, see `select_trading_days()`.
+
+    Methods
+    -------
+     - update()
+       Add the daily balance of a day, and the trades closed that day.
+
+     - stats()
+       Return the stats of the days and trades added so far.
+
+    Examples
+    --------
+    >>> online = pf.OnlineStats(capital)
+    >>> for date, row in dbal.iterrows():
+    ...     online.update(date, row.close, row.high, row.low,
+    ...                   row.shares, row.leverage,
+    ...                   trades=tlog[tlog.exit_date == date])
+    >>> stats = online.stats()
+    """
+
+    def __init__(self, capital, account=None):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        capital : int
+            The amount of money available for trading.
+        account : pf.Account, optional
+            The account used in the backtest, for reporting the margin
+            (default is None, which implies the default account of the
+            current thread).
+
+        Attributes
+        ----------
+        capital : int
+            The amount of money available for trading.
+        account : pf.Account
+            The account used in the backtest.
+        """
+        self.capital = capital
+        self.account = account
+
+        self._dates = []
+        self._close = None
+        self._shares = [0, 0]
+        self._days_in_market = 0
+        self._leverage = [0.0, math.inf, -math.inf]
+        self._returns = _RunningMoments()
+        self._negative_returns = _RunningMoments()
+        self._closed_out_drawdown = _RunningDrawdown()
+        self._intra_day_drawdown = _RunningDrawdown()
+
+        # The rolling drawdown and runup:  name -> [period, sum of
+        # drawdowns, max drawdown, sum of runups, max runup].
+        self._rolling = {
+            'yearly': [TRADING_DAYS_PER_YEAR, 0.0, math.inf, 0.0, -math.inf],
+            'monthly': [TRADING_DAYS_PER_MONTH, 0.0, math.inf, 0.0, -math.inf],
+            'weekly': [TRADING_DAYS_PER_WEEK, 0.0, math.inf, 0.0, -math.inf]}
+        # The percent change:  name -> [period, plural, std, moments,
+        # number profitable, best, worst].
+        self._pct_change = {
+            'year': [TRADING_DAYS_PER_YEAR, 'years', 'annual'],
+            'month': [TRADING_DAYS_PER_MONTH, 'months', 'monthly'],
+            'week': [TRADING_DAYS_PER_WEEK, 'weeks', 'weekly'],
+            'day': [1, 'days', 'daily']}
+        for pc in self._pct_change.values():
+            pc.extend([_RunningMoments(), 0, -math.inf, math.inf])
+        self._windows = None
+
+        self._num_trades = 0
+        self._num_winning_trades = 0
+        self._num_losing_trades = 0
+        self._total_net_profit = 0
+        self._gross_profit = 0
+        self._gross_loss = 0
+        self._largest_profit = -math.inf
+        self._largest_loss = math.inf
+        self._total_points = 0
+        self._winning_points = 0
+        self._losing_points = 0
+        self._largest_points_win = -math.inf
+        self._largest_points_loss = math.inf
+        self._total_pct = 0
+        self._largest_pct_win = np.nan
+        self._largest_pct_loss = np.nan
+        self._losing_pcts = []
+        self._streaks = [0, 0]
+        self._max_streaks = [0, 0]
+        self._winning_bars = 0
+        self._losing_bars = 0
+
+    def update(self, date, close, high=None, low=None, shares=0, leverage=0,
+               trades=None):
+        """
+        Add the daily balance of a day, and the trades closed that day.
+
+        Parameters
+        ----------
+        date : datetime
+            The date, which must be after the date of the last update.
+        close : float
+            The balance close value of the day.
+        high : float, optional
+            The balance high value of the day (default is None,
+            which implies that the 'high' is the 'close').
+        low : float, optional
+            The balance low value of the day (default is None,
+            which implies that the 'low' is the 'close').
+        shares : int, optional
+            The number of shares held at the close (default is 0).
+        leverage : float, optional
+            The leverage at the close (default is 0).
+        trades : pd.DataFrame or list of dict, optional
+            The rows of the trade log of the trades closed on `date`
+            (default is None, which implies no trades).
+
+        Returns
+        -------
+        None
+        """
+        if high is None:  high = close
+        if low  is None:  low  = close
+        date = pd.Timestamp(date)
+        if self._dates and date <= self._dates[-1]:
+            raise ValueError(f'{date} is not after {self._dates[-1]}')
+
+        if self._windows is None:
+            periods = ([r[0] for r in self._rolling.values()] +
+                       [pc[0] for pc in self._pct_change.values()])
+            self._windows = {period: _RollingWindow(period + 1, close)
+                             for period in set(periods)}
+        else:
+            ret = close / self._close - 1
+            self._returns.add(ret)
+            if ret < 0:
+                self._negative_returns.add(ret)
+        self._dates.append(date)
+        self._close = close
+
+        self._shares = [self._shares[1], shares]
+        if shares > 0:
+            self._days_in_market += 1
+        self._leverage[0] += leverage
+        self._leverage[1] = min(self._leverage[1], leverage)
+        self._leverage[2] = max(self._leverage[2], leverage)
+
+        self._closed_out_drawdown.add(date, close, close)
+        self._intra_day_drawdown.add(date, high, low)
+
+        windows = {period: window.push(close)
+                   for period, window in self._windows.items()}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for r in self._rolling.values():
+                y = windows[r[0]]
+                dd = _drawdown(y, np.maximum.accumulate(y)).min()
+                ru = _drawdown(y, np.minimum.accumulate(y)).max()
+                r[1] += dd
+                r[2] = min(r[2], dd)
+                r[3] += ru
+                r[4] = max(r[4], ru)
+
+        for pc in self._pct_change.values():
+            period, moments = pc[0], pc[3]
+            if len(self._dates) > period:
+                begin = windows[period][0]
+                change = (close - begin) / begin * 100
+                moments.add(change)
+                pc[4] += change > 0
+                pc[5] = max(pc[5], change)
+                pc[6] = min(pc[6], change)
+
+        if trades is not None:
+            if isinstance(trades, pd.DataFrame):
+                trades = trades.to_dict('records')
+            for trade in trades:
+                self._add_trade(trade)
+
+    def _add_trade(self, trade):
+        pl_cash = trade['pl_cash']
+        pl_points = trade['pl_points']
+        pct = pl_points / trade['entry_price']
+
+        self._num_trades += 1
+        self._total_net_profit += pl_cash
+        self._total_points += pl_points
+        self._total_pct += pct
+
+        entry = bisect.bisect_left(self._dates, pd.Timestamp(trade['entry_date']))
+        exit = bisect.bisect_right(self._dates, pd.Timestamp(trade['exit_date']))
+        bars = max(exit - entry, 0)
+        if pl_cash > 0:
+            self._num_winning_trades += 1
+            self._gross_profit += pl_cash
+            self._largest_profit = max(self._largest_profit, pl_cash)
+            self._winning_bars += bars
+        elif pl_cash < 0:
+            self._num_losing_trades += 1
+            self._gross_loss += pl_cash
+            self._largest_loss = min(self._largest_loss, pl_cash)
+            self._losing_bars += bars
+
+        if pl_points > 0:
+            self._winning_points += pl_points
+            self._largest_points_win = max(self._largest_points_win, pl_points)
+            self._largest_pct_win = np.fmax(self._largest_pct_win, pct)
+        elif pl_points < 0:
+            self._losing_points += pl_points
+            self._largest_points_loss = min(self._largest_points_loss, pl_points)
+            self._largest_pct_loss = np.fmin(self._largest_pct_loss, pct)
+            bisect.insort(self._losing_pcts, pct)
+
+        # The current and longest streaks of winning and not winning
+        # trades.
+        win = int(pl_cash > 0)
+        self._streaks[win] += 1
+        self._streaks[1 - win] = 0
+        self._max_streaks[win] = max(self._max_streaks[win], self._streaks[win])
+
+    def _values(self):
+        """
+        Returns a dict of key value pair of metric:value.
+        """
+        start, end = self._dates[0], self._dates[-1]
+        n = len(self._dates)
+        # A CAGR needs a trading period longer than a day.
+        if start == end:
+            cagr = 0
+        else:
+            cagr = _annual_return_rate(self._close, self.capital, start, end)
+        s = {}
+
+        s['start'] = start.strftime('%Y-%m-%d')
+        s['end'] = end.strftime('%Y-%m-%d')
+        s['beginning_balance'] = _beginning_balance(self.capital)
+        s['ending_balance'] = self._close
+        s['total_net_profit'] = self._total_net_profit
+        s['gross_profit'] = self._gross_profit
+        s['gross_loss'] = self._gross_loss
+        if self._gross_profit == 0:
+            s['profit_factor'] = 0
+        elif self._gross_loss == 0:
+            s['profit_factor'] = 1000
+        else:
+            s['profit_factor'] = self._gross_profit / self._gross_loss * -1
+        s['return_on_initial_capital'] = self._total_net_profit / self.capital * 100
+        s['annual_return_rate'] = cagr
+        s['trading_period'] = _trading_period(start, end)
+        days_in_market = self._days_in_market + (n > 1 and self._shares[0] > 0)
+        s['pct_time_in_market'] = days_in_market / n * 100
+
+        s['margin'] = _margin(self.account)
+        s['avg_leverage'] = self._leverage[0] / n
+        s['max_leverage'] = self._leverage[2]
+        s['min_leverage'] = self._leverage[1]
+
+        diff = relativedelta(end, start)
+        years = diff.years + diff.months/12 + diff.days/365
+        s['total_num_trades'] = self._num_trades
+        s['trades_per_year'] = self._num_trades / years if years else 0
+        s['num_winning_trades'] = wins = self._num_winning_trades
+        s['num_losing_trades'] = losses = self._num_losing_trades
+        s['num_even_trades'] = self._num_trades - wins - losses
+        s['pct_profitable_trades'] = (wins / self._num_trades * 100
+                                      if self._num_trades else 0)
+
+        s['avg_profit_per_trade'] = (self._total_net_profit / self._num_trades
+                                     if self._num_trades else 0)
+        s['avg_profit_per_winning_trade'] = avg_win = (
+            self._gross_profit / wins if wins else 0)
+        s['avg_loss_per_losing_trade'] = avg_loss = (
+            self._gross_loss / losses if losses else 0)
+        if avg_win == 0:
+            s['ratio_avg_profit_win_loss'] = 0
+        elif avg_loss == 0:
+            s['ratio_avg_profit_win_loss'] = 1000
+        else:
+            s['ratio_avg_profit_win_loss'] = avg_win / avg_loss * -1
+        s['largest_profit_winning_trade'] = self._largest_profit if wins else 0
+        s['largest_loss_losing_trade'] = self._largest_loss if losses else 0
+
+        s['num_winning_points'] = self._winning_points if wins else 0
+        s['num_losing_points'] = self._losing_points if losses else 0
+        s['total_net_points'] = s['num_winning_points'] + s['num_losing_points']
+        s['avg_points'] = (self._total_points / self._num_trades
+                           if self._num_trades else 0)
+        s['largest_points_winning_trade'] = self._largest_points_win if wins else 0
+        s['largest_points_losing_trade'] = self._largest_points_loss if losses else 0
+        s['avg_pct_gain_per_trade'] = (self._total_pct / self._num_trades * 100
+                                       if self._num_trades else 0)
+        s['largest_pct_winning_trade'] = self._largest_pct_win * 100 if wins else 0
+        s['largest_pct_losing_trade'] = self._largest_pct_loss * 100 if losses else 0
+        worst = int(len(self._losing_pcts) * .05)
+        s['expected_shortfall'] = (np.mean(self._losing_pcts[:worst]) * 100
+                                   if worst > 0 else 0)
+
+        s['max_consecutive_winning_trades'] = self._max_streaks[1] if wins else 0
+        s['max_consecutive_losing_trades'] = self._max_streaks[0] if losses else 0
+        s['avg_bars_winning_trades'] = self._winning_bars / wins if wins else 0
+        s['avg_bars_losing_trades'] = self._losing_bars / losses if losses else 0
+
+        dd = self._closed_out_drawdown
+        peak_date = dd.max_peak_date.strftime('%Y-%m-%d')
+        trough_date = dd.trough_date.strftime('%Y-%m-%d')
+        recovery_date = (dd.recovery_date.strftime('%Y-%m-%d')
+                         if dd.recovery_date is not None else 'Not Recovered Yet')
+        s['max_closed_out_drawdown'] = min(0, dd.max)
+        s['max_closed_out_drawdown_peak_date'] = peak_date
+        s['max_closed_out_drawdown_trough_date'] = trough_date
+        s['max_closed_out_drawdown_recovery_date'] = recovery_date
+        s['drawdown_loss_period'], s['drawdown_recovery_period'] = \
+        _drawdown_loss_recovery_period(peak_date, trough_date, recovery_date)
+        s['annualized_return_over_max_drawdown'] = (
+            abs(cagr / dd.max) if min(0, dd.max) != 0 else 0)
+        s['max_intra_day_drawdown'] = min(0, self._intra_day_drawdown.max)
+
+        for name, (_, dd_sum, dd_max, ru_sum, ru_max) in self._rolling.items():
+            s[f'avg_{name}_closed_out_drawdown'] = dd_sum / n
+            s[f'max_{name}_closed_out_drawdown'] = dd_max
+        for name, (_, dd_sum, dd_max, ru_sum, ru_max) in self._rolling.items():
+            s[f'avg_{name}_closed_out_runup'] = ru_sum / n
+            s[f'max_{name}_closed_out_runup'] = ru_max
+
+        for name, (_, plural, std, moments, profitable, best, worst) \
+                in self._pct_change.items():
+            if moments.n == 0:
+                continue
+            s[f'pct_profitable_{plural}'] = profitable / moments.n * 100
+            s[f'best_{name}'] = best
+            s[f'worst_{name}'] = worst
+            s[f'avg_{name}'] = moments.mean
+            s[f'{std}_std'] = moments.std(ddof=1)
+
+        returns, negative_returns = self._returns, self._negative_returns
+        sr = (_online_ratio(returns.mean, returns.std())
+              if returns.n else 0)
+        sr_std = math.sqrt((1 + 0.5*sr**2) / n)
+        s['sharpe_ratio'] = sr
+        s['sharpe_ratio_max'] = sr + 3*sr_std
+        s['sharpe_ratio_min'] = sr - 3*sr_std
+        s['sortino_ratio'] = (_online_ratio(returns.mean, negative_returns.std())
+                              if negative_returns.n else 0)
+        return s
+
+    def stats(self, metrics=None):
+        """
+        Return the stats of the days and trades added so far.
+
+        Parameters
+        ----------
+        metrics : list of str, optional
+            The metrics to return (default is None, which implies all
+            metrics).
+
+        Returns
+        -------
+        stats : pd.Series
+            The statistics for the strategy, as returned by
+            `pf.stats()`.  The sharpe and sortino ratios, and the
+            averages, may differ from `pf.stats()` by rounding.
+        """
+        if metrics is None:
+            metrics = list(_METRICS)
+        else:
+            unknown = [metric for metric in metrics if metric not in _METRICS]
+            if unknown:
+                raise ValueError(f'unknown metrics: {unknown}')
+        if not self._dates:
+            raise ValueError('no daily balances, call update() first')
+
+        values = self._values()
+        return pd.Series({metric: values[metric] for metric in metrics
+                          if metric in values}, dtype='object')
 
 
 ########################################################################
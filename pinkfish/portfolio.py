@@ -2,6 +2,8 @@
 Portfolio backtesting.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import datetime
 from functools import wraps
 
 import matplotlib.pyplot as plt
@@ -9,13 +11,17 @@ import numpy as np
 import pandas as pd
 import seaborn
 
+from pinkfish.bars import Bar, Bars
 from pinkfish.pfcalendar import calendar
 from pinkfish.fetch import (
-    fetch_timeseries,
+    FetchError,
+    _cache_symbols,
+    _fetch_timeseries,
     select_tradeperiod,
     finalize_timeseries
 )
 import pinkfish.pfstatistics as pfstatistics
+from pinkfish.stock_market_calendar import stock_market_calendar
 import pinkfish.trade as trade
 import pinkfish.utility as utility
 
@@ -75,12 +81,205 @@ def technical_indicator(symbols, output_column_suffix,
                 indicator_column[output_column] = func(*args, **kwargs)
             
             # Join all the symbol columns to the original DataFrame using pd.concat
-            ts = pd.concat([ts, pd.DataFrame(indicator_column)], axis=1)
+            ts = pd.concat([ts, pd.DataFrame(indicator_column, index=ts.index)], axis=1)
             return ts
         return wrapper
     return decorator
 
 
+class _Valuation:
+    """
+    The share values of a portfolio for one bar and price field.
+    """
+
+    __slots__ = ('date', 'field', 'seq_num', 'prices', 'values', '_total')
+
+    def __init__(self, date, field, seq_num, prices, values):
+        self.date = date
+        self.field = field
+        self.seq_num = seq_num
+        self.prices = prices
+        self.values = values
+        self._total = None
+
+    @property
+    def total(self):
+        """
+        The total share value.
+
+        It is summed in symbol order, so that it is the same as a full
+        revaluation to the last bit, and only when it is read after a
+        trade, so a batch of trades is summed once.
+        """
+        if self._total is None:
+            self._total = sum(self.values.values())
+        return self._total
+
+    def update(self, symbol, tlog, seq_num):
+        """
+        Update the share value of a symbol after a trade.
+        """
+        self.values[symbol] = tlog.share_value(self.prices[symbol])
+        self._total = None
+        self.seq_num = seq_num
+
+
+class _Ledger:
+    """
+    The positions and cash of a portfolio on each bar.
+
+    Recording a bar copies the current positions into a row of a dense
+    (bars, symbols) matrix, so no prices are looked up during the run.
+    The equity, leverage, and exposure are computed for all the bars
+    at once afterwards.
+    """
+
+    def __init__(self, ts, symbols):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        ts : pd.DataFrame
+            The timeseries of the portfolio.
+        symbols : list of str
+            The symbols, in the order of the trade logs.
+
+        Attributes
+        ----------
+        ts : pd.DataFrame
+            The timeseries of the portfolio.
+        symbols : list of str
+            The symbols, in the order of axis 1 of `shares`.
+        pos : dict of int
+            Dict of key value pair of date:position in `ts`.
+        shares : np.ndarray
+            The (bars, symbols) shares held, negative for a short
+            position.  Float, so a fractional number of shares isn't
+            truncated.
+        ave_entry_price : np.ndarray
+            The (bars, symbols) average entry prices.
+        cash : np.ndarray
+            The cash on each bar.
+        recorded : np.ndarray
+            True on the bars that were recorded.
+        seq_num : int
+            The trade sequence number of the current positions.
+        float_shares : bool
+            True if a fractional number of shares has been held, in
+            which case the daily balance shares are floats.
+        """
+        n = len(ts)
+        m = len(symbols)
+        self.ts = ts
+        self.symbols = list(symbols)
+        self.pos = {date: i for i, date in enumerate(ts.index)}
+        self.shares = np.zeros((n, m))
+        self.ave_entry_price = np.zeros((n, m))
+        self.cash = np.zeros(n)
+        self.recorded = np.zeros(n, dtype=bool)
+        self.seq_num = None
+        self.float_shares = False
+        self._shares = np.zeros(m)
+        self._ave_entry_price = np.zeros(m)
+
+    def record(self, account, rows):
+        """
+        Record the current positions and cash on `rows`, a position
+        or a slice of positions.
+        """
+        if account.seq_num != self.seq_num:
+            # There has been a trade since the last record.
+            for j, tlog in enumerate(account.trade_logs.values()):
+                sign = -1 if tlog.direction == trade.Direction.SHORT else 1
+                self._shares[j] = sign * tlog.shares
+                if isinstance(tlog.shares, float):
+                    self.float_shares = True
+                self._ave_entry_price[j] = tlog.ave_entry_price
+            self.seq_num = account.seq_num
+        self.shares[rows] = self._shares
+        self.ave_entry_price[rows] = self._ave_entry_price
+        self.cash[rows] = account.cash
+        self.recorded[rows] = True
+
+    def _prices(self, field):
+        """
+        Return the (recorded bars, symbols) prices of a field, or None
+        if a symbol doesn't have the field.
+        """
+        columns = [symbol + '_' + field for symbol in self.symbols]
+        if not all(column in self.ts.columns for column in columns):
+            return None
+        return self.ts[columns].to_numpy(dtype=float)[self.recorded]
+
+    def _share_value(self, long_prices, short_prices):
+        """
+        Return the share value on each recorded bar.
+
+        Long positions are valued at `long_prices` and short positions
+        at `short_prices`.  The symbols are summed in order, as in
+        `Portfolio._share_value()`.
+        """
+        shares = self.shares[self.recorded]
+        ave_entry_price = self.ave_entry_price[self.recorded]
+        value = 0
+        for j in range(len(self.symbols)):
+            s = shares[:, j]
+            long_value = long_prices[:, j]*s
+            short_value = (2*ave_entry_price[:, j] - short_prices[:, j])*-s
+            value = value + np.where(s > 0, long_value, np.where(s < 0, short_value, 0.0))
+        return value
+
+    def _equity(self, share_value):
+        """
+        Return the total value and equity on each recorded bar.
+        """
+        cash = self.cash[self.recorded]
+        total_value = share_value + np.where(cash > 0, cash, 0.0)
+        equity = total_value + np.where(cash < 0, cash, 0.0)
+        return total_value, equity
+
+    def daily_balance(self):
+        """
+        Return the list of daily balance tuples.
+
+        The high is the equity with the long positions valued at the
+        high and the short positions at the low; the low is the
+        reverse.  If the timeseries doesn't have high and low prices
+        for every symbol, the close is used for both.
+        """
+        close = self._prices('close')
+        total_value, equity = self._equity(self._share_value(close, close))
+        leverage = total_value / equity
+
+        high = self._prices('high')
+        low = self._prices('low')
+        if high is None or low is None:
+            high_equity = low_equity = equity
+        else:
+            high_equity = self._equity(self._share_value(high, low))[1]
+            low_equity = self._equity(self._share_value(low, high))[1]
+
+        dates = self.ts.index[self.recorded].to_pydatetime()
+        shares = np.abs(self.shares[self.recorded]).sum(axis=1)
+        if not self.float_shares:
+            shares = shares.astype(np.int64)
+        return list(zip(dates, high_equity.tolist(), low_equity.tolist(),
+                        equity.tolist(), shares.tolist(),
+                        self.cash[self.recorded].tolist(), leverage.tolist()))
+
+    def exposure(self):
+        """
+        Return the value of each position as a fraction of equity.
+        """
+        close = self._prices('close')
+        equity = self._equity(self._share_value(close, close))[1]
+        value = close * self.shares[self.recorded]
+        return pd.DataFrame(value / equity[:, np.newaxis],
+                            index=self.ts.index[self.recorded],
+                            columns=self.symbols)
+
+
 class Portfolio:
     """
     A portfolio or collection of securities.
@@ -99,6 +298,9 @@ class Portfolio:
      - finalize_timeseries()
        Finalize timeseries.
 
+     - bars()
+       Return the timeseries as array-backed bars for iteration.
+
      - get_price()
        Return price given row, symbol, and field.
 
@@ -129,6 +331,12 @@ class Portfolio:
      - get_logs()
        Return raw tradelog, tradelog, and daily balance log.
 
+     - run_events()
+       Run trading logic only on event bars.
+
+     - exposure()
+       Return the value of each position as a fraction of equity.
+
      - performance_per_symbol()
        Returns performance per symbol data, also plots performance.
 
@@ -136,34 +344,55 @@ class Portfolio:
        Show correlation map between symbols.
     """
 
-    def __init__(self):
+    def __init__(self, account=None):
         """
         Initialize instance variables.
 
+        Parameters
+        ----------
+        account : pf.Account, optional
+            The account the portfolio is bound to (default is None,
+            which implies the default account of the current thread).
+
         Attributes
         ----------
+        account : pf.Account
+            The account that holds the cash, margin, and trade logs
+            of the portfolio.
         _l : list of tuples
             The list of daily balance tuples.
         _ts : pd.DataFrame
             The timeseries of the portfolio.
         symbols : list
             The symbols that constitute the portfolio.
+        fetch_errors : dict of Exception
+            Dict of key value pair of symbol:error for each symbol
+            that `fetch_timeseries()` couldn't retrieve.
+        _valuation_cache : _Valuation
+            The share values for the current bar and price field.
+        _ledger : _Ledger
+            The positions on each bar, if `init_trade_logs()` was
+            called with `ledger` True.
         """
+        if account is None:
+            account = trade.get_default_account()
+        self.account = account
         self._l = []
         self._ts = None
         self.symbols = []
+        self.fetch_errors = {}
+        self._valuation_cache = None
+        self._ledger = None
 
     ####################################################################
     # TIMESERIES (fetch, add_technical_indicator, calender, finalize)
 
-    def _add_symbol_columns(self, ts, symbol, symbol_ts, fields):
+    def _symbol_columns(self, symbol, symbol_ts, fields):
         """
-        Add column with field suffix for symbol, i.e. SPY_close.
+        Return the fields of a symbol with a field suffix, i.e. SPY_close.
         """
-        for field in fields:
-            column = symbol + '_' + field
-            ts[column] = symbol_ts[field]
-        return ts
+        columns = [symbol + '_' + field for field in fields]
+        return symbol_ts[fields].set_axis(columns, axis=1)
 
     def fetch_timeseries(self, symbols, start, end,
                          fields=['open', 'high', 'low', 'close'],
@@ -171,10 +400,16 @@ class Portfolio:
                          use_cache=True, use_adj=True,
                          use_continuous_calendar=False,
                          force_stock_market_calendar=False,
-                         check_fields=['close']):
+                         check_fields=['close'], panel=None, max_workers=8):
         """
         Fetch time series data for symbols.
 
+        The symbols that aren't cached are downloaded with one batched
+        request, then the symbols are read and their trade period
+        selected on a pool of threads.  The symbols are merged in the
+        order given.  A symbol that can't be retrieved is left out of
+        the portfolio, and its error is recorded in `fetch_errors`.
+
         Parameters
         ----------
         symbols : list
@@ -211,40 +446,131 @@ class Portfolio:
             Fields to check for for NaN values.  If a NaN value is found
             for one of these fields, that row is dropped
             (default is ['close']).
+        panel : pf.Panel, optional
+            A panel that holds the symbols (default is None, which
+            implies read each symbol from the symbol cache).  The
+            trade period of all the symbols is selected from one slice
+            of the panel, and the `dir_name`, `use_cache`, and
+            `max_workers` arguments are ignored.
+        max_workers : int, optional
+            The maximum number of threads used to download, read,
+            and select the trade period of the symbols (default is 8).
 
         Returns
         -------
         pd.DataFrame
             The timeseries of the symbols.
+
+        Raises
+        ------
+        FetchError
+            If none of the symbols could be retrieved.
         """
         if 'close' not in fields:
             fields.append('close')
 
-        symbols = list(set(symbols))
-        for i, symbol in enumerate(symbols):
-
-            if i == 0:
-                ts = fetch_timeseries(symbol, dir_name=dir_name, use_cache=use_cache)
-                ts = select_tradeperiod(ts, start, end, use_adj=use_adj,
-                                        use_continuous_calendar=use_continuous_calendar,
-                                        force_stock_market_calendar=force_stock_market_calendar,
-                                        check_fields=check_fields)
-                self._add_symbol_columns(ts, symbol, ts, fields)
-                ts.drop(columns=['open', 'high', 'low', 'close', 'adj_close', 'volume'],
-                        inplace=True)
-            else:
-                # Add another symbol.
-                _ts = fetch_timeseries(symbol, dir_name=dir_name, use_cache=use_cache)
-                _ts = select_tradeperiod(_ts, start, end, use_adj=use_adj,
-                                         use_continuous_calendar=use_continuous_calendar,
-                                         force_stock_market_calendar=force_stock_market_calendar,
-                                         check_fields=check_fields)
-                self._add_symbol_columns(ts, symbol, _ts, fields)
-
+        # Remove duplicate symbols, but keep the order.
+        symbols = list(dict.fromkeys(symbols))
+        self.fetch_errors = {}
+
+        if panel is not None:
+            return self._fetch_panel(panel, symbols, start, end, fields, use_adj,
+                                     use_continuous_calendar,
+                                     force_stock_market_calendar, check_fields)
+
+        self.fetch_errors.update(
+            _cache_symbols(symbols, dir_name=dir_name, use_cache=use_cache,
+                           threads=max_workers))
+
+        def _fetch(symbol):
+            # The symbol was downloaded above if it wasn't cached.
+            ts = _fetch_timeseries(symbol, dir_name=dir_name)
+            return select_tradeperiod(ts, start, end, use_adj=use_adj,
+                                      use_continuous_calendar=use_continuous_calendar,
+                                      force_stock_market_calendar=force_stock_market_calendar,
+                                      check_fields=check_fields)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {symbol: executor.submit(_fetch, symbol) for symbol in symbols
+                       if symbol not in self.fetch_errors}
+        symbol_ts = {}
+        for symbol, future in futures.items():
+            try:
+                symbol_ts[symbol] = future.result()
+            except Exception as e:
+                self.fetch_errors[symbol] = e
+
+        if not symbol_ts:
+            raise FetchError(f'No timeseries could be retrieved: {self.fetch_errors}')
+
+        # Join the symbol columns in one pass, keeping only the dates
+        # on which every symbol has data.
+        symbols = list(symbol_ts)
+        ts = pd.concat([self._symbol_columns(symbol, symbol_ts[symbol], fields)
+                        for symbol in symbols], axis=1, join='inner')
         ts.dropna(inplace=True)
         self.symbols = symbols
         return ts
 
+    def _fetch_panel(self, panel, symbols, start, end, fields, use_adj,
+                     use_continuous_calendar, force_stock_market_calendar,
+                     check_fields):
+        """
+        Return the timeseries of the symbols from one slice of a panel.
+
+        The same as `select_tradeperiod()` on each symbol and an inner
+        join, but done on the (dates, symbols, fields) array at once.
+        """
+        for symbol in symbols:
+            if symbol not in panel:
+                self.fetch_errors[symbol] = KeyError(f'{symbol} is not in the panel')
+        symbols = [symbol for symbol in symbols if symbol not in self.fetch_errors]
+        if not symbols:
+            raise FetchError(f'No timeseries could be retrieved: {self.fetch_errors}')
+
+        prices = ['open', 'high', 'low', 'close'] + (['adj_close'] if use_adj else [])
+        read = list(dict.fromkeys(prices + fields + check_fields))
+        f = {field: i for i, field in enumerate(read)}
+
+        # Each symbol is selected from a year before start, for the
+        # indicators, to end.
+        ts = panel.select(symbols, read, start - datetime.timedelta(365), end)
+        values = ts.to_numpy(dtype=float, copy=True).reshape(len(ts), len(symbols), len(read))
+
+        # Zero prices are missing.
+        p = [f[field] for field in prices]
+        price_values = values[:, :, p]
+        with np.errstate(invalid='ignore'):
+            price_values[~(price_values > 0)] = np.nan
+        values[:, :, p] = price_values
+
+        if use_continuous_calendar:
+            force_stock_market_calendar = False
+            pfstatistics.select_trading_days(use_stock_market_calendar=False)
+
+        # Keep the dates on which every symbol has the check fields,
+        # and then all the fields.
+        keep = ~np.isnan(values[:, :, [f[field] for field in check_fields]]).any(axis=(1, 2))
+        if force_stock_market_calendar:
+            keep &= ts.index.isin(pd.to_datetime(stock_market_calendar))
+
+        if use_adj:
+            adj_close, close = values[:, :, f['adj_close']], values[:, :, f['close']]
+            for field in prices[:4]:
+                values[:, :, f[field]] = values[:, :, f[field]] * adj_close / close
+
+        values = values[keep][:, :, [f[field] for field in fields]]
+        keep_fields = ~np.isnan(values).any(axis=(1, 2))
+        index = ts.index[keep][keep_fields]
+        if force_stock_market_calendar:
+            # As reindexed on the calendar.
+            index = index.rename(None)
+        columns = [symbol + '_' + field for symbol in symbols for field in fields]
+        ts = pd.DataFrame(values[keep_fields].reshape(keep_fields.sum(), -1),
+                          index=index, columns=columns)
+        self.symbols = symbols
+        return ts
+
     def add_technical_indicator(self, ts, ta_func, ta_param, output_column_suffix,
                                 input_column_suffix='close'):
         """
@@ -298,11 +624,10 @@ class Portfolio:
         for symbol in self.symbols:
             input_column = symbol + '_' + input_column_suffix
             output_column = symbol + '_' + output_column_suffix
-            ts[output_column] = ta_func(ts, ta_param, input_column)
             indicator_column[output_column] = ta_func(ts, ta_param, input_column)
-            
+
         # Join all the symbol columns to the original DataFrame using pd.concat
-        ts = pd.concat([ts, pd.DataFrame(indicator_column)], axis=1)
+        ts = pd.concat([ts, pd.DataFrame(indicator_column, index=ts.index)], axis=1)
         return ts
 
     def calendar(self, ts, columns=None):
@@ -350,6 +675,33 @@ class Portfolio:
         """
         return finalize_timeseries(ts, start, dropna=dropna)
 
+    def bars(self, ts):
+        """
+        Return the timeseries as array-backed bars for iteration.
+
+        Iterating over the bars is a faster replacement for
+        `ts.itertuples()`, especially for a portfolio with many
+        symbols.  Each bar can be passed as the `row` argument of the
+        portfolio methods.
+
+        Parameters
+        ----------
+        ts : pd.DataFrame
+            The timeseries of the portfolio.
+
+        Returns
+        -------
+        pf.Bars
+            The bars of the timeseries.
+
+        Examples
+        --------
+        >>> for i, row in enumerate(self.portfolio.bars(self.ts)):
+        ...     self.portfolio.adjust_percents(row, weights)
+        ...     self.portfolio.record_daily_balance(row)
+        """
+        return Bars(ts)
+
     ####################################################################
     # GET PRICES (get_price, get_prices)
 
@@ -359,7 +711,7 @@ class Portfolio:
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             The row of data from the timeseries of the portfolio.
         symbol : str
             The symbol for a security.
@@ -372,6 +724,8 @@ class Portfolio:
             The current column value.
         """
         symbol += '_' + field
+        if isinstance(row, Bar):
+            return row[symbol]
         try:
             price = getattr(row, symbol)
         except AttributeError:
@@ -393,7 +747,7 @@ class Portfolio:
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
         fields : list, optional
             The list of fields to use for each symbol (default is
@@ -420,23 +774,41 @@ class Portfolio:
     ####################################################################
     # ADJUST POSITION (adjust_shares, adjust_value, adjust_percent, print_holdings)
 
+    def _valuation(self, row, field):
+        """
+        Return the share values of the portfolio for a bar and field.
+
+        The prices and share values of all symbols are looked up once
+        per bar and price field.  `_adjust_shares()` then updates only
+        the symbol that traded.  If the account traded some other way,
+        which is detected by a change in its `seq_num`, the share values
+        are looked up again.
+        """
+        v = self._valuation_cache
+        if (v is None or v.date != row.Index or v.field != field
+                or v.seq_num != self.account.seq_num):
+            prices = {}; values = {}
+            for symbol, tlog in self.account.trade_logs.items():
+                price = self.get_price(row, symbol, field)
+                prices[symbol] = price
+                values[symbol] = tlog.share_value(price)
+            v = _Valuation(row.Index, field, self.account.seq_num, prices, values)
+            self._valuation_cache = v
+        return v
+
     def _share_value(self, row, field):
         """
         Return total share value in portfolio.
         """
-        value = 0
-        for symbol, tlog in trade.TradeLog.instance.items():
-            price = self.get_price(row, symbol, field)
-            value += tlog.share_value(price)
-        return value
+        return self._valuation(row, field).total
 
     def _total_value(self, row, field):
         """
         Return total_value = share_value + cash (if cash > 0).
         """
         total_value = self._share_value(row, field)
-        if trade.TradeLog.cash > 0:
-            total_value += trade.TradeLog.cash
+        if self.account.cash > 0:
+            total_value += self.account.cash
         return total_value
 
     def _equity(self, row, field):
@@ -444,8 +816,8 @@ class Portfolio:
         Return equity = total_value - loan (loan is negative cash)
         """
         equity = self._total_value(row, field)
-        if trade.TradeLog.cash < 0:
-            equity += trade.TradeLog.cash
+        if self.account.cash < 0:
+            equity += self.account.cash
         return equity
 
     def _leverage(self, row, field):
@@ -458,7 +830,7 @@ class Portfolio:
         """
         Return total account funds for trading.
         """
-        return self._equity(row, field) * trade.TradeLog.margin
+        return self._equity(row, field) * self.account.margin
 
     def shares(self, symbol):
         """
@@ -474,7 +846,7 @@ class Portfolio:
         tlog.shares : int
             The number of shares for a given symbol.
         """
-        tlog = trade.TradeLog.instance[symbol]
+        tlog = self.account.trade_logs[symbol]
         return tlog.shares
 
     @property
@@ -502,7 +874,7 @@ class Portfolio:
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
         symbol : str
             The symbol for a security.
@@ -514,17 +886,15 @@ class Portfolio:
         float
             The share value as a percent.
         """
-        price = self.get_price(row, symbol, field)
-        tlog = trade.TradeLog.instance[symbol]
-        value = tlog.share_value(price)
+        value = self._valuation(row, field).values[symbol]
         return value / self._total_funds(row, field)
 
     def _calc_buying_power(self, row, field):
         """
         Return the buying power.
         """
-        buying_power = (trade.TradeLog.cash * trade.TradeLog.margin
-                      + self._share_value(row, field) * (trade.TradeLog.margin -1))
+        buying_power = (self.account.cash * self.account.margin
+                      + self._share_value(row, field) * (self.account.margin -1))
         return buying_power
 
     def _adjust_shares(self, row, price, shares, symbol, field, direction):
@@ -532,10 +902,12 @@ class Portfolio:
         Adjust shares.
         """
         date = row.Index.to_pydatetime()
-        tlog = trade.TradeLog.instance[symbol]
-        trade.TradeLog.buying_power = self._calc_buying_power(row, field)
+        tlog = self.account.trade_logs[symbol]
+        self.account.buying_power = self._calc_buying_power(row, field)
         shares = tlog.adjust_shares(date, price, shares, direction)
-        trade.TradeLog.buying_power = None
+        self.account.buying_power = None
+        # _calc_buying_power() made the valuation current before the trade.
+        self._valuation_cache.update(symbol, tlog, self.account.seq_num)
         return shares
 
     def _adjust_value(self, row, value, symbol, field, direction):
@@ -555,7 +927,7 @@ class Portfolio:
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
         weight : float
             The requested weight for the symbol, where 0 <= weight <=1.
@@ -579,7 +951,8 @@ class Portfolio:
         shares = self._adjust_value(row, value, symbol, field, direction)
         return shares
 
-    def adjust_percents(self, row, weights, field='close', directions=None):
+    def adjust_percents(self, row, weights, field='close', directions=None,
+                        batch=False):
         """
         Adjust symbols to a specified weight (percent) of portfolio.
 
@@ -588,9 +961,18 @@ class Portfolio:
         ordering of the prices and weights dicts are unimportant.
         They are dicts which are indexed by the symbol.
 
+        With `batch` True, the current weights, the order of the trades,
+        and the target shares are computed for all symbols at once with
+        NumPy, and symbols that are already at their target shares
+        aren't traded.  The trades are placed in the same order, with
+        the same cash and margin rules, and the target shares are
+        computed again after each trade that reduces a position, long
+        or short, since it changes the total funds.  So the results are
+        the same.
+
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
         weights : dict of floats
             Dict of key value pair of symbol:weight, where 0 <= weight <=1.
@@ -600,6 +982,9 @@ class Portfolio:
             Dict of key value pair of symbol:direction.  The direction
             of the trades (default is None, which implies that all
             positions are long).
+        batch : bool, optional
+            True to rebalance all symbols as one batch of orders
+            (default is False).
 
         Returns
         -------
@@ -610,6 +995,9 @@ class Portfolio:
             if not (0 <= weight <= 1):
                 raise ValueError(f'weights should be between 0 and 1 (inclusive), but {symbol}={weight}')
 
+        if batch:
+            return self._adjust_percents_batch(row, weights, field, directions)
+
         w = {}
 
         # Get current weights
@@ -636,6 +1024,57 @@ class Portfolio:
             self.adjust_percent(row, weight, symbol, field, direction)
         return w
 
+    def _adjust_percents_batch(self, row, weights, field, directions):
+        """
+        Adjust symbols to a specified weight with one batch of orders.
+        """
+        symbols = list(self.symbols)
+        # Symbols that aren't in the portfolio are adjusted last.
+        extra = [symbol for symbol in weights if symbol not in set(symbols)]
+        if directions is None:
+            directions = {symbol:trade.Direction.LONG for symbol in weights}
+
+        valuation = self._valuation(row, field)
+        total_funds = self._total_funds(row, field)
+        prices = np.array([valuation.prices[symbol] for symbol in symbols], dtype=float)
+        values = np.array([valuation.values[symbol] for symbol in symbols], dtype=float)
+        target = np.array([weights[symbol] for symbol in symbols], dtype=float)
+
+        # Sell first to obtain cash: order by the change in weight.
+        delta = target - values / total_funds
+        order = np.argsort(delta, kind='stable')
+
+        # The target shares of the orders are computed at once from the
+        # total funds.  Entering a position, long or short, doesn't
+        # change the total funds.  Reducing one realizes the profit of
+        # each lot against the average entry price, which does, so the
+        # target shares of the orders after it are computed again.  A
+        # short can be reduced by an increase in weight, so this is
+        # decided by the target shares, not by the change in weight.
+        pending = order
+        while len(pending) > 0:
+            target_shares = (np.minimum(total_funds, total_funds * target[pending])
+                             / prices[pending]).astype(int)
+            for k, (i, shares) in enumerate(zip(pending.tolist(), target_shares.tolist())):
+                symbol = symbols[i]
+                current = self.account.trade_logs[symbol].shares
+                if shares == current:
+                    continue
+                self._adjust_shares(row, prices[i].item(), shares, symbol, field,
+                                    directions[symbol])
+                if shares < current:
+                    total_funds = self._total_funds(row, field)
+                    pending = pending[k+1:]
+                    break
+            else:
+                pending = pending[:0]
+
+        w = {symbols[i]: weights[symbols[i]] for i in order.tolist()}
+        for symbol in extra:
+            w[symbol] = weights[symbol]
+            self.adjust_percent(row, weights[symbol], symbol, field, directions[symbol])
+        return w
+
     def print_holdings(self, row, show_percent=False):
         """
         Print snapshot of portfolio holding and values.
@@ -645,7 +1084,7 @@ class Portfolio:
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
         show_percent : bool, optional
             Show each holding as a percent instead of shares.
@@ -661,61 +1100,76 @@ class Portfolio:
             # 2007-11-20 SPY:24.1 TLT:24.9 GLD:24.6 QQQ:24.7 cash:  1.6 total: 100.0
             print(date.strftime('%Y-%m-%d'), end=' ')
             total = 0
-            for symbol, tlog in trade.TradeLog.instance.items():
+            for symbol, tlog in self.account.trade_logs.items():
                 pct = self.share_percent(row, symbol, field)
                 total += pct
                 print(f'{symbol}:{pct * 100:4,.1f}', end=' ')
-            pct = trade.TradeLog.cash / self._equity(row, field)
+            pct = self.account.cash / self._equity(row, field)
             total += abs(pct)
             print(f'cash: {pct * 100:4,.1f}', end=' ')
             print(f'total: {total * 100:4,.1f}')
         else:
             # 2010-02-01 SPY: 54 TLT: 59 GLD:  9 cash:    84.20 total:  9,872.30
             print(date.strftime('%Y-%m-%d'), end=' ')
-            for symbol, tlog in trade.TradeLog.instance.items():
+            for symbol, tlog in self.account.trade_logs.items():
                 print(f'{symbol}:{tlog.shares:3}', end=' ')
-            print(f'cash: {trade.TradeLog.cash:8,.2f}', end=' ')
+            print(f'cash: {self.account.cash:8,.2f}', end=' ')
             print(f'total: {self._equity(row, field):9,.2f}')
 
     ####################################################################
     # LOGS (init_trade_logs, record_daily_balance, get_logs)
 
-    def init_trade_logs(self, ts):
+    def init_trade_logs(self, ts, ledger=False):
         """
         Add a trade log for each symbol.
 
+        With `ledger` True, `record_daily_balance()` records the shares
+        of each symbol and the cash on each bar instead of valuing the
+        portfolio.  `get_logs()` then computes the daily balance of all
+        the bars at once, with the high and low equity from the high
+        and low prices if the timeseries has them, and `exposure()`
+        is available.
+
         Parameters
         ----------
         ts : pd.DataFrame
             The timeseries of the portfolio.
+        ledger : bool, optional
+            True to record the positions on each bar in a ledger
+            (default is False).
 
         Returns
         -------
         None
         """
-        trade.TradeLog.seq_num = 0
-        trade.TradeLog.instance.clear()
+        self.account.reset()
+        self._valuation_cache = None
 
         self._ts = ts
         for symbol in self.symbols:
-            trade.TradeLog(symbol, False)
+            trade.TradeLog(symbol, False, account=self.account)
+        self._ledger = _Ledger(ts, self.account.trade_logs) if ledger else None
 
     def record_daily_balance(self, row):
         """
         Append to daily balance list.
 
         The portfolio version of this function uses closing values
-        for the daily high, low, and close.
+        for the daily high, low, and close, unless the trade logs were
+        initialized with a ledger.
 
         Parameters
         ----------
-        row : pd.Series
+        row : pd.Series or pf.Bar
             A row of data from the timeseries of the portfolio.
 
         Returns
         -------
         None
         """
+        if self._ledger is not None:
+            self._ledger.record(self.account, self._ledger.pos[row.Index])
+            return
 
         # calculate daily balance values: date, high, low, close,
         # shares, cash
@@ -724,12 +1178,113 @@ class Portfolio:
         equity = self._equity(row, field)
         leverage = self._leverage(row, field)
         shares = 0
-        for tlog in trade.TradeLog.instance.values():
+        for tlog in self.account.trade_logs.values():
             shares += tlog.shares
         t = (date, equity, equity, equity, shares,
-             trade.TradeLog.cash, leverage)
+             self.account.cash, leverage)
         self._l.append(t)
 
+    def _record_daily_balances(self, dates, prices):
+        """
+        Append the daily balances for bars on which positions are constant.
+
+        `prices` is a (bars, symbols) array with a column for each trade
+        log.  The values are computed in the same order of operations
+        as `record_daily_balance()`, so they are identical to calling
+        it on each bar.
+        """
+        value = 0
+        shares = 0
+        for j, tlog in enumerate(self.account.trade_logs.values()):
+            if tlog.direction == trade.Direction.LONG:
+                value = value + prices[:, j]*tlog.shares
+            elif tlog.direction == trade.Direction.SHORT:
+                value = value + (2*tlog.ave_entry_price - prices[:, j])*tlog.shares
+            shares += tlog.shares
+
+        cash = self.account.cash
+        total_value = value
+        if cash > 0:
+            total_value = total_value + cash
+        equity = total_value
+        if cash < 0:
+            equity = equity + cash
+        leverage = total_value / equity
+
+        n = len(dates)
+        if isinstance(equity, np.ndarray):
+            equity = equity.tolist()
+            leverage = leverage.tolist()
+        else:
+            # No open positions, the balance is the same on each bar.
+            equity = [equity] * n
+            leverage = [leverage] * n
+        self._l.extend(zip(dates, equity, equity, equity, [shares] * n, [cash] * n,
+                           leverage))
+
+    def run_events(self, ts, events, func, field='close'):
+        """
+        Run trading logic only on event bars.
+
+        Many strategies trade only on a schedule, e.g. on the first
+        trading day of each month, but still loop over every bar to
+        record the daily balance.  This calls `func(i, row)` only on
+        the bars where `events` is True.  Positions don't change
+        between events, so the daily balance of all the bars from one
+        event up to the next is computed at once with NumPy.
+
+        `func` must not call `record_daily_balance()`.  The daily
+        balance is recorded for every bar, after `func` on event bars.
+
+        Parameters
+        ----------
+        ts : pd.DataFrame
+            The timeseries of the portfolio.
+        events : array-like of bool
+            True on the bars on which to call `func`.  Include the
+            first and last bars if the strategy trades on them.
+        func : function
+            Called as `func(i, row)`, where `i` is the position of the
+            bar and `row` is a `pf.Bar`.
+        field : str, optional {'open', 'high', 'low', 'close'}
+            The price field used for the daily balance (default is
+            'close').
+
+        Returns
+        -------
+        None
+
+        Examples
+        --------
+        >>> def _rebalance(i, row):
+        ...     w = weights if i < len(ts) - 1 else pf.set_dict_values(weights, 0)
+        ...     portfolio.adjust_percents(row, w)
+        >>> events = ts['first_dotm'].to_numpy().copy()
+        >>> events[0] = events[-1] = True
+        >>> portfolio.run_events(ts, events, _rebalance)
+        """
+        n = len(ts)
+        events = np.asarray(events, dtype=bool)
+        if events.shape != (n,):
+            raise ValueError(f'events must have the same length as ts, '
+                             f'events={events.shape}, ts=({n},)')
+
+        bars = Bars(ts)
+        columns = [symbol + '_' + field for symbol in self.account.trade_logs]
+        prices = ts[columns].to_numpy(dtype=float)
+        dates = ts.index.to_pydatetime()
+
+        bounds = np.union1d(np.flatnonzero(events), [0, n]).tolist()
+        if self._ledger is not None:
+            offset = self._ledger.pos[ts.index[0]] if n else 0
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if events[start]:
+                func(start, bars[start])
+            if self._ledger is not None:
+                self._ledger.record(self.account, slice(offset + start, offset + stop))
+            else:
+                self._record_daily_balances(dates[start:stop], prices[start:stop])
+
     def get_logs(self):
         """
         Return raw tradelog, tradelog, and daily balance log.
@@ -747,24 +1302,62 @@ class Portfolio:
         dbal : pd.DataFrame
             The daily balance log.
         """
-        tlogs = []; rlogs = []
-        for tlog in trade.TradeLog.instance.values():
-            rlogs.append(tlog.get_log_raw())
-            tlogs.append(tlog.get_log(merge_trades=False))
-        
-        rlogs_non_empty = [r for r in rlogs if not r.empty]
-        rlog = pd.concat(rlogs_non_empty).sort_values(['seq_num'])
-        
-        tlogs_non_empty = [t for t in tlogs if not t.empty]
-        tlog = pd.concat(tlogs_non_empty).sort_values(['entry_date', 'exit_date'])
+        # The trade logs of the account share one raw log, in seq_num
+        # order, and one trade log, in the order the trades were closed.
+        # The index of each row is its position in the log of its
+        # symbol.
+        raw = self.account._raw
+        codes = raw.codes('symbol')[0]
+        rlog = raw.to_frame(index=trade._group_positions(codes))
+
+        # The trade log is in entry date order, as the cumulative total
+        # is summed in that order.  Trades are closed in a different
+        # order, e.g. a trade held for a year is closed after the
+        # trades entered after it, so the append-only log can't be kept
+        # in entry date order and is sorted here, once per call.  Ties
+        # are broken by the order of the trade logs, then the order the
+        # trades were closed, the order of concatenating the trade log
+        # of each symbol and sorting by entry and exit date.
+        closed = self.account._l
+        codes, categories = closed.codes('symbol')
+        rank = {symbol: i for i, symbol in enumerate(self.account.trade_logs)}
+        symbol_rank = np.array([rank.get(symbol, len(rank)) for symbol in categories],
+                               dtype=np.int64)[codes]
+        order = np.lexsort((symbol_rank, closed.column('exit_date'),
+                            closed.column('entry_date')))
+        tlog = closed.to_frame(order, index=trade._group_positions(codes)[order])
 
         tlog['cumul_total'] = tlog['pl_cash'].cumsum()
 
-        dbal = trade.DailyBal()
-        dbal._l = self._l
+        dbal = trade.DailyBal(account=self.account)
+        if self._ledger is not None:
+            dbal._l = self._ledger.daily_balance()
+        else:
+            dbal._l = self._l
         dbal = dbal.get_log(tlog)
         return rlog, tlog, dbal
 
+    def exposure(self):
+        """
+        Return the value of each position as a fraction of equity.
+
+        The trade logs must have been initialized with a ledger.  Short
+        positions have a negative exposure.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        pd.DataFrame
+            The exposure of each symbol on each recorded bar, at the
+            close.
+        """
+        if self._ledger is None:
+            raise ValueError('exposure() requires init_trade_logs(ts, ledger=True)')
+        return self._ledger.exposure()
+
     ####################################################################
     # PERFORMANCE ANALYSIS (performance_per_symbol, correlation_map)
 
@@ -806,7 +1399,7 @@ class Portfolio:
 
         # Convert dict to series.
         s = pd.Series(dtype='object')
-        for symbol, tlog in trade.TradeLog.instance.items():
+        for symbol, tlog in self.account.trade_logs.items():
             s[symbol] = tlog.cumul_total
         # Convert series to dataframe.
         df = pd.DataFrame(s.values, index=s.index, columns=['cumul_total'])
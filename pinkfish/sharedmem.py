@@ -0,0 +1,254 @@
+"""
+Share a prepared timeseries between processes.
+
+When strategies are fanned out to worker processes, each worker
+normally re-reads the symbol cache or receives a pickled copy of the
+whole timeseries.  `publish_timeseries()` copies a prepared timeseries
+(after `select_tradeperiod()`, indicators, and `calendar()`) once into
+a shared memory segment.  Workers call `attach_timeseries()` with the
+small, picklable handle to get a read-only DataFrame that is a view
+of the shared memory, so memory use stays near one copy no matter how
+many workers there are.
+
+Examples
+--------
+>>> def _init_worker(handle):
+...     global ts
+...     ts = pf.attach_timeseries(handle)
+>>> with pf.publish_timeseries(ts) as shared:
+...     with ProcessPoolExecutor(initializer=_init_worker,
+...                              initargs=(shared.handle,)) as executor:
+...         results = list(executor.map(run_strategy, grid))
+"""
+
+from multiprocessing import shared_memory
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+class SharedTimeseriesHandle:
+    """
+    Picklable description of a timeseries in shared memory.
+    """
+
+    def __init__(self, name, nrows, index_name, index_dtype, groups, columns):
+        """
+        Initialize instance variables.
+
+        Attributes
+        ----------
+        name : str
+            The name of the shared memory segment.
+        nrows : int
+            The number of rows in the timeseries.
+        index_name : str
+            The name of the index, typically 'date'.
+        index_dtype : str
+            The dtype of the index.
+        groups : list of tuple
+            One (dtype, columns, offset) tuple per block of columns that
+            share a dtype.  Each block is stored as a C-contiguous
+            (len(columns), nrows) array starting at byte `offset`.
+        columns : list of str
+            The columns in their original order.
+        """
+        self.name = name
+        self.nrows = nrows
+        self.index_name = index_name
+        self.index_dtype = index_dtype
+        self.groups = groups
+        self.columns = columns
+
+
+class SharedTimeseries:
+    """
+    A timeseries published into shared memory by this process.
+
+    The publishing process owns the segment.  Call `unlink()` (or use
+    it as a context manager) when the workers are done with it.
+    """
+
+    def __init__(self, ts):
+        """
+        Copy `ts` into a new shared memory segment.
+
+        Parameters
+        ----------
+        ts : pd.DataFrame
+            The timeseries to share.  All columns must be numeric or
+            bool.
+
+        Attributes
+        ----------
+        handle : SharedTimeseriesHandle
+            Pass this to `attach_timeseries()` in the workers.
+        """
+        groups = {}
+        for column, dtype in ts.dtypes.items():
+            if not (pd.api.types.is_numeric_dtype(dtype)
+                    or pd.api.types.is_bool_dtype(dtype)):
+                raise TypeError(f'column {column!r} has dtype {dtype}, only numeric '
+                                'and bool columns can be shared')
+            groups.setdefault(np.dtype(dtype).str, []).append(column)
+
+        nrows = len(ts)
+        index = ts.index.values
+        layout = []
+        offset = _aligned(index.nbytes)
+        for dtype, columns in groups.items():
+            layout.append((dtype, columns, offset))
+            offset += _aligned(np.dtype(dtype).itemsize * nrows * len(columns))
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        _segments[self._shm.name] = self._shm
+        self.handle = SharedTimeseriesHandle(
+            name=self._shm.name, nrows=nrows, index_name=ts.index.name,
+            index_dtype=index.dtype.str, groups=layout, columns=list(ts.columns))
+
+        buf = self._shm.buf
+        np.ndarray(index.shape, dtype=index.dtype, buffer=buf)[:] = index
+        for dtype, columns, offset in layout:
+            block = np.ndarray((len(columns), nrows), dtype=dtype,
+                               buffer=buf, offset=offset)
+            block[:] = ts[columns].to_numpy(dtype=dtype).T
+
+    def close(self):
+        """
+        Close this process's view of the shared memory.
+
+        Any DataFrame attached in this process must be deleted first.
+        """
+        _segments.pop(self._shm.name, None)
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Close and destroy the shared memory segment.
+        """
+        self.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+
+def _aligned(nbytes, alignment=64):
+    """
+    Round `nbytes` up to a multiple of `alignment`.
+    """
+    return (nbytes + alignment - 1) // alignment * alignment
+
+
+_segments = {}
+"""
+dict of SharedMemory : Segments published or attached by this process,
+keyed by name.  Attached segments are kept open for the life of the
+process because the arrays returned by `attach_arrays()` point into
+them.
+"""
+
+
+def _attach_segment(name):
+    """
+    Attach to an existing shared memory segment.
+
+    Attaching doesn't transfer ownership, so the segment must not be
+    registered with this process's resource tracker; otherwise it
+    would be unlinked when the worker exits.
+    """
+    shm = _segments.get(name)
+    if shm is None:
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        _segments[name] = shm
+    return shm
+
+
+def publish_timeseries(ts):
+    """
+    Publish a timeseries into shared memory.
+
+    Parameters
+    ----------
+    ts : pd.DataFrame
+        The timeseries to share.  All columns must be numeric or bool.
+
+    Returns
+    -------
+    SharedTimeseries
+        The published timeseries.  Pass `.handle` to the workers.
+    """
+    return SharedTimeseries(ts)
+
+
+def attach_arrays(handle):
+    """
+    Attach to a shared timeseries as numpy arrays.
+
+    Parameters
+    ----------
+    handle : SharedTimeseriesHandle
+        The handle of a published timeseries.
+
+    Returns
+    -------
+    index : np.ndarray
+        The read-only index values.
+    arrays : dict of np.ndarray
+        Dict of key value pair of column:array.  Each array is a
+        read-only view of the shared memory.
+    """
+    buf = _attach_segment(handle.name).buf
+    index = np.ndarray((handle.nrows,), dtype=handle.index_dtype, buffer=buf)
+    index.flags.writeable = False
+    arrays = {}
+    for dtype, columns, offset in handle.groups:
+        block = np.ndarray((len(columns), handle.nrows), dtype=dtype,
+                           buffer=buf, offset=offset)
+        block.flags.writeable = False
+        for i, column in enumerate(columns):
+            arrays[column] = block[i]
+    return index, arrays
+
+
+def attach_timeseries(handle):
+    """
+    Attach to a shared timeseries as a DataFrame.
+
+    The DataFrame is a read-only view of the shared memory; no column
+    data is copied.  Modifying a column raises an error, so add any
+    worker-specific columns to a copy.
+
+    Parameters
+    ----------
+    handle : SharedTimeseriesHandle
+        The handle of a published timeseries.
+
+    Returns
+    -------
+    ts : pd.DataFrame
+        The timeseries.
+    """
+    buf = _attach_segment(handle.name).buf
+    frames = []
+    for dtype, columns, offset in handle.groups:
+        block = np.ndarray((len(columns), handle.nrows), dtype=dtype,
+                           buffer=buf, offset=offset)
+        block.flags.writeable = False
+        frames.append(pd.DataFrame(block.T, columns=columns, copy=False))
+    if frames:
+        ts = pd.concat(frames, axis=1)[handle.columns]
+    else:
+        ts = pd.DataFrame(index=range(handle.nrows))
+    index = np.ndarray((handle.nrows,), dtype=handle.index_dtype, buffer=buf)
+    ts.index = pd.Index(index.copy(), name=handle.index_name)
+    return ts
@@ -0,0 +1,424 @@
+"""
+Bar-by-bar streaming backtests.
+
+A backtest normally fetches the whole timeseries, adds the indicator
+columns, and iterates it to the end.  A daily signal job that does
+that re-runs decades of history to act on one new bar.  A
+`StreamingBacktest` instead consumes bars as they arrive, e.g. from a
+generator or a `queue.Queue`, and keeps its state between bars: the
+streaming indicators keep only their window, the trade log and daily
+balance are appended to, and the stats are updated by a
+`pf.OnlineStats`.  So each new bar is O(1), not counting the window
+of the indicators, and the state can be saved and loaded between
+runs of a job.
+
+The algo is called with the runner and a row for each bar.  The row
+has the same attributes as a row from `ts.itertuples()`, i.e.
+`row.Index`, the prices, and the indicators, so an existing `_algo()`
+loop body can be used as is.
+
+Examples
+--------
+>>> def algo(runner, row):
+...     date = row.Index.to_pydatetime()
+...     if runner.tlog.shares == 0 and row.close > row.sma200:
+...         runner.tlog.buy(date, row.close)
+...     elif runner.tlog.shares > 0 and row.close < row.sma200:
+...         runner.tlog.sell(date, row.close)
+>>> runner = pf.StreamingBacktest(
+...     'SPY', 10000, algo, indicators={'sma200': pf.StreamingSMA(200)})
+>>> runner.warm_up(history)
+>>> runner.run(iter(queue.get, None))
+>>> runner.save('spy.pkl')
+>>> runner = pf.load_streaming_backtest('spy.pkl')
+>>> runner.update(bar)
+>>> stats = runner.stats()
+"""
+
+from collections import deque
+import pickle
+import types
+
+import numpy as np
+import pandas as pd
+
+import pinkfish.pfstatistics as pfstatistics
+import pinkfish.trade as trade
+
+
+########################################################################
+# STREAMING INDICATORS
+
+class StreamingSMA:
+    """
+    A simple moving average, updated one value at a time.
+
+    The streaming version of `pf.SMA()`.
+    """
+
+    def __init__(self, timeperiod=30, price='close'):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        timeperiod: int, optional
+            The timeperiod for the moving average (default is 30).
+        price : str, optional {'open', 'high', 'low', 'close'}
+            The bar field to use for price (default is 'close').
+
+        Attributes
+        ----------
+        value : float
+            The current value, NaN until `timeperiod` values are added.
+        """
+        self.timeperiod = timeperiod
+        self.price = price
+        self.value = np.nan
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, x):
+        """
+        Add a value, and return the moving average.
+        """
+        self._window.append(x)
+        self._sum += x
+        if len(self._window) > self.timeperiod:
+            self._sum -= self._window.popleft()
+        if len(self._window) == self.timeperiod:
+            self.value = self._sum / self.timeperiod
+        return self.value
+
+
+class StreamingEMA:
+    """
+    An exponential moving average, updated one value at a time.
+
+    The streaming version of `pf.EMA()`.
+    """
+
+    def __init__(self, timeperiod=30, price='close'):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        timeperiod: int, optional
+            The timeperiod for the moving average (default is 30).
+        price : str, optional {'open', 'high', 'low', 'close'}
+            The bar field to use for price (default is 'close').
+
+        Attributes
+        ----------
+        value : float
+            The current value, NaN until `timeperiod` values are added.
+        """
+        self.timeperiod = timeperiod
+        self.price = price
+        self.value = np.nan
+        self._alpha = 2 / (timeperiod + 1)
+        self._ema = None
+        self._count = 0
+
+    def update(self, x):
+        """
+        Add a value, and return the moving average.
+        """
+        self._count += 1
+        if self._ema is None:
+            self._ema = x
+        else:
+            self._ema = (1 - self._alpha) * self._ema + self._alpha * x
+        if self._count >= self.timeperiod:
+            self.value = self._ema
+        return self.value
+
+
+class StreamingMAX:
+    """
+    The highest value over a period, updated one value at a time.
+
+    Equivalent to `ts[price].rolling(timeperiod).max()`.  The
+    candidates for the max are kept in a monotonic deque, so an update
+    is amortized O(1).
+    """
+
+    _op = staticmethod(lambda a, b: a <= b)
+
+    def __init__(self, timeperiod=30, price='close'):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        timeperiod: int, optional
+            The timeperiod (default is 30).
+        price : str, optional {'open', 'high', 'low', 'close'}
+            The bar field to use for price (default is 'close').
+
+        Attributes
+        ----------
+        value : float
+            The current value, NaN until `timeperiod` values are added.
+        """
+        self.timeperiod = timeperiod
+        self.price = price
+        self.value = np.nan
+        self._candidates = deque()
+        self._count = 0
+
+    def update(self, x):
+        """
+        Add a value, and return the highest value over the period.
+        """
+        candidates = self._candidates
+        while candidates and self._op(candidates[-1][1], x):
+            candidates.pop()
+        candidates.append((self._count, x))
+        self._count += 1
+        if candidates[0][0] <= self._count - 1 - self.timeperiod:
+            candidates.popleft()
+        if self._count >= self.timeperiod:
+            self.value = candidates[0][1]
+        return self.value
+
+
+class StreamingMIN(StreamingMAX):
+    """
+    The lowest value over a period, updated one value at a time.
+
+    Equivalent to `ts[price].rolling(timeperiod).min()`.
+    """
+
+    _op = staticmethod(lambda a, b: a >= b)
+
+
+########################################################################
+# STREAMING BACKTEST
+
+class StreamingBacktest:
+    """
+    A single symbol backtest that consumes bars as they arrive.
+
+    Each bar is a dict, or a pd.Series, with a 'date' and the prices,
+    e.g. 'open', 'high', 'low', 'close'.
+
+    Methods
+    -------
+     - warm_up()
+       Update the indicators with bars, without trading.
+
+     - update()
+       Process a new bar.
+
+     - run()
+       Process the bars of an iterable, e.g. a generator or a queue.
+
+     - get_logs()
+       Return the trade log and daily balance.
+
+     - stats()
+       Return the stats of the bars processed so far.
+
+     - save()
+       Save the state of the backtest to a file.
+    """
+
+    def __init__(self, symbol, capital, algo, indicators=None,
+                 margin=trade.Margin.CASH):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        symbol : str
+            The symbol for a security.
+        capital : int
+            The amount of money available for trading.
+        algo : callable
+            Called as algo(runner, row) for each bar.  A module level
+            function, so that the backtest can be saved.
+        indicators : dict, optional
+            Dict of key value pair of name:streaming indicator, e.g.
+            {'sma200': pf.StreamingSMA(200)}.  The value of each
+            indicator is added to the row as attribute `name`
+            (default is None, which implies no indicators).
+        margin : float, optional
+            The account margin (default is `pf.Margin.CASH`).
+
+        Attributes
+        ----------
+        symbol : str
+            The symbol for a security.
+        capital : int
+            The amount of money available for trading.
+        account : pf.Account
+            The account of the backtest.
+        tlog : pf.TradeLog
+            The trade log.
+        dbal : pf.DailyBal
+            The daily balance.
+        online_stats : pf.OnlineStats
+            The stats, updated with each bar.
+        row : types.SimpleNamespace
+            The last row passed to the algo, or None.
+        """
+        self.symbol = symbol
+        self.capital = capital
+        self.algo = algo
+        self.indicators = {} if indicators is None else indicators
+        self.account = trade.Account(cash=capital, margin=margin)
+        self.tlog = trade.TradeLog(symbol, account=self.account)
+        self.dbal = trade.DailyBal(account=self.account)
+        self.online_stats = pfstatistics.OnlineStats(capital, self.account)
+        self.row = None
+
+    def _row(self, bar):
+        """
+        Update the indicators with a bar, and return its row.
+        """
+        bar = dict(bar)
+        date = pd.Timestamp(bar.pop('date'))
+        for name, indicator in self.indicators.items():
+            bar[name] = indicator.update(bar[indicator.price])
+        return types.SimpleNamespace(Index=date, **bar)
+
+    def warm_up(self, bars):
+        """
+        Update the indicators with bars, without trading.
+
+        Use with the history needed by the indicators before the
+        first bar that is traded.
+
+        Parameters
+        ----------
+        bars : iterable of dict
+            The bars.
+
+        Returns
+        -------
+        None
+        """
+        for bar in bars:
+            self._row(bar)
+
+    def update(self, bar):
+        """
+        Process a new bar.
+
+        The indicators are updated, the algo is called, and the daily
+        balance and the stats are updated with the bar and the trades
+        closed on it.
+
+        Parameters
+        ----------
+        bar : dict or pd.Series
+            The bar, with a 'date' and the prices.
+
+        Returns
+        -------
+        types.SimpleNamespace
+            The row passed to the algo.
+        """
+        row = self._row(bar)
+        log = self.tlog._l
+        num_trades = len(log)
+
+        self.algo(self, row)
+        high = getattr(row, 'high', None)
+        low = getattr(row, 'low', None)
+        self.dbal.append(row.Index.to_pydatetime(), row.close, high, low)
+
+        _, high_, low_, close_, shares, _, leverage = self.dbal._l[-1]
+        self.online_stats.update(row.Index, close_, high_, low_, shares, leverage,
+                                 trades=self._new_trades(log, num_trades))
+        self.row = row
+        return row
+
+    def _new_trades(self, log, start):
+        """
+        Return the trades of this symbol closed since row `start`.
+        """
+        if len(log) == start:
+            return []
+        rows = np.arange(start, len(log))
+        codes, categories = log.codes('symbol')
+        rows = rows[codes[start:] == categories.get(self.symbol, -1)]
+        columns = ['entry_date', 'exit_date', 'entry_price', 'pl_points', 'pl_cash']
+        values = [log.column(column, rows) for column in columns]
+        return [dict(zip(columns, trade)) for trade in zip(*values)]
+
+    def run(self, bars):
+        """
+        Process the bars of an iterable, e.g. a generator, or
+        `iter(queue.get, None)` to stop at a None.
+
+        Parameters
+        ----------
+        bars : iterable of dict
+            The bars.
+
+        Returns
+        -------
+        None
+        """
+        for bar in bars:
+            self.update(bar)
+
+    def get_logs(self):
+        """
+        Return the trade log and daily balance.
+
+        Returns
+        -------
+        tlog : pd.DataFrame
+            The trade log.
+        dbal : pd.DataFrame
+            The daily balance.
+        """
+        tlog = self.tlog.get_log()
+        dbal = self.dbal.get_log(tlog)
+        return tlog, dbal
+
+    def stats(self, metrics=None):
+        """
+        Return the stats of the bars processed so far.
+
+        See `pf.OnlineStats.stats()`.
+        """
+        return self.online_stats.stats(metrics)
+
+    def save(self, filename):
+        """
+        Save the state of the backtest to a file.
+
+        Parameters
+        ----------
+        filename : str
+            The file, which is overwritten.
+
+        Returns
+        -------
+        None
+        """
+        with open(filename, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_streaming_backtest(filename):
+    """
+    Load the state of a backtest saved with `StreamingBacktest.save()`.
+
+    Parameters
+    ----------
+    filename : str
+        The file.
+
+    Returns
+    -------
+    pf.StreamingBacktest
+        The backtest, ready for the next bar.
+    """
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
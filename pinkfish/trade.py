@@ -2,6 +2,12 @@
 Trading agent.
 """
 
+from array import array
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import threading
+
+import numpy as np
 import pandas as pd
 
 
@@ -20,40 +26,465 @@ class Margin:
 
 
 ########################################################################
-# TRADE LOG - each symbol has it's own trade log
+# LOG BUFFER - column by column storage of the trade logs
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
 
-class TradeLog:
+def _microseconds(date):
     """
-    The trade log for each symbol.
+    Return a date as microseconds since the epoch, and its timezone.
+
+    A timezone aware date is stored as UTC microseconds, and converted
+    back to its timezone when the log is read.
+    """
+    if isinstance(date, datetime):
+        tz = date.tzinfo
+        if tz is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        return (date - _EPOCH) // _MICROSECOND, tz
+    if isinstance(date, np.datetime64):
+        return date.astype('datetime64[us]').astype(np.int64).item(), None
+    # e.g. a str or a date.
+    return _microseconds(pd.Timestamp(date))
+
+
+class _DateColumn:
+    """
+    The timezone of a date column of a `_LogBuffer`, and the last date
+    appended to it.
     """
 
-    cash = 0
+    __slots__ = ('tz', '_date', '_micros')
+
+    def __init__(self, tz=None):
+        self.tz = tz
+        self._date = None
+        self._micros = None
+
+    def micros(self, date):
+        """
+        Return a naive datetime, or a pd.Timestamp, in the timezone of
+        the column as microseconds since the epoch.  Raise for any
+        other date, which `_microseconds()` converts.
+        """
+        # The fills of a bar, and the entry and exit of a trade, share
+        # the date object.
+        if date is self._date:
+            return self._micros
+        if date.tzinfo is not self.tz:
+            raise ValueError('timezone changed')
+        if type(date) is pd.Timestamp:
+            # UTC nanoseconds.
+            micros = date.value // 1000
+        elif type(date) is datetime and self.tz is None:
+            micros = (date - _EPOCH) // _MICROSECOND
+        else:
+            raise TypeError('not a datetime')
+        self._date = date
+        self._micros = micros
+        return micros
+
+
+class _LogBuffer:
     """
-    int : Current cash, entire portfolio.
+    An append-only log stored column by column.
+
+    Each column is a growable typed array: dates are int64
+    microseconds, numbers are int64 or float64, and strings, e.g. the
+    direction and symbol, are int16 codes.  A row takes a few bytes
+    per column instead of a tuple of Python objects, and the DataFrame
+    is built from NumPy views of the arrays.
     """
-    multiplier = 1
+
+    _typecodes = {'date': 'q', 'int': 'q', 'float': 'd', 'category': 'h'}
+
+    def __init__(self, columns):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        columns : dict of str
+            Dict of key value pair of column:kind, where kind is one of
+            'date', 'int', 'float', or 'category'.
+
+        Attributes
+        ----------
+        columns : list of str
+            The columns of the log.
+        _arrays : list of array.array
+            The values of each column.
+        _codes : list
+            For each column, the dict of key value pair of value:code
+            for a category column, the `_DateColumn` of a date column,
+            or None.
+        _appenders : list of tuple
+            For each column, the `append` method of its array, and the
+            function that converts a value for it, or None.
+        """
+        self.columns = list(columns)
+        self._kinds = list(columns.values())
+        self._arrays = [array(self._typecodes[kind]) for kind in self._kinds]
+        self._codes = [{} if kind == 'category' else _DateColumn() if kind == 'date' else None
+                       for kind in self._kinds]
+        self._set_appenders()
+
+    def __len__(self):
+        return len(self._arrays[0])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_appenders']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._set_appenders()
+
+    def _set_appenders(self):
+        self._appenders = [
+            (values.append,
+             None if codes is None else
+             codes.__getitem__ if type(codes) is dict else codes.micros)
+            for values, codes in zip(self._arrays, self._codes)]
+
+    def _convert(self, i, value):
+        """
+        Return the value to store in column `i`, and the change to the
+        column that it needs, without changing the log.
+        """
+        kind = self._kinds[i]
+        if kind == 'date':
+            value, tz = _microseconds(value)
+            if len(self) == 0:
+                return value, ('tz', tz)
+            if str(tz) != str(self._codes[i].tz):
+                raise ValueError(f"'{self.columns[i]}' has dates in timezone "
+                                 f"{self._codes[i].tz}, not {tz}")
+            return value, None
+        if kind == 'category':
+            codes = self._codes[i]
+            if value in codes:
+                return codes[value], None
+            if len(codes) == 2**15:
+                raise OverflowError(f"too many values in '{self.columns[i]}'")
+            return len(codes), ('code', value)
+        if kind == 'int' and isinstance(value, (int, np.integer)):
+            value = int(value)
+            if not -2**63 <= value < 2**63:
+                raise OverflowError(f"'{self.columns[i]}' value {value} is out of range")
+            return value, None
+        # A float, or a non-integer in an int column, e.g. a float
+        # number of shares, which makes it a float column.
+        value = float(value)
+        return value, ('float', None) if kind == 'int' else None
+
+    def append(self, row):
+        """
+        Append a row, a tuple with a value for each column, and return
+        its position.
+
+        Usually each value is appended straight to its array.  The
+        first row, and a row that one of the arrays doesn't accept,
+        e.g. a new category, a float in an int column, or a date that
+        needs converting, are converted and validated as a whole
+        before any column is appended to.  So a bad value raises
+        without misaligning the columns.
+        """
+        appenders = self._appenders
+        if len(row) == len(appenders):
+            try:
+                for (append, convert), value in zip(appenders, row):
+                    append(value if convert is None else convert(value))
+                return len(self._arrays[0]) - 1
+            except (AttributeError, KeyError, TypeError, ValueError, OverflowError):
+                # The last column wasn't appended to.
+                n = len(self._arrays[-1])
+                for values in self._arrays:
+                    del values[n:]
+        self._append_converted(row)
+        return len(self._arrays[0]) - 1
+
+    def _append_converted(self, row):
+        """
+        Convert and validate a row, then append it.
+        """
+        if len(row) != len(self.columns):
+            raise ValueError(f'expected {len(self.columns)} values, got {len(row)}')
+        converted = [self._convert(i, value) for i, value in enumerate(row)]
+
+        for i, (value, change) in enumerate(converted):
+            if change is None:
+                pass
+            elif change[0] == 'tz':
+                self._codes[i].tz = change[1]
+            elif change[0] == 'code':
+                self._codes[i][change[1]] = value
+            else:
+                self._arrays[i] = array('d', self._arrays[i])
+                self._kinds[i] = 'float'
+                self._set_appenders()
+        for values, (value, _) in zip(self._arrays, converted):
+            values.append(value)
+
+    def _values(self, column):
+        """
+        Return a NumPy view of the stored values of a column.
+        """
+        values = self._arrays[self.columns.index(column)]
+        return np.frombuffer(values, dtype=values.typecode)
+
+    def codes(self, column):
+        """
+        Return the codes of a category column and the dict of key
+        value pair of value:code.
+        """
+        return self._values(column), self._codes[self.columns.index(column)]
+
+    def column(self, column, rows=None):
+        """
+        Return the values of a column as a NumPy array.
+
+        Parameters
+        ----------
+        column : str
+            The column name.
+        rows : np.ndarray, optional
+            The positions, or a boolean mask, of the rows to return
+            (default is None, which implies all rows).
+
+        Returns
+        -------
+        np.ndarray
+            The values of the column.  A timezone aware date column is
+            a pd.arrays.DatetimeArray.
+        """
+        i = self.columns.index(column)
+        values = self._values(column)
+        if rows is not None:
+            values = values[rows]
+        kind = self._kinds[i]
+        if kind == 'date':
+            values = values.view('datetime64[us]')
+            tz = self._codes[i].tz
+            if tz is not None:
+                values = (pd.DatetimeIndex(values).tz_localize('UTC')
+                          .tz_convert(tz).array)
+        elif kind == 'category':
+            values = np.array(list(self._codes[i]), dtype=object)[values]
+        return values
+
+    def to_frame(self, rows=None, index=None):
+        """
+        Return the log as a DataFrame.
+
+        Parameters
+        ----------
+        rows : np.ndarray, optional
+            The positions, or a boolean mask, of the rows to return
+            (default is None, which implies all rows).
+        index : np.ndarray, optional
+            The index of the DataFrame (default is None, which implies
+            a RangeIndex).
+
+        Returns
+        -------
+        pd.DataFrame
+            The log.
+        """
+        data = {column: self.column(column, rows) for column in self.columns}
+        if len(data[self.columns[0]]) == 0:
+            return pd.DataFrame([], columns=self.columns)
+        # Copy, so the arrays can still be appended to.
+        return pd.DataFrame(data, index=index, columns=self.columns, copy=True)
+
+
+def _group_positions(codes):
     """
-    int : Applied to profit calculation.  Used only with futures.
+    Return the position of each row within the rows with the same code.
     """
-    margin = Margin.CASH
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    positions = np.empty(len(codes), dtype=np.int64)
+    positions[order] = np.arange(len(codes)) - starts
+    return positions
+
+
+_TRADE_LOG_COLUMNS = {
+    'entry_date': 'date', 'entry_price': 'float', 'exit_date': 'date',
+    'exit_price': 'float', 'pl_points': 'float', 'pl_cash': 'float',
+    'qty': 'int', 'cumul_total': 'float', 'direction': 'category',
+    'symbol': 'category'
+}
+"""
+dict of str : The columns of the trade log and their kinds.
+"""
+
+_RAW_LOG_COLUMNS = {
+    'date': 'date', 'seq_num': 'int', 'price': 'float', 'shares': 'int',
+    'entry_exit': 'category', 'direction': 'category', 'symbol': 'category'
+}
+"""
+dict of str : The columns of the raw trade log and their kinds.
+"""
+
+
+########################################################################
+# ACCOUNT - owns cash, margin, and the trade log of each symbol
+
+class Account:
+    """
+    A trading account.
+
+    The account owns the cash, margin, buying power, trade sequence
+    numbers, and the trade log of each symbol.  TradeLog, DailyBal,
+    Portfolio, and Benchmark objects are bound to an account, so
+    backtests that use different accounts can run at the same time,
+    e.g. in a thread pool.
+    """
+
+    def __init__(self, cash=0, margin=Margin.CASH, multiplier=1):
+        """
+        Initialize instance variables.
+
+        Parameters
+        ----------
+        cash : int, optional
+            The starting cash (default is 0).
+        margin : float, optional
+            The account margin (default is `pf.Margin.CASH`).
+        multiplier : int, optional
+            Applied to profit calculation.  Used only with futures
+            (default is 1).
+
+        Attributes
+        ----------
+        cash : int
+            Current cash, entire portfolio.
+        margin : float
+            Margin percent.
+        multiplier : int
+            Applied to profit calculation.  Used only with futures.
+        buying_power : float
+            Buying power for Portfolio class.
+        seq_num : int
+            Sequential number used to order trades in Portfolio class.
+        trade_logs : dict of pf.TradeLog
+            dict (key=symbol) of TradeLog instances bound to this
+            account.
+        _raw : _LogBuffer
+            The raw trades of all the trade logs, in `seq_num` order.
+        _l : _LogBuffer
+            The matching entry/exit trade pairs of all the trade logs,
+            in the order they were closed.
+        """
+        self.cash = cash
+        self.margin = margin
+        self.multiplier = multiplier
+        self.buying_power = None
+        self.seq_num = 0
+        self.trade_logs = {}
+        self._raw = _LogBuffer(_RAW_LOG_COLUMNS)
+        self._l = _LogBuffer(_TRADE_LOG_COLUMNS)
+
+    def reset(self):
+        """
+        Clear the trade sequence number and the trade logs.
+
+        Use when starting new portfolio construction.  Trade logs
+        created before the reset keep their logs.
+        """
+        self.seq_num = 0
+        self.trade_logs.clear()
+        self._raw = _LogBuffer(_RAW_LOG_COLUMNS)
+        self._l = _LogBuffer(_TRADE_LOG_COLUMNS)
+
+
+_local = threading.local()
+
+
+def get_default_account():
+    """
+    Return the default account of the current thread.
+
+    The default account is used by TradeLog, DailyBal, Portfolio, and
+    the `pf.TradeLog.cash` style class attributes when no account is
+    given.  Each thread has its own default account, so strategies
+    written against the class attributes don't corrupt each other's
+    cash when they run in different threads.
+    """
+    try:
+        return _local.account
+    except AttributeError:
+        _local.account = Account()
+        return _local.account
+
+
+def _default_account_property(name, doc):
     """
-    float : Margin percent.
+    Return a class property that reads and writes the default account.
     """
-    buying_power = None
+    def fget(cls):
+        return getattr(get_default_account(), name)
+
+    def fset(cls, value):
+        setattr(get_default_account(), name, value)
+
+    return property(fget, fset, doc=doc)
+
+
+class _TradeLogMeta(type):
     """
-    float : Buying power for Portfolio class.
+    Map the TradeLog class attributes onto the default account.
+
+    This keeps `pf.TradeLog.cash = capital` and friends working.
     """
-    seq_num = 0
+    cash = _default_account_property(
+        'cash', 'int : Current cash, entire portfolio.')
+    multiplier = _default_account_property(
+        'multiplier', 'int : Applied to profit calculation.  Used only with futures.')
+    margin = _default_account_property(
+        'margin', 'float : Margin percent.')
+    buying_power = _default_account_property(
+        'buying_power', 'float : Buying power for Portfolio class.')
+    seq_num = _default_account_property(
+        'seq_num', 'int : Sequential number used to order trades in Portfolio class.')
+    instance = _default_account_property(
+        'trade_logs', 'dict of pf.TradeLog : dict (key=symbol) of TradeLog '
+                      'instances used in Portfolio class.')
+
+
+########################################################################
+# TRADE LOG - each symbol has it's own trade log
+
+class _Lot:
     """
-    int : Sequential number used to order trades in Portfolio class.
+    An open trade, i.e. shares entered on a date at a price that
+    haven't been exited yet.
     """
-    instance = {}
+
+    __slots__ = ('entry_date', 'entry_price', 'qty')
+
+    def __init__(self, entry_date, entry_price, qty):
+        self.entry_date = entry_date
+        self.entry_price = entry_price
+        self.qty = qty
+
+
+class TradeLog(metaclass=_TradeLogMeta):
     """
-    dict of pf.TradeLog : dict (key=symbol) of TradeLog instances used
-    in Portfolio class.
+    The trade log for each symbol.
+
+    `TradeLog.cash`, `TradeLog.margin`, `TradeLog.multiplier`,
+    `TradeLog.buying_power`, `TradeLog.seq_num`, and
+    `TradeLog.instance` are the attributes of the default account of
+    the current thread.  See `pf.Account`.
     """
 
-    def __init__(self, symbol, reset=True):
+    def __init__(self, symbol, reset=True, account=None):
         """
         Initialize instance variables.
 
@@ -64,9 +495,14 @@ class TradeLog:
         reset : bool, optional
             Use when starting new portfolio construction to clear the
             dict of TradeLog instances (default is True).
+        account : pf.Account, optional
+            The account the trade log is bound to (default is None,
+            which implies the default account of the current thread).
 
         Attributes
         ----------
+        account : pf.Account
+            The account the trade log is bound to.
         symbol : str
             The symbol for a security.
         shares : int
@@ -77,27 +513,37 @@ class TradeLog:
             The average purchase price per share.
         cumul_total : float
             The cumulative total profits (loss).
-        _l : list of tuples
-            The list of matching entry/exit trade pairs.  This list
-            will become the official trade log.
-        _raw : list of tuples
-            The list of raw trades, either entry or exit.
-        open_trades : list
-            The list of open trades, i.e. not closed out.
+        _l : _LogBuffer
+            The matching entry/exit trade pairs, shared with the other
+            trade logs of the account.  The rows of this symbol will
+            become the official trade log.
+        _raw : _LogBuffer
+            The raw trades, either entry or exit, shared with the other
+            trade logs of the account.
+        _l_rows : array.array
+            The positions of the rows of this trade log in `_l`.
+        _raw_rows : array.array
+            The positions of the rows of this trade log in `_raw`.
+        _open_trades : collections.deque of _Lot
+            The open trades, i.e. not closed out, oldest first.
         """
+        if account is None:
+            account = get_default_account()
+        self.account = account
         self.symbol = symbol
         self.shares = 0
         self.direction = None
         self.ave_entry_price = 0
         self.cumul_total = 0
-        self._l = []
-        self._raw = []
-        self._open_trades = []
+        self._open_trades = deque()
 
         if reset:
-            TradeLog.seq_num = 0
-            TradeLog.instance.clear()
-        TradeLog.instance[symbol] = self
+            account.reset()
+        account.trade_logs[symbol] = self
+        self._l = account._l
+        self._raw = account._raw
+        self._l_rows = array('q')
+        self._raw_rows = array('q')
 
     def share_value(self, price):
         """
@@ -135,8 +581,8 @@ class TradeLog:
             The total value.
         """
         total_value = self.share_value(price)
-        if TradeLog.cash > 0:
-            total_value += TradeLog.cash
+        if self.account.cash > 0:
+            total_value += self.account.cash
         return total_value
 
     def equity(self, price):
@@ -145,8 +591,8 @@ class TradeLog:
         Loan is negative cash.
         """
         equity = self.total_value(price)
-        if TradeLog.cash < 0:
-            equity += TradeLog.cash
+        if self.account.cash < 0:
+            equity += self.account.cash
         return equity
 
     def leverage(self, price):
@@ -159,7 +605,7 @@ class TradeLog:
         """
         Return the total account funds for trading given current price.
         """
-        return self.equity(price) * TradeLog.margin
+        return self.equity(price) * self.account.margin
 
     def share_percent(self, price):
         """
@@ -181,8 +627,8 @@ class TradeLog:
         """
         Calculate buying power.
         """
-        buying_power = (TradeLog.cash * TradeLog.margin
-                        + self.share_value(price) * (TradeLog.margin -1))
+        buying_power = (self.account.cash * self.account.margin
+                        + self.share_value(price) * (self.account.margin -1))
         return buying_power
 
     def calc_shares(self, price, cash=None):
@@ -205,12 +651,12 @@ class TradeLog:
         """
 
         # Margin should be equal to or greater than 1.
-        if TradeLog.margin < 1: TradeLog.margin = 1
+        if self.account.margin < 1: self.account.margin = 1
 
-        # Calculate buying power.  TradeLog.buying_power may have
+        # Calculate buying power.  account.buying_power may have
         # already been calculated in portfolio.
-        if TradeLog.buying_power is not None:
-            buying_power = TradeLog.buying_power
+        if self.account.buying_power is not None:
+            buying_power = self.account.buying_power
         else:
             buying_power = self.calc_buying_power(price)
 
@@ -238,14 +684,12 @@ class TradeLog:
             return 0
 
         # Record in raw trade log.
-        t = (entry_date, TradeLog.seq_num, entry_price, shares, 'entry', direction, self.symbol)
-        self._raw.append(t)
-        TradeLog.seq_num += 1
+        t = (entry_date, self.account.seq_num, entry_price, shares, 'entry', direction, self.symbol)
+        self._raw_rows.append(self._raw.append(t))
+        self.account.seq_num += 1
 
         # Add record to open_trades.
-        d = {'entry_date':entry_date, 'entry_price':entry_price, 'qty':shares,
-             'direction':direction, 'symbol':self.symbol}
-        self._open_trades.append(d)
+        self._open_trades.append(_Lot(entry_date, entry_price, shares))
 
         # Update direction.
         if self.direction != direction:
@@ -262,7 +706,7 @@ class TradeLog:
         self.shares += shares
 
         # Update cash.
-        TradeLog.cash -= entry_price * shares
+        self.account.cash -= entry_price * shares
 
         return shares
 
@@ -335,7 +779,7 @@ class TradeLog:
         """
         if index >= self.num_open_trades:
             return 0
-        return self._open_trades[index]['qty']
+        return self._open_trades[index].qty
 
     def _exit_trade(self, exit_date, exit_price, shares=None, direction=Direction.LONG):
         """
@@ -360,14 +804,17 @@ class TradeLog:
         shares_orig = shares
 
         # Record in raw trade log.
-        t = (exit_date, TradeLog.seq_num, exit_price, shares, 'exit', direction, self.symbol)
-        self._raw.append(t)
-        TradeLog.seq_num += 1
-
-        for i, open_trade in enumerate(self._open_trades[:]):
-            entry_date = open_trade['entry_date']
-            entry_price = open_trade['entry_price']
-            qty = open_trade['qty']
+        t = (exit_date, self.account.seq_num, exit_price, shares, 'exit', direction, self.symbol)
+        self._raw_rows.append(self._raw.append(t))
+        self.account.seq_num += 1
+
+        # Exit the open trades first in, first out.
+        open_trades = self._open_trades
+        while open_trades:
+            open_trade = open_trades[0]
+            entry_date = open_trade.entry_date
+            entry_price = open_trade.entry_price
+            qty = open_trade.qty
 
             if direction == Direction.LONG:
                 pl_points = exit_price - entry_price
@@ -376,28 +823,28 @@ class TradeLog:
 
             # Calculate exit_shares and pl_cash.
             exit_shares = qty if shares >= qty else shares
-            pl_cash = pl_points * exit_shares * TradeLog.multiplier
+            pl_cash = pl_points * exit_shares * self.account.multiplier
             self.cumul_total += pl_cash
 
             # Record in trade log.
             t = (entry_date, entry_price, exit_date, exit_price,
                  pl_points, pl_cash, exit_shares, self.cumul_total,
                  direction, self.symbol)
-            self._l.append(t)
+            self._l_rows.append(self._l.append(t))
 
             # Update shares and cash.
             self.shares -= exit_shares
-            TradeLog.cash += self.ave_entry_price*exit_shares + pl_cash
+            self.account.cash += self.ave_entry_price*exit_shares + pl_cash
 
-            # Update open_trades list.
+            # Update open_trades.
             if shares == qty:
-                del self._open_trades[0]
+                open_trades.popleft()
                 break
             elif shares < qty:
-                self._open_trades[0]['qty'] -= shares
+                open_trade.qty -= shares
                 break
             else:
-                del self._open_trades[0]
+                open_trades.popleft()
                 shares -= exit_shares
 
         return -shares_orig
@@ -617,40 +1064,34 @@ class TradeLog:
     def _merge_trades(self, tlog):
         """
         Merge like trades that occur on the same day.
-        """
 
-        def _merge(group, merge_type):
-            """
-            Merge entry or exit trades that occur on the same date.
-            """
-            tlog = group.copy()
-            group_key = group.name
-            if merge_type == 'entry':
-                tlog['entry_date'] = group_key
-            else:
-                tlog['exit_date'] = group_key
-            tlog['entry_price'] = \
-                (tlog['entry_price'] * tlog['qty']).sum() / tlog['qty'].sum()
-            tlog['exit_price'] = \
-                (tlog['exit_price'] * tlog['qty']).sum() / tlog['qty'].sum()
-            tlog['pl_points'] = tlog['pl_points'].sum()
-            tlog['pl_cash'] = tlog['pl_cash'].sum()
-            tlog['qty'] = tlog['qty'].sum()
-            tlog['cumul_total'] = tlog['cumul_total'].iloc[-1]
-            return tlog
-
-        apply_kwargs = {}
-        if 'include_groups' in pd.core.groupby.DataFrameGroupBy.apply.__kwdefaults__:
-            apply_kwargs['include_groups'] = False
-        tlog = tlog.groupby('entry_date', group_keys=False) \
-                   .apply(lambda g: _merge(g, 'entry'), **apply_kwargs) \
-                   .dropna().reset_index(drop=True)
-        tlog = tlog.groupby('exit_date', group_keys=False) \
-                   .apply(lambda g: _merge(g, 'exit'), **apply_kwargs) \
-                   .dropna().reset_index(drop=True)
+        First the trades with the same entry date, then the trades with
+        the same exit date, are given the quantity weighted prices, the
+        summed points, cash, and quantity, and the last cumulative total
+        of their group.  The date column of each pass is moved to the
+        end.  The groups are summed all at once with grouped
+        aggregations.
+        """
+        for key in ['entry_date', 'exit_date']:
+            tlog = tlog.sort_values(key, kind='stable')
+            groups = tlog.groupby(key, sort=False)
+            price_qty = pd.DataFrame({
+                'entry_price': tlog['entry_price'] * tlog['qty'],
+                'exit_price': tlog['exit_price'] * tlog['qty']
+            }).groupby(tlog[key], sort=False).transform('sum')
+            qty = groups['qty'].transform('sum')
+            sums = groups[['pl_points', 'pl_cash']].transform('sum')
+            tlog = tlog.assign(
+                entry_price=price_qty['entry_price'] / qty,
+                exit_price=price_qty['exit_price'] / qty,
+                pl_points=sums['pl_points'],
+                pl_cash=sums['pl_cash'],
+                qty=qty,
+                cumul_total=groups['cumul_total'].transform('last', skipna=False))
+            columns = [column for column in tlog.columns if column != key] + [key]
+            tlog = tlog[columns].dropna().reset_index(drop=True)
         return tlog
 
-
     def get_log(self, merge_trades=False):
         """
         Return the trade log.
@@ -671,10 +1112,7 @@ class TradeLog:
         tlog : pd.DataFrame
             The trade log.
         """
-        columns = ['entry_date', 'entry_price', 'exit_date', 'exit_price',
-                   'pl_points', 'pl_cash', 'qty', 'cumul_total',
-                   'direction', 'symbol']
-        tlog = pd.DataFrame(self._l, columns=columns)
+        tlog = self._l.to_frame(np.frombuffer(self._l_rows, dtype=np.int64))
 
         if merge_trades:
             tlog = self._merge_trades(tlog)
@@ -694,8 +1132,7 @@ class TradeLog:
         rlog : pd.DataFrame
             The raw trade log.
         """
-        columns = ['date', 'seq_num', 'price', 'shares', 'entry_exit', 'direction', 'symbol']
-        rlog = pd.DataFrame(self._raw, columns=columns)
+        rlog = self._raw.to_frame(np.frombuffer(self._raw_rows, dtype=np.int64))
         return rlog
 
 ########################################################################
@@ -715,15 +1152,26 @@ class DailyBal:
     Log for daily balance.
     """
 
-    def __init__(self):
+    def __init__(self, account=None):
         """
         Initialize instance variables.
 
+        Parameters
+        ----------
+        account : pf.Account, optional
+            The account the daily balance is bound to (default is None,
+            which implies the default account of the current thread).
+
         Attributes
         ----------
+        account : pf.Account
+            The account the daily balance is bound to.
         _l : list of tuples
             The list of daily balance tuples.
         """
+        if account is None:
+            account = get_default_account()
+        self.account = account
         self._l = []
 
     def append(self, date, close, high=None, low=None):
@@ -754,8 +1202,8 @@ class DailyBal:
 
         # calculate daily balance values:
         # date, high, low, close, shares, cash, leverage
-        cash = TradeLog.cash
-        tlog = list(TradeLog.instance.values())[0]
+        cash = self.account.cash
+        tlog = list(self.account.trade_logs.values())[0]
         shares   = tlog.shares
         high_    = tlog.equity(high)
         low_     = tlog.equity(low)
@@ -791,22 +1239,12 @@ class DailyBal:
         columns = ['date', 'high', 'low', 'close', 'shares', 'cash', 'leverage']
         dbal = pd.DataFrame(self._l, columns=columns)
 
-        def trade_state(row):
-            """
-            Apply function for adding the `state` column to dbal.
-
-            Convert pandas.timestamp to numpy.datetime64.
-            See if there was a entry or exit in tlog on date.
-            """
-            date = row.date.to_datetime64()
-            if date in tlog.entry_date.values:
-                state = TradeState.OPEN
-            elif date in tlog.exit_date.values:
-                state = TradeState.CLOSE
-            else:
-                state = TradeState.HOLD
-            return state
-
-        dbal['state'] = dbal.apply(trade_state, axis=1)
+        # A date is OPEN if a trade was entered on it, otherwise CLOSE
+        # if a trade was exited on it, otherwise HOLD.
+        dates = dbal['date'].to_numpy(dtype='datetime64[ns]')
+        entry = np.isin(dates, tlog['entry_date'].to_numpy(dtype='datetime64[ns]'))
+        exit = np.isin(dates, tlog['exit_date'].to_numpy(dtype='datetime64[ns]'))
+        dbal['state'] = np.select([entry, exit], [TradeState.OPEN, TradeState.CLOSE],
+                                  TradeState.HOLD).tolist()
         dbal.set_index('date', inplace=True)
         return dbal
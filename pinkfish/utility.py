@@ -88,11 +88,20 @@ def print_full(x):
 def read_config():
     """
     Read pinkfish configuration.
+
+    The config file is `~/.pinkfish`, e.g.
+
+        [global]
+        base_dir = /home/user/pinkfish
+        cache_format = npz
+
+    `cache_format` is optional and defaults to 'csv'.
     """
     conf = {}
     parser = ConfigParser()
     parser.read(Path('~/.pinkfish').expanduser())
     conf['base_dir'] = parser.get('global', 'base_dir')
+    conf['cache_format'] = parser.get('global', 'cache_format', fallback='csv')
     return conf
 
 
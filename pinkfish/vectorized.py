@@ -0,0 +1,235 @@
+"""
+Vectorized backtesting.
+
+Many single symbol strategies are pure 'enter when X, exit when Y'
+rules.  Instead of walking the timeseries with `ts.itertuples()` and
+calling `TradeLog.buy()`, `TradeLog.sell()`, and `DailyBal.append()`
+on every bar, `vectorized_backtest()` takes boolean entry and exit
+arrays and builds the same trade log and daily balance log that
+`pf.stats()` consumes.  The per bar work (signal state, shares held,
+cash, equity, leverage, trade state) is done with NumPy over the
+whole timeseries at once; only the trades themselves are visited
+one at a time, because the number of shares bought on each entry
+depends on the cash left by the previous trade.
+"""
+
+import numpy as np
+import pandas as pd
+
+import pinkfish.trade as trade
+
+
+def _next_true(a):
+    """
+    Return the index of the next True value at or after each element.
+
+    The returned array has one extra element so that it can be
+    indexed with `i + 1` for the last bar.  Where there is no
+    True value at or after an element, the value is `len(a)`.
+    """
+    n = len(a)
+    idx = np.where(a, np.arange(n), n)
+    idx = np.append(idx, n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _to_bool_array(signal, n, name):
+    """
+    Convert a signal to a 1d bool numpy array of length `n`.
+    """
+    a = np.asarray(signal, dtype=bool)
+    if a.shape != (n,):
+        raise ValueError(f'{name} must have the same length as ts, '
+                         f'{name}={a.shape}, ts=({n},)')
+    return a
+
+
+def _shares_at(shares, i):
+    """
+    Return the requested number of shares for entry bar `i`.
+    """
+    if shares is None:
+        return None
+    if np.ndim(shares) == 0:
+        return shares
+    return shares[i]
+
+
+def vectorized_backtest(ts, symbol, capital, entries, exits, shares=None,
+                        margin=trade.Margin.CASH, field='close',
+                        high_field=None, low_field=None, close_at_end=True):
+    """
+    Backtest a long only strategy from boolean entry and exit signals.
+
+    The signals are applied the same way a typical pinkfish `_algo()`
+    loop applies them: if there are shares, sell on an exit signal;
+    otherwise, buy on an entry signal.  Trades are filled at the
+    `field` price of the signal bar.  The daily balance is recorded
+    after trading on every bar.
+
+    Parameters
+    ----------
+    ts : pd.DataFrame
+        The timeseries of a symbol.
+    symbol : str
+        The symbol for a security.
+    capital : int
+        The amount of money available for trading.
+    entries : array-like of bool
+        True on bars where a position should be opened.
+    exits : array-like of bool
+        True on bars where an open position should be closed.
+    shares : int or array-like of int, optional
+        The number of shares to buy on entry, either a constant or
+        a value per bar (default is None, which implies buy the
+        maximum number of shares possible with available buying
+        power).  The number of shares is always capped by buying
+        power.
+    margin : float, optional
+        The account margin (default is `pf.Margin.CASH`).
+    field : str, optional {'open', 'high', 'low', 'close'}
+        The price field used to fill trades and compute the daily
+        closing balance (default is 'close').
+    high_field : str, optional
+        The price field used for the daily balance high (default is
+        None, which implies that the 'high' is the `field` price).
+    low_field : str, optional
+        The price field used for the daily balance low (default is
+        None, which implies that the 'low' is the `field` price).
+    close_at_end : bool, optional
+        True to close any open position on the last bar, and to
+        ignore an entry signal on the last bar (default is True).
+
+    Returns
+    -------
+    tlog : pd.DataFrame
+        The trade log.
+    dbal : pd.DataFrame
+        The daily balance log.
+
+    Notes
+    -----
+    No account is used, so pass `account=pf.Account(margin=margin)` to
+    `pf.stats()` to report the margin if it is not CASH.
+
+    Examples
+    --------
+    >>> entries = (ts['close'] == ts['period_low']) & (ts['regime'] > 0)
+    >>> exits = ts['close'] == ts['period_high']
+    >>> tlog, dbal = pf.vectorized_backtest(ts, 'SPY', capital,
+    ...                                     entries, exits)
+    >>> stats = pf.stats(ts, tlog, dbal, capital)
+    """
+    n = len(ts)
+    entries = _to_bool_array(entries, n, 'entries')
+    exits = _to_bool_array(exits, n, 'exits')
+    if shares is not None and np.ndim(shares) != 0:
+        shares = np.asarray(shares)
+        if shares.shape != (n,):
+            raise ValueError(f'shares must be a scalar or have the same length '
+                             f'as ts, shares={shares.shape}, ts=({n},)')
+
+    if close_at_end and n > 0:
+        entries = entries.copy()
+        exits = exits.copy()
+        entries[-1] = False
+        exits[-1] = True
+
+    # Margin should be equal to or greater than 1.
+    if margin < 1: margin = 1
+
+    prices = ts[field].to_numpy(dtype=float)
+    dates = ts.index.to_pydatetime()
+
+    next_entry = _next_true(entries)
+    next_exit = _next_true(exits)
+
+    # Walk the trades.  Cash only changes on entry and exit bars, so
+    # record the bar index and new cash value at each change point.
+    cash = capital
+    cumul_total = 0
+    change_idx = []
+    change_cash = []
+    entry_idx = []
+    exit_idx = []
+    qtys = []
+    tl = []
+
+    i = next_entry[0]
+    while i < n:
+        entry_price = prices[i]
+        buying_power = cash * margin
+        if buying_power < 0: buying_power = 0
+        max_shares = int(buying_power / entry_price)
+        requested = _shares_at(shares, i)
+        qty = max_shares if requested is None else int(min(requested, max_shares))
+        if qty <= 0:
+            i = next_entry[i+1]
+            continue
+
+        cash -= entry_price * qty
+        change_idx.append(i)
+        change_cash.append(cash)
+        entry_idx.append(i)
+        qtys.append(qty)
+
+        j = next_exit[i+1]
+        if j >= n:
+            # Position remains open.
+            exit_idx.append(n)
+            break
+
+        exit_price = prices[j]
+        pl_points = exit_price - entry_price
+        pl_cash = pl_points * qty
+        cumul_total += pl_cash
+        cash += entry_price*qty + pl_cash
+        change_idx.append(j)
+        change_cash.append(cash)
+        exit_idx.append(j)
+
+        tl.append((dates[i], entry_price, dates[j], exit_price,
+                   pl_points, pl_cash, qty, cumul_total,
+                   trade.Direction.LONG, symbol))
+        i = next_entry[j+1]
+
+    columns = ['entry_date', 'entry_price', 'exit_date', 'exit_price',
+               'pl_points', 'pl_cash', 'qty', 'cumul_total',
+               'direction', 'symbol']
+    tlog = pd.DataFrame(tl, columns=columns)
+
+    # Shares held on each bar, after trading on that bar.
+    delta = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(delta, np.array(entry_idx, dtype=np.intp), qtys)
+    np.subtract.at(delta, np.array(exit_idx, dtype=np.intp), qtys)
+    shares_held = np.cumsum(delta[:n])
+
+    # Cash on each bar, after trading on that bar.
+    cash_values = np.array([capital] + change_cash, dtype=float)
+    pos = np.searchsorted(np.array(change_idx, dtype=np.intp), np.arange(n), side='right')
+    cash_held = cash_values[pos]
+
+    def _equity(price):
+        share_value = price * shares_held
+        total_value = share_value + np.where(cash_held > 0, cash_held, 0)
+        equity = total_value + np.where(cash_held < 0, cash_held, 0)
+        return total_value, equity
+
+    total_value, close_ = _equity(prices)
+    high_ = close_ if high_field is None else _equity(ts[high_field].to_numpy(dtype=float))[1]
+    low_ = close_ if low_field is None else _equity(ts[low_field].to_numpy(dtype=float))[1]
+    leverage = total_value / close_
+
+    # As in `DailyBal.get_log()`, the state is taken from the closed
+    # trades, so the entry of a position still open at the end is HOLD.
+    state = np.full(n, trade.TradeState.HOLD, dtype=object)
+    closed = [(i, j) for i, j in zip(entry_idx, exit_idx) if j < n]
+    state[[j for _, j in closed]] = trade.TradeState.CLOSE
+    state[[i for i, _ in closed]] = trade.TradeState.OPEN
+
+    dbal = pd.DataFrame({'date': dates, 'high': high_, 'low': low_,
+                         'close': close_, 'shares': shares_held,
+                         'cash': cash_held, 'leverage': leverage,
+                         'state': state})
+    dbal.set_index('date', inplace=True)
+    return tlog, dbal
@@ -28,6 +28,7 @@ setup(
     ],
     extras_require={
         'talib':  ['TA-Lib'],
+        'parquet':  ['pyarrow'],
     },
     data_files=[('', ['requirements.txt'])],
     python_requires=">=3.11",
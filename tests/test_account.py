@@ -0,0 +1,92 @@
+"""Tests for instance-scoped trading accounts."""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+
+def _portfolio_timeseries(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=n)
+    data = {}
+    for symbol in SYMBOLS:
+        data[symbol + '_close'] = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    ts = pd.DataFrame(data, index=index)
+    ts['first_dotm'] = ts.index.month != np.roll(ts.index.month, 1)
+    return ts
+
+
+def _run_portfolio(ts, capital, weights, account=None):
+    portfolio = pf.Portfolio(account=account)
+    portfolio.symbols = list(SYMBOLS)
+    portfolio.init_trade_logs(ts)
+    portfolio.account.cash = capital
+    for i, row in enumerate(ts.itertuples()):
+        end_flag = pf.is_last_row(ts, i)
+        if row.first_dotm or end_flag or i == 0:
+            w = weights if not end_flag else pf.set_dict_values(weights, 0)
+            portfolio.adjust_percents(row, w)
+        portfolio.record_daily_balance(row)
+    rlog, tlog, dbal = portfolio.get_logs()
+    return dbal['close'].iloc[-1], len(tlog)
+
+
+class TestAccount(unittest.TestCase):
+
+    def test_class_attributes_use_default_account(self):
+        pf.TradeLog.cash = 1234
+        self.assertEqual(pf.get_default_account().cash, 1234)
+        tlog = pf.TradeLog('AAA')
+        self.assertIs(tlog.account, pf.get_default_account())
+        self.assertIs(pf.TradeLog.instance['AAA'], tlog)
+
+    def test_default_account_is_per_thread(self):
+        pf.TradeLog.cash = 1
+        result = {}
+
+        def _worker():
+            pf.TradeLog.cash = 2
+            result['cash'] = pf.TradeLog.cash
+
+        thread = threading.Thread(target=_worker)
+        thread.start(); thread.join()
+        self.assertEqual(result['cash'], 2)
+        self.assertEqual(pf.TradeLog.cash, 1)
+
+    def test_explicit_accounts_are_isolated(self):
+        a = pf.Account(cash=10000)
+        b = pf.Account(cash=500)
+        tlog_a = pf.TradeLog('AAA', account=a)
+        tlog_b = pf.TradeLog('AAA', account=b)
+        tlog_a.buy('2020-01-02', 10.0)
+        tlog_b.buy('2020-01-02', 10.0)
+        self.assertEqual(tlog_a.shares, 1000)
+        self.assertEqual(tlog_b.shares, 50)
+        self.assertEqual(a.cash, 0)
+        self.assertEqual(b.cash, 0)
+        self.assertEqual(a.seq_num, 1)
+        self.assertIs(a.trade_logs['AAA'], tlog_a)
+        self.assertIs(b.trade_logs['AAA'], tlog_b)
+
+    def test_concurrent_portfolios(self):
+        ts = _portfolio_timeseries()
+        jobs = [(10000 * (k + 1), {'AAA': 0.2 + 0.1 * k, 'BBB': 0.3, 'CCC': 0.2})
+                for k in range(4)]
+        expected = [_run_portfolio(ts, capital, weights, pf.Account())
+                    for capital, weights in jobs]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda job: _run_portfolio(ts, job[0], job[1], pf.Account()), jobs * 3))
+        self.assertEqual(results, expected * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests for the binary symbol cache formats."""
+
+import configparser
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import pinkfish.fetch as fetch
+import pinkfish.utility as utility
+
+
+def _download(n=300):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2010-01-04', periods=n, name='Date')
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Adj Close': close * 0.9,
+                         'Volume': rng.integers(0, 10**6, n)}, index=index)
+
+
+class TestCacheFormat(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+        self._original_cache_dir = fetch._get_cache_dir
+        self._original_download = fetch.yf.download
+        fetch._get_cache_dir = lambda dir_name: self.cache_dir
+        self.downloads = 0
+
+        def mock_download(symbol, **kwargs):
+            self.downloads += 1
+            return _download()
+        fetch.yf.download = mock_download
+
+    def tearDown(self):
+        fetch._get_cache_dir = self._original_cache_dir
+        fetch.yf.download = self._original_download
+        self._tmp.cleanup()
+
+    def _check_format(self, cache_format):
+        expected = fetch.fetch_timeseries('SPY', cache_format='csv')
+        ts = fetch.fetch_timeseries('SPY', cache_format=cache_format)
+        self.assertTrue((self.cache_dir / f'SPY.{cache_format}').is_file())
+        self.assertEqual(self.downloads, 1)
+        pd.testing.assert_frame_equal(ts, expected, check_index_type=False,
+                                      check_freq=False)
+        self.assertEqual(ts.index.name, 'date')
+        self.assertEqual(ts.index.dtype.kind, 'M')
+
+    def test_npz(self):
+        self._check_format('npz')
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'requires pyarrow')
+    def test_parquet(self):
+        self._check_format('parquet')
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            fetch.fetch_timeseries('SPY', cache_format='xlsx')
+
+    def test_config_format(self):
+        original = utility.read_config
+
+        def read_config(error=None, cache_format='npz'):
+            def read():
+                if error is not None:
+                    raise error
+                return {'base_dir': '.', 'cache_format': cache_format}
+            return read
+        try:
+            utility.read_config = read_config()
+            self.assertEqual(fetch._get_cache_format(), 'npz')
+            self.assertEqual(fetch._get_cache_format('csv'), 'csv')
+            # No config file, or no base_dir.
+            utility.read_config = read_config(configparser.NoSectionError('global'))
+            self.assertEqual(fetch._get_cache_format(), 'csv')
+            utility.read_config = read_config(
+                configparser.NoOptionError('base_dir', 'global'))
+            self.assertEqual(fetch._get_cache_format(), 'csv')
+            # A bad config isn't ignored.
+            utility.read_config = read_config(cache_format='xlsx')
+            with self.assertRaises(ValueError):
+                fetch._get_cache_format()
+            utility.read_config = read_config(configparser.ParsingError('~/.pinkfish'))
+            with self.assertRaises(configparser.ParsingError):
+                fetch._get_cache_format()
+        finally:
+            utility.read_config = original
+
+    def test_migrate_and_remove(self):
+        fetch.fetch_timeseries('SPY', cache_format='csv')
+        fetch.fetch_timeseries('QQQ', cache_format='csv')
+        fetch.migrate_cache_symbols(cache_format='npz', remove_csv=True)
+        self.assertEqual(sorted(f.name for f in self.cache_dir.iterdir()),
+                         ['QQQ.npz', 'SPY.npz'])
+
+        df = fetch.get_symbol_metadata(cache_format='npz')
+        self.assertEqual(sorted(df['symbol']), ['QQQ', 'SPY'])
+        self.assertEqual(self.downloads, 2)
+
+        fetch.remove_cache_symbols('spy')
+        self.assertEqual([f.name for f in self.cache_dir.iterdir()], ['QQQ.npz'])
+
+
+if __name__ == '__main__':
+    unittest.main()
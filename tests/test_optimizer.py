@@ -0,0 +1,63 @@
+"""Tests for the process-parallel parameter sweep."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+class Strategy:
+    """A small period high/low strategy on synthetic prices."""
+
+    def __init__(self, seed, capital, options):
+        self.seed = seed
+        self.capital = capital
+        self.options = options.copy()
+        self.stats = None
+
+    def run(self):
+        rng = np.random.default_rng(self.seed)
+        n = 800
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        ts = pd.DataFrame({'close': close},
+                          index=pd.bdate_range('2000-01-03', periods=n))
+        period = self.options['period']
+        entries = ts['close'] == ts['close'].rolling(period).min()
+        exits = ts['close'] == ts['close'].rolling(period).max()
+        tlog, dbal = pf.vectorized_backtest(ts, 'TEST', self.capital,
+                                            entries, exits)
+        self.stats = pf.stats(ts, tlog, dbal, self.capital)
+
+
+class TestOptimizerSweep(unittest.TestCase):
+
+    metrics = ('annual_return_rate', 'total_num_trades', 'sharpe_ratio')
+
+    def test_matches_serial_optimizer_summary(self):
+        grid = {'period': [3, 5, 7, 9], 'seed_offset': [0, 1]}
+        options = {'period': 7, 'seed_offset': 0}
+        df = pf.optimizer_sweep(Strategy, (42, 10000), options, grid,
+                                self.metrics, workers=2, progress=False)
+
+        strategies = pd.Series(dtype=object)
+        for period in grid['period']:
+            for offset in grid['seed_offset']:
+                opts = {'period': period, 'seed_offset': offset}
+                label = f'period={period}, seed_offset={offset}'
+                strategies[label] = Strategy(42, 10000, opts)
+                strategies[label].run()
+        expected = pf.optimizer_summary(strategies, self.metrics)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_single_parameter_labels(self):
+        df = pf.optimizer_sweep(Strategy, (1, 10000), {'period': 7},
+                                {'period': [5, 10]}, self.metrics,
+                                workers=1, progress=False)
+        self.assertEqual(list(df.columns), ['5', '10'])
+        self.assertEqual(list(df.index), list(self.metrics))
+
+
+if __name__ == '__main__':
+    unittest.main()
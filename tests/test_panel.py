@@ -0,0 +1,129 @@
+"""Tests for the memory-mapped panel store."""
+
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+import pinkfish.fetch as fetch
+
+
+def _download(symbol):
+    seed = sum(map(ord, symbol))
+    rng = np.random.default_rng(seed)
+    # Give each symbol a different history so the master index is a union.
+    n = 400 + seed % 50
+    index = pd.bdate_range('2010-01-04', periods=n, name='Date')[seed % 7:]
+    n = len(index)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Adj Close': close * 0.9,
+                         'Volume': rng.integers(0, 10**6, n)}, index=index)
+
+
+class TestPanel(unittest.TestCase):
+
+    symbols = ['SPY', 'QQQ', 'TLT']
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self._original_cache_dir = fetch._get_cache_dir
+        self._original_download = fetch.yf.download
+
+        def mock_cache_dir(dir_name):
+            (root / dir_name).mkdir(exist_ok=True)
+            return root / dir_name
+        fetch._get_cache_dir = mock_cache_dir
+        fetch.yf.download = lambda symbol, **kwargs: _download(symbol)
+
+    def tearDown(self):
+        fetch._get_cache_dir = self._original_cache_dir
+        fetch.yf.download = self._original_download
+        self._tmp.cleanup()
+
+    def test_timeseries_matches_symbol_cache(self):
+        pf.build_panel(self.symbols, panel_name='test')
+        panel = pf.load_panel('test')
+        self.assertIsInstance(panel.data, np.memmap)
+        self.assertEqual(panel.symbols, self.symbols)
+        for symbol in self.symbols:
+            expected = pf.fetch_timeseries(symbol)
+            ts = panel.timeseries(symbol)
+            pd.testing.assert_frame_equal(ts, expected, check_dtype=False,
+                                          check_index_type=False, check_freq=False)
+
+    def test_select(self):
+        panel = pf.build_panel(self.symbols, panel_name='test')
+        start = datetime.datetime(2010, 3, 1)
+        end = datetime.datetime(2010, 6, 30)
+        ts = panel.select(['TLT', 'SPY'], ['close', 'volume'], start, end)
+        self.assertEqual(list(ts.columns),
+                         ['TLT_close', 'TLT_volume', 'SPY_close', 'SPY_volume'])
+        self.assertGreaterEqual(ts.index[0], start)
+        self.assertLessEqual(ts.index[-1], end)
+        expected = pf.fetch_timeseries('SPY')['close'][start:end]
+        np.testing.assert_array_equal(ts['SPY_close'].to_numpy(), expected.to_numpy())
+
+    def test_portfolio_fetch_timeseries(self):
+        panel = pf.build_panel(self.symbols, panel_name='test')
+        start = datetime.datetime(2010, 3, 1)
+        end = datetime.datetime(2011, 3, 1)
+        expected = pf.Portfolio().fetch_timeseries(self.symbols, start, end)
+        ts = pf.Portfolio().fetch_timeseries(self.symbols, start, end, panel=panel)
+        pd.testing.assert_frame_equal(ts, expected, check_index_type=False,
+                                      check_freq=False)
+
+        options = [dict(use_adj=False),
+                   dict(fields=['open', 'close', 'volume'], check_fields=['open', 'close']),
+                   dict(force_stock_market_calendar=True)]
+        for kwargs in options:
+            expected = pf.Portfolio().fetch_timeseries(self.symbols, start, end, **kwargs)
+            ts = pf.Portfolio().fetch_timeseries(self.symbols, start, end, panel=panel,
+                                                 **kwargs)
+            # The panel stores the volume as a float.
+            pd.testing.assert_frame_equal(ts, expected, check_dtype=False,
+                                          check_index_type=False, check_freq=False)
+
+    def test_lowercase_symbols(self):
+        panel = pf.build_panel(self.symbols, panel_name='test')
+        self.assertIn('spy', panel)
+        ts = panel.select(['spy'], ['close'])
+        self.assertEqual(list(ts.columns), ['SPY_close'])
+        np.testing.assert_array_equal(ts['SPY_close'].dropna().to_numpy(),
+                                      panel.timeseries('spy')['close'].to_numpy())
+
+        portfolio = pf.Portfolio()
+        ts = portfolio.fetch_timeseries(['spy', 'XXX'], datetime.datetime(2010, 3, 1),
+                                        datetime.datetime(2011, 3, 1), panel=panel)
+        self.assertEqual(portfolio.symbols, ['spy'])
+        self.assertIn('XXX', portfolio.fetch_errors)
+        self.assertIn('spy_close', ts.columns)
+
+    def test_suffixed_symbols(self):
+        panel = pf.build_panel(self.symbols + ['TLT_SHRT'], panel_name='test')
+        self.assertEqual(panel.symbols, self.symbols)
+        self.assertIn('SPY_SHRT', panel)
+        ts = panel.select(['SPY', 'SPY_SHRT'], ['close'])
+        self.assertEqual(list(ts.columns), ['SPY_close', 'SPY_SHRT_close'])
+        np.testing.assert_array_equal(ts['SPY_SHRT_close'], ts['SPY_close'])
+
+        # As in the long-short portfolio example.
+        symbols = ['SPY', 'SPY_SHRT', 'TLT']
+        start = datetime.datetime(2010, 3, 1)
+        end = datetime.datetime(2011, 3, 1)
+        expected = pf.Portfolio().fetch_timeseries(symbols, start, end)
+        portfolio = pf.Portfolio()
+        ts = portfolio.fetch_timeseries(symbols, start, end, panel=panel)
+        self.assertEqual(portfolio.symbols, symbols)
+        self.assertEqual(portfolio.fetch_errors, {})
+        pd.testing.assert_frame_equal(ts, expected, check_index_type=False,
+                                      check_freq=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Tests for trading statistics."""
+
+import itertools
+import operator
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+import pinkfish.pfstatistics as pfstatistics
+
+
+def _backtest(n=800, seed=0, capital=10000):
+    """A single symbol backtest that buys and sells at random."""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=n)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    ts = pd.DataFrame({'high': close * 1.005, 'low': close * 0.995, 'close': close},
+                      index=index)
+
+    account = pf.Account(cash=capital)
+    tlog = pf.TradeLog('AAA', account=account)
+    dbal = pf.DailyBal(account=account)
+    signal = rng.random(n)
+    for i, row in enumerate(ts.itertuples()):
+        date = row.Index.to_pydatetime()
+        if i == n - 1 or (tlog.shares > 0 and signal[i] < 0.1):
+            tlog.sell(date, row.close)
+        elif tlog.shares == 0 and signal[i] > 0.9:
+            tlog.buy(date, row.close)
+        dbal.append(date, row.close, row.high, row.low)
+    tlog = tlog.get_log()
+    dbal = dbal.get_log(tlog)
+    return ts, tlog, dbal, capital, account
+
+
+def _windowed(x, period):
+    """The windows of `x`, padded at the front with the first value."""
+    x = np.concatenate((np.full(period, x[0]), x))
+    return np.lib.stride_tricks.sliding_window_view(x, period + 1)
+
+
+def _windowed_max_dd(x, period):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = _windowed(x, period)
+        running_max = np.maximum.accumulate(y, axis=1)
+        return ((y - running_max) / running_max * 100).min(axis=1)
+
+
+def _windowed_max_ru(x, period):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = _windowed(x, period)
+        running_min = np.minimum.accumulate(y, axis=1)
+        return ((y - running_min) / running_min * 100).max(axis=1)
+
+
+class TestStats(unittest.TestCase):
+
+    def test_selected_metrics(self):
+        ts, tlog, dbal, capital, account = _backtest()
+        stats = pf.stats(ts, tlog, dbal, capital, account=account)
+        self.assertEqual(len(stats), len(pfstatistics._METRICS))
+        self.assertEqual(list(stats.index), list(pfstatistics._METRICS))
+
+        metrics = ['sharpe_ratio', 'annual_return_rate', 'max_closed_out_drawdown',
+                   'avg_monthly_closed_out_runup', 'best_year']
+        selected = pf.stats(ts, tlog, dbal, capital, account=account, metrics=metrics)
+        pd.testing.assert_series_equal(selected, stats[metrics])
+
+    def test_shared_intermediates(self):
+        ts, tlog, dbal, capital, account = _backtest(n=300)
+        calls = []
+        pct_change = pfstatistics._pct_change
+
+        def _counting_pct_change(close, period):
+            calls.append(period)
+            return pct_change(close, period)
+
+        pfstatistics._pct_change = _counting_pct_change
+        try:
+            pf.stats(ts, tlog, dbal, capital,
+                     metrics=['best_day', 'worst_day', 'daily_std', 'sharpe_ratio'])
+        finally:
+            pfstatistics._pct_change = pct_change
+        self.assertEqual(calls, [1])
+
+    def test_unknown_metric(self):
+        ts, tlog, dbal, capital, account = _backtest(n=300)
+        with self.assertRaises(ValueError):
+            pf.stats(ts, tlog, dbal, capital, metrics=['sharpe'])
+
+
+class TestTradeMetrics(unittest.TestCase):
+
+    def test_trade_bars(self):
+        ts, tlog, dbal, capital, account = _backtest()
+        # An entry on a weekend and a trade within a single bar.
+        tlog.loc[0, 'entry_date'] -= pd.Timedelta(days=3)
+        tlog.loc[1, 'exit_date'] = tlog.loc[1, 'entry_date']
+        for op in [operator.gt, operator.lt]:
+            expected = [len(ts[row.entry_date:row.exit_date])
+                        for row in tlog.itertuples() if op(row.pl_cash, 0)]
+            self.assertEqual(list(pfstatistics._get_trade_bars(ts, tlog, op)), expected)
+
+    def test_subsequence(self):
+        self.assertEqual(pfstatistics._subsequence('001000111100', '0'), 3)
+        self.assertEqual(pfstatistics._subsequence('001000111100', '1'), 4)
+        self.assertEqual(pfstatistics._subsequence([], True), 0)
+        rng = np.random.default_rng(3)
+        wins = pd.Series(rng.random(1000) > 0.4)
+        for c in [True, False]:
+            longest = max(len(list(run)) for bit, run in itertools.groupby(wins) if bit == c)
+            self.assertEqual(pfstatistics._subsequence(wins, c), longest)
+
+
+class TestStatsMany(unittest.TestCase):
+
+    def test_matches_stats(self):
+        backtests = [_backtest(seed=seed) for seed in range(3)]
+        close = pd.DataFrame({f's{i}': dbal['close']
+                              for i, (_, _, dbal, _, _) in enumerate(backtests)})
+        tlogs = {f's{i}': tlog for i, (_, tlog, _, _, _) in enumerate(backtests)}
+        df = pf.stats_many(close, 10000, tlogs)
+        self.assertEqual(list(df.index), list(pf.stats_many_metrics))
+        self.assertEqual(list(df.columns), ['s0', 's1', 's2'])
+
+        for column, (ts, tlog, dbal, capital, _) in zip(df.columns, backtests):
+            stats = pf.stats(ts, tlog, dbal, capital, metrics=list(df.index))
+            np.testing.assert_allclose(df[column].to_numpy(),
+                                       stats.to_numpy(dtype=float), rtol=1e-12)
+            for metric in ['max_yearly_closed_out_drawdown', 'max_weekly_closed_out_runup']:
+                self.assertEqual(df.loc[metric, column], stats[metric])
+
+    def test_array(self):
+        rng = np.random.default_rng(1)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 4)), axis=0))
+        df = pf.stats_many(close, 100)
+        self.assertEqual(list(df.columns), [0, 1, 2, 3])
+        self.assertNotIn('annual_return_rate', df.index)
+        self.assertNotIn('total_num_trades', df.index)
+        self.assertIn('sortino_ratio', df.index)
+        with self.assertRaises(ValueError):
+            pf.stats_many(close, 100, metrics=['annual_return_rate'])
+
+
+class TestOnlineStats(unittest.TestCase):
+
+    def assertStatsEqual(self, online, stats):
+        self.assertEqual(list(online.index), list(stats.index))
+        for metric in stats.index:
+            if isinstance(stats[metric], str):
+                self.assertEqual(online[metric], stats[metric], metric)
+            else:
+                np.testing.assert_allclose(float(online[metric]), float(stats[metric]),
+                                           rtol=1e-9, err_msg=metric)
+
+    def test_matches_stats(self):
+        ts, tlog, dbal, capital, account = _backtest()
+        online = pf.OnlineStats(capital, account)
+        for i, (date, row) in enumerate(dbal.iterrows()):
+            online.update(date, row.close, row.high, row.low, row.shares, row.leverage,
+                          trades=tlog[tlog['exit_date'] == date])
+            if i in (300, len(dbal) - 1):
+                stats = pf.stats(ts[:i+1], tlog[tlog['exit_date'] <= date],
+                                 dbal[:i+1], capital, account=account)
+                self.assertStatsEqual(online.stats(), stats)
+
+        metrics = ['sharpe_ratio', 'max_closed_out_drawdown', 'best_year']
+        self.assertEqual(list(online.stats(metrics).index), metrics)
+        with self.assertRaises(ValueError):
+            online.stats(['sharpe'])
+
+    def test_update(self):
+        online = pf.OnlineStats(10000)
+        with self.assertRaises(ValueError):
+            online.stats()
+        online.update(pd.Timestamp('2020-01-02'), 10000)
+        self.assertEqual(online.stats()['annual_return_rate'], 0)
+        with self.assertRaises(ValueError):
+            online.update(pd.Timestamp('2020-01-02'), 10100)
+
+
+class TestRollingMaxDrawdown(unittest.TestCase):
+
+    def test_rolling_max_drawdown(self):
+        rng = np.random.default_rng(2)
+        # Small and large moves, so that some windows are recomputed,
+        # and a curve that goes negative.
+        x = 100 * np.exp(np.cumsum(rng.normal(0, [0.01, 0.2, 0.05], (500, 3)), axis=0))
+        x[:, 2] -= 100
+        for period in [1, 5, 20, 252]:
+            dd = pfstatistics._rolling_max_drawdown(x, period)
+            ru = pfstatistics._rolling_max_drawdown(x, period, runup=True)
+            for i in range(x.shape[1]):
+                np.testing.assert_array_equal(dd[:, i], _windowed_max_dd(x[:, i], period))
+                np.testing.assert_array_equal(ru[:, i], _windowed_max_ru(x[:, i], period))
+
+    def test_rolling_max_dd_series(self):
+        ts, tlog, dbal, capital, account = _backtest(n=600)
+        close = dbal['close']
+        dd = pfstatistics._rolling_max_dd(close, 20)
+        ru = pfstatistics._rolling_max_ru(close, 20)
+        self.assertTrue(dd.index.equals(close.index))
+        self.assertEqual(dd.name, 'close')
+        np.testing.assert_array_equal(dd, _windowed_max_dd(close.to_numpy(), 20))
+        np.testing.assert_array_equal(ru, _windowed_max_ru(close.to_numpy(), 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,448 @@
+"""Tests for portfolio backtesting."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+def _portfolio_timeseries(symbols, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=n)
+    data = {}
+    for symbol in symbols:
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        data[symbol + '_open'] = close * (1 + rng.normal(0, 0.002, n))
+        data[symbol + '_close'] = close
+    ts = pd.DataFrame(data, index=index)
+    ts['first_dotm'] = ts.index.month != np.roll(ts.index.month, 1)
+    return ts
+
+
+def _weights(symbols, i):
+    """Rotating weights so that every rebalance buys and sells."""
+    raw = np.roll(np.arange(1, len(symbols) + 1, dtype=float), i)
+    raw /= raw.sum()
+    return dict(zip(symbols, raw))
+
+
+class _UncachedPortfolio(pf.Portfolio):
+    """Revalues every symbol on every call, like the original Portfolio."""
+
+    def _valuation(self, row, field):
+        self._valuation_cache = None
+        return super()._valuation(row, field)
+
+
+class _CountingPortfolio(pf.Portfolio):
+    """Counts the price lookups."""
+
+    lookups = 0
+
+    def get_price(self, row, symbol, field='close'):
+        self.lookups += 1
+        return super().get_price(row, symbol, field)
+
+
+def _run_portfolio(ts, symbols, rows, capital=10000, margin=pf.Margin.CASH,
+                   portfolio=None, batch=False, field='open', directions=None,
+                   weights=_weights):
+    if portfolio is None:
+        portfolio = pf.Portfolio(account=pf.Account())
+    portfolio.symbols = list(symbols)
+    portfolio.init_trade_logs(ts)
+    portfolio.account.cash = capital
+    portfolio.account.margin = margin
+    for i, row in enumerate(rows):
+        end_flag = pf.is_last_row(ts, i)
+        if row.first_dotm or end_flag or i == 0:
+            w = weights(symbols, i) if not end_flag else pf.set_dict_values(symbols, 0)
+            portfolio.adjust_percents(row, w, field=field, directions=directions,
+                                      batch=batch)
+        portfolio.record_daily_balance(row)
+    return portfolio.get_logs()
+
+
+class TestBars(unittest.TestCase):
+
+    def test_bar_values(self):
+        ts = _portfolio_timeseries(['AAA', 'BBB'])
+        bars = pf.Bars(ts)
+        self.assertEqual(len(bars), len(ts))
+        for bar, row in zip(bars, ts.itertuples()):
+            self.assertEqual(bar.Index, row.Index)
+            self.assertEqual(bar.AAA_close, row.AAA_close)
+            self.assertIs(type(bar.AAA_close), float)
+            self.assertIs(bar.first_dotm, row.first_dotm)
+        self.assertEqual(bars[-1]['BBB_open'], ts['BBB_open'].iloc[-1])
+        with self.assertRaises(AttributeError):
+            bars[0].missing_column
+
+    def test_matches_itertuples(self):
+        symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+        ts = _portfolio_timeseries(symbols)
+        expected = _run_portfolio(ts, symbols, ts.itertuples(), margin=2)
+        portfolio = pf.Portfolio()
+        result = _run_portfolio(ts, symbols, portfolio.bars(ts), margin=2)
+        self.assertGreater(len(result[1]), 10)
+        for df, expected_df in zip(result, expected):
+            pd.testing.assert_frame_equal(df, expected_df)
+
+    def test_wide_portfolio(self):
+        # More than 254 columns.
+        symbols = [f'S{i:03}' for i in range(150)]
+        ts = _portfolio_timeseries(symbols, n=60)
+        portfolio = pf.Portfolio()
+        portfolio.symbols = symbols
+        portfolio.init_trade_logs(ts)
+        row = portfolio.bars(ts)[10]
+        self.assertEqual(portfolio.get_price(row, 'S149'), ts['S149_close'].iloc[10])
+        prices = portfolio.get_prices(row, fields=['open'])
+        self.assertEqual(prices['S000']['open'], ts['S000_open'].iloc[10])
+
+
+class TestValuation(unittest.TestCase):
+
+    symbols = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+
+    def test_matches_full_revaluation(self):
+        ts = _portfolio_timeseries(self.symbols)
+        for margin in [pf.Margin.CASH, 2]:
+            expected = _run_portfolio(ts, self.symbols, ts.itertuples(), margin=margin,
+                                      portfolio=_UncachedPortfolio(account=pf.Account()))
+            result = _run_portfolio(ts, self.symbols, ts.itertuples(), margin=margin)
+            self.assertGreater(len(result[1]), 10)
+            for df, expected_df in zip(result, expected):
+                pd.testing.assert_frame_equal(df, expected_df)
+
+    def test_matches_full_revaluation_close(self):
+        # Trading on the close, the daily balance is recorded from the
+        # share values updated by the trades of the bar.
+        symbols = [f'S{i:02}' for i in range(12)]
+        ts = _portfolio_timeseries(symbols, n=150)
+        for margin in [pf.Margin.CASH, 2]:
+            expected = _run_portfolio(ts, symbols, ts.itertuples(), margin=margin,
+                                      portfolio=_UncachedPortfolio(account=pf.Account()),
+                                      field='close')
+            result = _run_portfolio(ts, symbols, ts.itertuples(), margin=margin,
+                                    field='close')
+            self.assertGreater(len(result[1]), 10)
+            for df, expected_df in zip(result, expected):
+                pd.testing.assert_frame_equal(df, expected_df, check_exact=True)
+
+    def test_price_lookups_per_bar(self):
+        ts = _portfolio_timeseries(self.symbols, n=60)
+        portfolio = _CountingPortfolio(account=pf.Account())
+        portfolio.symbols = self.symbols
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        row = next(ts.itertuples())
+        portfolio.adjust_percents(row, _weights(self.symbols, 0), field='open')
+        self.assertEqual(portfolio.account.seq_num, len(self.symbols))
+        # One lookup per symbol to value the portfolio, plus one per trade.
+        self.assertEqual(portfolio.lookups, 2 * len(self.symbols))
+
+        portfolio.lookups = 0
+        portfolio.record_daily_balance(row)
+        self.assertEqual(portfolio.lookups, len(self.symbols))
+
+    def test_total_after_trades(self):
+        symbols = [f'S{i:03}' for i in range(50)]
+        ts = _portfolio_timeseries(symbols, n=60)
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = symbols
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 100000
+        row = next(ts.itertuples())
+        portfolio.adjust_percents(row, _weights(symbols, 0), field='open')
+        portfolio.adjust_percents(row, _weights(symbols, 7), field='open')
+        v = portfolio._valuation(row, 'open')
+        expected = sum(tlog.share_value(v.prices[symbol])
+                       for symbol, tlog in portfolio.account.trade_logs.items())
+        self.assertEqual(v.total, expected)
+
+    def test_trade_outside_portfolio_revalues(self):
+        ts = _portfolio_timeseries(self.symbols, n=60)
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = self.symbols
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        row = next(ts.itertuples())
+        self.assertEqual(portfolio._share_value(row, 'close'), 0)
+        portfolio.account.trade_logs['AAA'].buy(row.Index, row.AAA_close, 10)
+        self.assertAlmostEqual(portfolio._share_value(row, 'close'), 10 * row.AAA_close)
+
+
+class TestBatchRebalance(unittest.TestCase):
+
+    def test_matches_sequential(self):
+        symbols = [f'S{i:02}' for i in range(12)]
+        for seed, margin in [(0, pf.Margin.CASH), (1, 1.5), (2, 2)]:
+            ts = _portfolio_timeseries(symbols, seed=seed)
+            expected = _run_portfolio(ts, symbols, ts.itertuples(), margin=margin)
+            result = _run_portfolio(ts, symbols, ts.itertuples(), margin=margin,
+                                    batch=True)
+            self.assertGreater(len(result[1]), 50)
+            for df, expected_df in zip(result, expected):
+                pd.testing.assert_frame_equal(df, expected_df)
+
+    def test_matches_sequential_with_shorts(self):
+        # Rebalancing to equal weights covers part of a losing short
+        # even though its weight increases, which changes the total
+        # funds of the orders after it.
+        symbols = [f'S{i:02}' for i in range(30)]
+        directions = {symbol: pf.Direction.SHORT if i % 3 == 0 else pf.Direction.LONG
+                      for i, symbol in enumerate(symbols)}
+        ts = _portfolio_timeseries(symbols, n=300, seed=2)
+
+        def equal_weights(symbols, i):
+            return pf.set_dict_values(symbols, 1 / len(symbols))
+
+        for margin in [pf.Margin.CASH, 2]:
+            kwargs = dict(capital=1000000, margin=margin, directions=directions,
+                          weights=equal_weights)
+            expected = _run_portfolio(ts, symbols, ts.itertuples(), **kwargs)
+            result = _run_portfolio(ts, symbols, ts.itertuples(), batch=True, **kwargs)
+            for df, expected_df in zip(result, expected):
+                pd.testing.assert_frame_equal(df, expected_df, check_exact=True)
+
+    def test_unchanged_symbols_are_not_traded(self):
+        symbols = ['AAA', 'BBB', 'CCC']
+        ts = _portfolio_timeseries(symbols, n=60)
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = symbols
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        rows = list(ts.itertuples())
+        weights = {'AAA': 0.5, 'BBB': 0.5, 'CCC': 0}
+        w = portfolio.adjust_percents(rows[0], weights, batch=True)
+        self.assertEqual(w, {'CCC': 0, 'AAA': 0.5, 'BBB': 0.5})
+        seq_num = portfolio.account.seq_num
+        portfolio.adjust_percents(rows[0], weights, batch=True)
+        self.assertEqual(portfolio.account.seq_num, seq_num)
+
+
+class TestRunEvents(unittest.TestCase):
+
+    symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+
+    def _run_events(self, ts, margin, directions=None):
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = list(self.symbols)
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        portfolio.account.margin = margin
+
+        def _rebalance(i, row):
+            end_flag = pf.is_last_row(ts, i)
+            w = (_weights(self.symbols, i) if not end_flag
+                 else pf.set_dict_values(self.symbols, 0))
+            portfolio.adjust_percents(row, w, field='open', directions=directions)
+
+        events = ts['first_dotm'].to_numpy(copy=True)
+        events[0] = events[-1] = True
+        portfolio.run_events(ts, events, _rebalance)
+        return portfolio.get_logs()
+
+    def test_matches_bar_loop(self):
+        ts = _portfolio_timeseries(self.symbols, n=600)
+        for margin in [pf.Margin.CASH, 2]:
+            expected = _run_portfolio(ts, self.symbols, ts.itertuples(), margin=margin)
+            result = self._run_events(ts, margin)
+            for df, expected_df in zip(result, expected):
+                pd.testing.assert_frame_equal(df, expected_df)
+
+    def test_short_positions(self):
+        ts = _portfolio_timeseries(self.symbols, n=300, seed=5)
+        directions = {'AAA': pf.Direction.SHORT, 'BBB': pf.Direction.LONG,
+                      'CCC': pf.Direction.SHORT, 'DDD': pf.Direction.LONG}
+        rlog, tlog, dbal = self._run_events(ts, 2, directions)
+
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = list(self.symbols)
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        portfolio.account.margin = 2
+        for i, row in enumerate(ts.itertuples()):
+            end_flag = pf.is_last_row(ts, i)
+            if row.first_dotm or end_flag or i == 0:
+                w = (_weights(self.symbols, i) if not end_flag
+                     else pf.set_dict_values(self.symbols, 0))
+                portfolio.adjust_percents(row, w, field='open', directions=directions)
+            portfolio.record_daily_balance(row)
+        pd.testing.assert_frame_equal(dbal, portfolio.get_logs()[2])
+
+    def test_benchmark(self):
+        symbols = ['AAA', 'BBB', 'CCC']
+        ts = _portfolio_timeseries(symbols, n=800)
+        ts['first_doty'] = ts.index.year != np.roll(ts.index.year, 1)
+
+        benchmark = pf.Benchmark(symbols, 10000, ts.index[0], ts.index[-1])
+        benchmark.portfolio = pf.Portfolio(account=pf.Account())
+        benchmark.portfolio.symbols = symbols
+        benchmark.ts = ts
+        benchmark.portfolio.init_trade_logs(ts)
+        benchmark._algo()
+        benchmark._get_logs()
+
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = symbols
+        portfolio.init_trade_logs(ts)
+        portfolio.account.cash = 10000
+        weights = {symbol: 1 / 3 for symbol in symbols}
+        for i, row in enumerate(ts.itertuples()):
+            end_flag = pf.is_last_row(ts, i)
+            if row.first_doty or end_flag or i == 0:
+                w = pf.set_dict_values(weights, 0) if end_flag else weights
+                portfolio.adjust_percents(row, w)
+            portfolio.record_daily_balance(row)
+        rlog, tlog, dbal = portfolio.get_logs()
+        pd.testing.assert_frame_equal(benchmark.tlog, tlog)
+        pd.testing.assert_frame_equal(benchmark.dbal, dbal)
+
+    def test_benchmark_empty_timeseries(self):
+        symbols = ['AAA', 'BBB', 'CCC']
+        ts = _portfolio_timeseries(symbols, n=10)[:0]
+        ts['first_doty'] = np.zeros(0, dtype=bool)
+
+        benchmark = pf.Benchmark(symbols, 10000, None, None)
+        benchmark.portfolio = pf.Portfolio(account=pf.Account())
+        benchmark.portfolio.symbols = symbols
+        benchmark.ts = ts
+        benchmark.portfolio.init_trade_logs(ts)
+        benchmark._algo()
+        benchmark._get_logs()
+        self.assertTrue(benchmark.tlog.empty)
+        self.assertTrue(benchmark.dbal.empty)
+
+    def test_events_length_mismatch(self):
+        ts = _portfolio_timeseries(self.symbols, n=50)
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = list(self.symbols)
+        portfolio.init_trade_logs(ts)
+        with self.assertRaises(ValueError):
+            portfolio.run_events(ts, np.ones(10, dtype=bool), lambda i, row: None)
+
+
+class TestGetLogs(unittest.TestCase):
+
+    def test_matches_symbol_logs(self):
+        symbols = [f'S{i:02}' for i in range(12)]
+        ts = _portfolio_timeseries(symbols, n=200, seed=4)
+        portfolio = pf.Portfolio(account=pf.Account())
+        rlog, tlog, dbal = _run_portfolio(ts, symbols, ts.itertuples(), margin=2,
+                                          portfolio=portfolio)
+
+        # Concatenate the log of each symbol and sort.
+        tlogs = portfolio.account.trade_logs.values()
+        expected_rlog = pd.concat([t.get_log_raw() for t in tlogs]).sort_values(['seq_num'])
+        expected_tlog = pd.concat([t.get_log() for t in tlogs]) \
+                          .sort_values(['entry_date', 'exit_date'])
+        expected_tlog['cumul_total'] = expected_tlog['pl_cash'].cumsum()
+        pd.testing.assert_frame_equal(rlog, expected_rlog)
+        pd.testing.assert_frame_equal(tlog, expected_tlog)
+
+    def test_trade_log_keeps_log_after_reset(self):
+        account = pf.Account()
+        account.cash = 10000
+        tlog = pf.TradeLog('AAA', account=account)
+        tlog.buy(pd.Timestamp('2020-01-02'), 10.0, 5)
+        tlog.sell(pd.Timestamp('2020-01-03'), 11.0)
+        other = pf.TradeLog('BBB', account=account)
+        other.buy(pd.Timestamp('2020-01-02'), 20.0, 5)
+        self.assertEqual(len(tlog.get_log()), 1)
+        self.assertEqual(len(tlog.get_log_raw()), 2)
+        self.assertEqual(other.get_log_raw()['symbol'].tolist(), ['BBB'])
+
+
+class TestLedger(unittest.TestCase):
+
+    symbols = ['AAA', 'BBB', 'CCC', 'DDD']
+    directions = {'AAA': pf.Direction.SHORT, 'BBB': pf.Direction.LONG,
+                  'CCC': pf.Direction.SHORT, 'DDD': pf.Direction.LONG}
+
+    def _run(self, ts, ledger, directions=None, events=False):
+        portfolio = pf.Portfolio(account=pf.Account())
+        portfolio.symbols = list(self.symbols)
+        portfolio.init_trade_logs(ts, ledger=ledger)
+        portfolio.account.cash = 10000
+        portfolio.account.margin = 2
+
+        def _rebalance(i, row):
+            end_flag = pf.is_last_row(ts, i)
+            w = (_weights(self.symbols, i) if not end_flag
+                 else pf.set_dict_values(self.symbols, 0))
+            portfolio.adjust_percents(row, w, field='open', directions=directions)
+
+        if events:
+            events = ts['first_dotm'].to_numpy(copy=True)
+            events[0] = events[-1] = True
+            portfolio.run_events(ts, events, _rebalance)
+        else:
+            for i, row in enumerate(ts.itertuples()):
+                if row.first_dotm or i == 0 or pf.is_last_row(ts, i):
+                    _rebalance(i, row)
+                portfolio.record_daily_balance(row)
+        return portfolio
+
+    def test_matches_daily_balance(self):
+        ts = _portfolio_timeseries(self.symbols, n=300, seed=3)
+        for directions in [None, self.directions]:
+            expected = self._run(ts, False, directions).get_logs()[2]
+            for events in [False, True]:
+                dbal = self._run(ts, True, directions, events).get_logs()[2]
+                pd.testing.assert_frame_equal(dbal, expected)
+
+    def test_high_low(self):
+        ts = _portfolio_timeseries(self.symbols, n=300, seed=3)
+        for symbol in self.symbols:
+            ts[symbol + '_high'] = ts[symbol + '_close'] * 1.01
+            ts[symbol + '_low'] = ts[symbol + '_close'] * 0.99
+        expected = self._run(ts, False, self.directions).get_logs()[2]
+        dbal = self._run(ts, True, self.directions).get_logs()[2]
+        pd.testing.assert_series_equal(dbal['close'], expected['close'])
+        held = dbal['shares'] > 0
+        self.assertTrue((dbal['high'][held] > dbal['close'][held]).all())
+        self.assertTrue((dbal['low'][held] < dbal['close'][held]).all())
+
+    def test_fractional_shares(self):
+        ts = _portfolio_timeseries(self.symbols, n=50, seed=3)
+        dbals = []
+        for ledger in [False, True]:
+            portfolio = pf.Portfolio(account=pf.Account(cash=10000))
+            portfolio.symbols = list(self.symbols)
+            portfolio.init_trade_logs(ts, ledger=ledger)
+            tlog = portfolio.account.trade_logs['AAA']
+            for i, row in enumerate(ts.itertuples()):
+                if i == 10:
+                    tlog.buy(row.Index, row.AAA_close, 2.5)
+                elif i == 30:
+                    tlog.sell(row.Index, row.AAA_close)
+                portfolio.record_daily_balance(row)
+            dbals.append(portfolio.get_logs()[2])
+        pd.testing.assert_frame_equal(dbals[1], dbals[0])
+        self.assertEqual(dbals[1]['shares'].max(), 2.5)
+
+    def test_exposure(self):
+        ts = _portfolio_timeseries(self.symbols, n=300, seed=3)
+        portfolio = self._run(ts, True, self.directions)
+        dbal = portfolio.get_logs()[2]
+        exposure = portfolio.exposure()
+        self.assertEqual(list(exposure.columns), self.symbols)
+        self.assertTrue((exposure[['AAA', 'CCC']] <= 0).all().all())
+        self.assertTrue((exposure[['BBB', 'DDD']] >= 0).all().all())
+
+        portfolio = self._run(ts, True)
+        dbal = portfolio.get_logs()[2]
+        exposure = portfolio.exposure()
+        np.testing.assert_allclose(exposure.sum(axis=1),
+                                   (dbal['close'] - dbal['cash']) / dbal['close'])
+
+        with self.assertRaises(ValueError):
+            self._run(ts, False).exposure()
+
+
+if __name__ == '__main__':
+    unittest.main()
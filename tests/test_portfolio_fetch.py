@@ -0,0 +1,115 @@
+"""Tests for fetching the timeseries of a portfolio."""
+
+import datetime
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+import pinkfish.fetch as fetch
+
+
+def _download(symbol):
+    seed = sum(map(ord, symbol))
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=500, name='Date')[seed % 5:]
+    n = len(index)
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Adj Close': close * 0.9,
+                         'Volume': rng.integers(0, 10**6, n)}, index=index)
+
+
+class TestPortfolioFetch(unittest.TestCase):
+
+    start = datetime.datetime(2011, 1, 1)
+    end = datetime.datetime(2011, 12, 31)
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self._original_cache_dir = fetch._get_cache_dir
+        self._original_download = fetch.yf.download
+        self.requests = []
+
+        def mock_cache_dir(dir_name):
+            (root / dir_name).mkdir(exist_ok=True)
+            return root / dir_name
+
+        def mock_download(symbols, **kwargs):
+            # Batched multi-ticker download, aligned to the union of dates.
+            self.requests.append(list(symbols))
+            frames = {s: _download(s) for s in symbols if s != 'BAD'}
+            df = pd.concat(frames, axis=1, sort=True)
+            df.columns.names = ['Ticker', 'Price']
+            return df
+
+        fetch._get_cache_dir = mock_cache_dir
+        fetch.yf.download = mock_download
+
+    def tearDown(self):
+        fetch._get_cache_dir = self._original_cache_dir
+        fetch.yf.download = self._original_download
+        self._tmp.cleanup()
+
+    def test_batched_download_and_order(self):
+        symbols = ['TLT', 'SPY', 'GLD', 'SPY_SHRT', 'SPY']
+        ts = pf.Portfolio().fetch_timeseries(symbols, self.start, self.end)
+        self.assertEqual(self.requests, [['TLT', 'SPY', 'GLD']])
+        self.assertEqual([c for c in ts.columns if c.endswith('_close')],
+                         ['TLT_close', 'SPY_close', 'GLD_close', 'SPY_SHRT_close'])
+
+        # Cached now, so no more downloads.
+        pf.Portfolio().fetch_timeseries(symbols, self.start, self.end)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_concurrent_matches_serial(self):
+        symbols = ['TLT', 'SPY', 'GLD', 'QQQ']
+        expected = pf.Portfolio().fetch_timeseries(symbols, self.start, self.end,
+                                                   max_workers=1)
+        ts = pf.Portfolio().fetch_timeseries(symbols, self.start, self.end,
+                                             max_workers=4)
+        pd.testing.assert_frame_equal(ts, expected)
+        close = _download('QQQ')['Close'][ts.index]
+        np.testing.assert_allclose(ts['QQQ_close'], close * 0.9)
+
+    def test_fetch_errors(self):
+        portfolio = pf.Portfolio()
+        ts = portfolio.fetch_timeseries(['SPY', 'BAD'], self.start, self.end)
+        self.assertEqual(portfolio.symbols, ['SPY'])
+        self.assertIsInstance(portfolio.fetch_errors['BAD'], pf.FetchError)
+        self.assertNotIn('BAD_close', ts.columns)
+
+        with self.assertRaises(pf.FetchError):
+            pf.Portfolio().fetch_timeseries(['BAD'], self.start, self.end)
+
+    def test_aligned_to_common_dates(self):
+        symbols = ['TLT', 'SPY', 'GLD']
+        ts = pf.Portfolio().fetch_timeseries(symbols, self.start, self.end,
+                                             fields=['close', 'volume'])
+        index = None
+        for symbol in symbols:
+            dates = _download(symbol).index
+            index = dates if index is None else index.intersection(dates)
+        # select_tradeperiod() keeps a year before start for indicators.
+        index = index[(index >= self.start - datetime.timedelta(365)) & (index <= self.end)]
+        self.assertTrue((ts.index == index).all())
+        self.assertEqual(ts.columns.tolist(),
+                         [s + '_' + f for s in symbols for f in ['close', 'volume']])
+
+    def test_add_technical_indicator(self):
+        portfolio = pf.Portfolio()
+        ts = portfolio.fetch_timeseries(['TLT', 'SPY'], self.start, self.end)
+        ts = portfolio.add_technical_indicator(
+            ts, ta_func=lambda ts, period, column: ts[column].rolling(period).max(),
+            ta_param=5, output_column_suffix='high5')
+        self.assertTrue(ts.columns.is_unique)
+        pd.testing.assert_series_equal(ts['SPY_high5'], ts['SPY_close'].rolling(5).max(),
+                                       check_names=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Tests for sharing a timeseries between processes."""
+
+from concurrent.futures import ProcessPoolExecutor
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+def _timeseries(n=500):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2000-01-03', periods=n, name='date')
+    ts = pd.DataFrame({'close': 100 + rng.normal(0, 1, n).cumsum(),
+                       'volume': rng.integers(0, 1000, n)}, index=index)
+    ts['sma'] = ts['close'].rolling(10).mean()
+    ts['first_dotm'] = ts.index.day < 4
+    return ts
+
+
+def _worker_sum(handle):
+    ts = pf.attach_timeseries(handle)
+    return float(ts['close'].sum()), int(ts['first_dotm'].sum()), str(ts.index[-1].date())
+
+
+class TestSharedTimeseries(unittest.TestCase):
+
+    def test_attach_is_zero_copy_view(self):
+        ts = _timeseries()
+        with pf.publish_timeseries(ts) as shared:
+            view = pf.attach_timeseries(shared.handle)
+            pd.testing.assert_frame_equal(view, ts, check_freq=False)
+            index, arrays = pf.attach_arrays(shared.handle)
+            self.assertTrue(np.shares_memory(view['close'].to_numpy(), arrays['close']))
+            self.assertFalse(arrays['close'].flags.writeable)
+            del view, index, arrays
+
+    def test_workers_attach(self):
+        ts = _timeseries()
+        expected = (float(ts['close'].sum()), int(ts['first_dotm'].sum()),
+                    str(ts.index[-1].date()))
+        with pf.publish_timeseries(ts) as shared:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(_worker_sum, [shared.handle] * 4))
+        self.assertEqual(results, [expected] * 4)
+
+    def test_object_columns_rejected(self):
+        ts = _timeseries()
+        ts['name'] = 'SPY'
+        with self.assertRaises(TypeError):
+            pf.publish_timeseries(ts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Tests for streaming backtests."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+def _timeseries(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=n)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({'high': close * 1.005, 'low': close * 0.995, 'close': close},
+                        index=index)
+
+
+def _bars(ts):
+    for row in ts.itertuples():
+        yield {'date': row.Index, 'high': row.high, 'low': row.low, 'close': row.close}
+
+
+def _algo(runner, row):
+    """Hold while the close is above the 20 day moving average."""
+    date = row.Index.to_pydatetime()
+    if np.isnan(row.sma):
+        return
+    if runner.tlog.shares == 0 and row.close > row.sma:
+        runner.tlog.buy(date, row.close)
+    elif runner.tlog.shares > 0 and row.close < row.sma:
+        runner.tlog.sell(date, row.close)
+
+
+def _indicators():
+    return {'sma': pf.StreamingSMA(20), 'ema': pf.StreamingEMA(10),
+            'high20': pf.StreamingMAX(20, price='high'), 'low20': pf.StreamingMIN(20, 'low')}
+
+
+class TestStreamingIndicators(unittest.TestCase):
+
+    def test_matches_indicators(self):
+        ts = _timeseries()
+        expected = {'sma': pf.SMA(ts, 20), 'ema': pf.EMA(ts, 10),
+                    'high20': ts['high'].rolling(20).max(),
+                    'low20': ts['low'].rolling(20).min()}
+        for name, indicator in _indicators().items():
+            values = [indicator.update(x) for x in ts[indicator.price]]
+            np.testing.assert_allclose(values, expected[name], rtol=1e-12, err_msg=name)
+
+
+class TestStreamingBacktest(unittest.TestCase):
+
+    def _backtest(self, ts, capital):
+        """The same strategy, iterating the whole timeseries."""
+        ts = ts.assign(sma=pf.SMA(ts, 20))
+        account = pf.Account(cash=capital)
+        tlog = pf.TradeLog('AAA', account=account)
+        dbal = pf.DailyBal(account=account)
+        runner = type('Runner', (), {'tlog': tlog})
+        for row in ts.itertuples():
+            _algo(runner, row)
+            dbal.append(row.Index.to_pydatetime(), row.close, row.high, row.low)
+        tlog = tlog.get_log()
+        dbal = dbal.get_log(tlog)
+        return tlog, dbal, pf.stats(ts, tlog, dbal, capital, account=account)
+
+    def test_matches_backtest(self):
+        ts = _timeseries()
+        expected_tlog, expected_dbal, expected_stats = self._backtest(ts, 10000)
+
+        runner = pf.StreamingBacktest('AAA', 10000, _algo, indicators=_indicators())
+        runner.run(_bars(ts))
+        tlog, dbal = runner.get_logs()
+        pd.testing.assert_frame_equal(tlog, expected_tlog)
+        pd.testing.assert_frame_equal(dbal, expected_dbal)
+
+        stats = runner.stats()
+        self.assertEqual(list(stats.index), list(expected_stats.index))
+        for metric in ['ending_balance', 'total_num_trades', 'max_closed_out_drawdown',
+                       'max_closed_out_drawdown_trough_date', 'avg_bars_winning_trades']:
+            self.assertEqual(stats[metric], expected_stats[metric], metric)
+        self.assertAlmostEqual(stats['sharpe_ratio'], expected_stats['sharpe_ratio'])
+
+    def test_save_and_load(self):
+        ts = _timeseries()
+        runner = pf.StreamingBacktest('AAA', 10000, _algo, indicators=_indicators())
+        runner.warm_up(_bars(ts[:100]))
+        self.assertEqual(len(runner.dbal._l), 0)
+        runner.run(_bars(ts[100:400]))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'runner.pkl')
+            runner.save(filename)
+            loaded = pf.load_streaming_backtest(filename)
+        runner.run(_bars(ts[400:]))
+        loaded.run(_bars(ts[400:]))
+
+        pd.testing.assert_frame_equal(loaded.get_logs()[0], runner.get_logs()[0])
+        pd.testing.assert_series_equal(loaded.stats(), runner.stats())
+        self.assertEqual(loaded.row.Index, ts.index[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
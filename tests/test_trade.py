@@ -0,0 +1,180 @@
+"""Tests for the trade log and daily balance log."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+class TestTradeLog(unittest.TestCase):
+
+    def test_exit_lots_first_in_first_out(self):
+        account = pf.Account()
+        account.cash = 10000
+        tlog = pf.TradeLog('SPY', False, account=account)
+        date = pd.Timestamp('2020-01-02')
+        for price, qty in [(10, 3), (11, 2), (12, 4)]:
+            tlog.buy(date, price, qty)
+        self.assertEqual(tlog.num_open_trades, 3)
+
+        self.assertEqual(tlog.sell(date, 15, 4), -4)
+        self.assertEqual(tlog.num_open_trades, 2)
+        # A negative number of shares exits that many open trades.
+        self.assertEqual(tlog.sell(date, 15, -1), -1)
+        self.assertEqual(tlog.sell(date, 15), -4)
+        self.assertEqual(tlog.num_open_trades, 0)
+        self.assertEqual(tlog.shares, 0)
+
+        log = tlog.get_log()
+        self.assertEqual(log['entry_price'].tolist(), [10, 11, 11, 12])
+        self.assertEqual(log['qty'].tolist(), [3, 1, 1, 4])
+        self.assertEqual(log['pl_cash'].sum(), 5*3 + 4*2 + 3*4)
+
+    def test_merge_trades(self):
+        # The first trades of the merge-trades tutorial: scale in on two
+        # days and out on two days.
+        account = pf.Account()
+        account.cash = 10000
+        tlog = pf.TradeLog('SPY', False, account=account)
+        tlog.buy(pd.Timestamp('2020-01-27'), 323.50, 7)
+        tlog.buy(pd.Timestamp('2020-01-31'), 321.73, 7)
+        tlog.sell(pd.Timestamp('2020-02-04'), 329.06, 8)
+        tlog.sell(pd.Timestamp('2020-02-05'), 332.86, 6)
+        self.assertEqual(len(tlog.get_log()), 3)
+
+        merged = tlog.get_log(merge_trades=True)
+        self.assertEqual(list(merged.columns),
+                         ['entry_price', 'exit_price', 'pl_points', 'pl_cash', 'qty',
+                          'cumul_total', 'direction', 'symbol', 'entry_date', 'exit_date'])
+        expected = [[322.62, 330.69, 24.02, 113.03, 14, 113.03],
+                    [322.62, 330.69, 24.02, 113.03, 14, 113.03],
+                    [321.73, 332.32, 18.46, 74.11, 7, 113.03]]
+        np.testing.assert_allclose(merged.iloc[:, :6].to_numpy(dtype=float), expected,
+                                   atol=0.006)
+        self.assertEqual(merged['exit_date'].tolist(),
+                         [pd.Timestamp('2020-02-04')] * 2 + [pd.Timestamp('2020-02-05')])
+
+    def test_logs(self):
+        account = pf.Account()
+        account.cash = 10000
+        tlog = pf.TradeLog('SPY', False, account=account)
+        tlog.buy(pd.Timestamp('2020-01-02').to_pydatetime(), 10.5, 3)
+        tlog.sell(pd.Timestamp('2020-01-03'), 11.25, 1)
+        tlog.sell('2020-01-06', 12.0)
+
+        rlog = tlog.get_log_raw()
+        expected = pd.DataFrame([
+            (pd.Timestamp('2020-01-02'), 0, 10.5, 3, 'entry', pf.Direction.LONG, 'SPY'),
+            (pd.Timestamp('2020-01-03'), 1, 11.25, 1, 'exit', pf.Direction.LONG, 'SPY'),
+            (pd.Timestamp('2020-01-06'), 2, 12.0, 2, 'exit', pf.Direction.LONG, 'SPY')],
+            columns=['date', 'seq_num', 'price', 'shares', 'entry_exit', 'direction',
+                     'symbol'])
+        expected['date'] = expected['date'].astype('datetime64[us]')
+        pd.testing.assert_frame_equal(rlog, expected)
+
+        log = tlog.get_log()
+        self.assertEqual(log['exit_date'].dtype, 'datetime64[us]')
+        self.assertEqual(log['qty'].tolist(), [1, 2])
+        self.assertEqual(log['cumul_total'].tolist(), [0.75, 3.75])
+        self.assertEqual(log['symbol'].tolist(), ['SPY', 'SPY'])
+
+        # Logging continues after the logs are returned.
+        tlog.buy(pd.Timestamp('2020-01-07'), 10.0, 1)
+        self.assertEqual(len(tlog.get_log_raw()), 4)
+
+    def test_merge_trades_empty(self):
+        tlog = pf.TradeLog('SPY', False, account=pf.Account())
+        self.assertTrue(tlog.get_log(merge_trades=True).empty)
+
+    def test_shared_account(self):
+        account = pf.Account(cash=10000)
+        spy = pf.TradeLog('SPY', False, account=account)
+        qqq = pf.TradeLog('QQQ', False, account=account)
+        dates = pd.bdate_range('2020-01-02', periods=4)
+        spy.buy(dates[0], 10.0, 2)
+        qqq.buy(dates[0], 20.0, 3)
+        spy.sell(dates[1], 11.0, 1)
+        qqq.sell(dates[2], 22.0)
+        spy.sell(dates[3], 12.0)
+        self.assertEqual(spy.get_log_raw()['seq_num'].tolist(), [0, 2, 4])
+        self.assertEqual(qqq.get_log_raw()['seq_num'].tolist(), [1, 3])
+        self.assertEqual(spy.get_log()['pl_cash'].tolist(), [1.0, 2.0])
+        self.assertEqual(qqq.get_log()['pl_cash'].tolist(), [6.0])
+        self.assertEqual(qqq.get_log()['symbol'].tolist(), ['QQQ'])
+
+    def test_float_shares(self):
+        tlog = pf.TradeLog('SPY', False, account=pf.Account(cash=10000))
+        tlog.buy(pd.Timestamp('2020-01-02'), 10.0, 5.0)
+        tlog.buy(pd.Timestamp('2020-01-03'), 10.0, 2.5)
+        tlog.sell(pd.Timestamp('2020-01-06'), 11.0)
+        self.assertEqual(tlog.get_log_raw()['shares'].tolist(), [5.0, 2.5, 7.5])
+        log = tlog.get_log()
+        self.assertEqual(log['qty'].dtype, 'float64')
+        self.assertEqual(log['qty'].tolist(), [5.0, 2.5])
+
+    def test_timezone_aware_dates(self):
+        tlog = pf.TradeLog('SPY', False, account=pf.Account(cash=10000))
+        entry = pd.Timestamp('2020-01-02 09:30', tz='America/New_York')
+        exit = pd.Timestamp('2020-01-03 15:59', tz='America/New_York')
+        tlog.buy(entry, 10.0, 5)
+        tlog.sell(exit.to_pydatetime(), 11.0)
+        self.assertEqual(tlog.get_log_raw()['date'].tolist(), [entry, exit])
+        log = tlog.get_log()
+        self.assertEqual(log['entry_date'].tolist(), [entry])
+        self.assertEqual(log['exit_date'].tolist(), [exit])
+
+    def test_failed_append(self):
+        tlog = pf.TradeLog('SPY', False, account=pf.Account(cash=10000))
+        tlog.buy(pd.Timestamp('2020-01-02', tz='UTC'), 10.0, 5)
+        # A naive date in a timezone aware log, and a bad price.
+        with self.assertRaises(ValueError):
+            tlog.buy(pd.Timestamp('2020-01-03'), 10.0, 1)
+        with self.assertRaises(TypeError):
+            tlog.sell(pd.Timestamp('2020-01-06', tz='UTC'), None)
+        self.assertEqual(len(tlog.get_log_raw()), 1)
+        self.assertEqual(tlog.shares, 5)
+        tlog.sell(pd.Timestamp('2020-01-07', tz='UTC'), 11.0)
+        self.assertEqual(len(tlog.get_log_raw()), 2)
+        self.assertEqual(tlog.get_log()['pl_cash'].tolist(), [5.0])
+
+
+class TestDailyBal(unittest.TestCase):
+
+    def _daily_balance(self, dates):
+        dbal = pf.DailyBal(account=pf.Account())
+        dbal._l = [(date.to_pydatetime(), 1.0, 1.0, 1.0, 0, 0.0, 1.0) for date in dates]
+        return dbal
+
+    def test_state(self):
+        dates = pd.bdate_range('2020-01-01', periods=10)
+        tlog = pd.DataFrame({'entry_date': dates[[1, 4, 6]],
+                             'exit_date': dates[[4, 5, 8]]})
+        dbal = self._daily_balance(dates).get_log(tlog)
+        # An entry on the date of an exit is OPEN.
+        self.assertEqual(''.join(dbal['state']), '-O--OXO-X-')
+        self.assertEqual(dbal.index.name, 'date')
+
+    def test_state_matches_row_scan(self):
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range('2000-01-03', periods=2000)
+        entry = np.sort(rng.choice(len(dates) - 5, 300))
+        tlog = pd.DataFrame({'entry_date': dates[entry],
+                             'exit_date': dates[entry + rng.integers(1, 5, len(entry))]})
+        dbal = self._daily_balance(dates).get_log(tlog)
+
+        expected = []
+        for date in dates:
+            date = date.to_datetime64()
+            if date in tlog.entry_date.values:
+                expected.append(pf.TradeState.OPEN)
+            elif date in tlog.exit_date.values:
+                expected.append(pf.TradeState.CLOSE)
+            else:
+                expected.append(pf.TradeState.HOLD)
+        self.assertEqual(dbal['state'].tolist(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
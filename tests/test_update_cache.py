@@ -0,0 +1,115 @@
+"""Tests for incremental symbol cache updates."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+import pinkfish.fetch as fetch
+
+
+def _history(symbol, n=300):
+    seed = sum(map(ord, symbol))
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2010-01-04', periods=n, name='Date')
+    close = 100 + rng.normal(0, 1, n).cumsum()
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1,
+                         'Close': close, 'Adj Close': close * 0.9,
+                         'Volume': rng.integers(0, 10**6, n)}, index=index)
+
+
+class TestIncrementalUpdate(unittest.TestCase):
+
+    symbols = ['SPY', 'TLT', 'GLD']
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+        self._original_cache_dir = fetch._get_cache_dir
+        self._original_download = fetch.yf.download
+        self.history = {symbol: _history(symbol) for symbol in self.symbols}
+        self.end = 250
+        self.requests = []
+
+        def mock_download(symbols, start, **kwargs):
+            if isinstance(symbols, str):
+                self.requests.append(([symbols], start))
+                return self.history[symbols][:self.end][start:]
+            self.requests.append((list(symbols), start))
+            frames = {s: self.history[s][:self.end][start:] for s in symbols}
+            df = pd.concat(frames, axis=1, sort=True)
+            df.columns.names = ['Ticker', 'Price']
+            return df
+
+        fetch._get_cache_dir = lambda dir_name: self.cache_dir
+        fetch.yf.download = mock_download
+
+    def tearDown(self):
+        fetch._get_cache_dir = self._original_cache_dir
+        fetch.yf.download = self._original_download
+        self._tmp.cleanup()
+
+    def _build_cache(self, cache_format):
+        for symbol in self.symbols:
+            pf.fetch_timeseries(symbol, cache_format=cache_format)
+        self.requests.clear()
+        self.end = 300
+
+    def _assert_cache_current(self, cache_format):
+        for symbol in self.symbols:
+            ts = fetch._read_cache(self.cache_dir / f'{symbol}.{cache_format}')
+            expected = self.history[symbol]
+            np.testing.assert_allclose(ts.to_numpy(dtype=float),
+                                       expected.to_numpy(dtype=float))
+            self.assertTrue((ts.index == expected.index).all())
+
+    def _check_append(self, cache_format):
+        self._build_cache(cache_format)
+        pf.update_cache_symbols(incremental=True, cache_format=cache_format)
+        self.assertEqual(len(self.requests), 1)
+        symbols, start = self.requests[0]
+        self.assertEqual(sorted(symbols), sorted(self.symbols))
+        self.assertEqual(start, self.history['SPY'].index[245])
+        self._assert_cache_current(cache_format)
+
+    def test_append_csv(self):
+        self._check_append('csv')
+
+    def test_append_npz(self):
+        self._check_append('npz')
+
+    def test_partial_last_bar_is_replaced(self):
+        for symbol in self.symbols:
+            self.history[symbol].iloc[249, :5] *= 1.01
+        self._build_cache('csv')
+        for symbol in self.symbols:
+            self.history[symbol] = _history(symbol)
+        pf.update_cache_symbols(incremental=True, cache_format='csv')
+        self.assertEqual(len(self.requests), 1)
+        self._assert_cache_current('csv')
+
+    def test_restatement_refreshes_in_full(self):
+        self._build_cache('csv')
+        # A dividend changes the adjusted history of TLT.
+        self.history['TLT']['Adj Close'] *= 0.99
+        pf.update_cache_symbols(incremental=True, cache_format='csv')
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[1][0], ['TLT'])
+        self._assert_cache_current('csv')
+
+    def test_uncached_symbol_from_year(self):
+        self._build_cache('csv')
+        self.history['QQQ'] = _history('QQQ')
+        pf.update_cache_symbols(self.symbols + ['QQQ'], from_year=2011,
+                                incremental=True, cache_format='csv')
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[1], (['QQQ'], pd.Timestamp('2011-01-01')))
+        ts = fetch._read_cache(self.cache_dir / 'QQQ.csv')
+        self.assertEqual(ts.index[0], pd.Timestamp('2011-01-03'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for the vectorized signal backtest engine."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import pinkfish as pf
+
+
+def _timeseries(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.bdate_range('2000-01-03', periods=n)
+    ts = pd.DataFrame({'close': close, 'high': close * 1.01,
+                       'low': close * 0.99}, index=index)
+    ts['period_high'] = ts['close'].rolling(7).max()
+    ts['period_low'] = ts['close'].rolling(7).min()
+    return ts.dropna()
+
+
+def _loop_backtest(ts, capital, entries, exits, margin=1, close_at_end=True):
+    """Reference implementation using TradeLog and DailyBal."""
+    tlog = pf.TradeLog('TEST')
+    dbal = pf.DailyBal()
+    pf.TradeLog.cash = capital
+    pf.TradeLog.margin = margin
+    for i, row in enumerate(ts.itertuples()):
+        date = row.Index.to_pydatetime()
+        end_flag = close_at_end and pf.is_last_row(ts, i)
+        if tlog.shares > 0:
+            if exits[i] or end_flag:
+                tlog.sell(date, row.close)
+        elif entries[i] and not end_flag:
+            tlog.buy(date, row.close)
+        dbal.append(date, row.close, row.high, row.low)
+    tlog = tlog.get_log()
+    dbal = dbal.get_log(tlog)
+    return tlog, dbal
+
+
+class TestVectorizedBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.ts = _timeseries()
+        self.entries = (self.ts['close'] == self.ts['period_low']).to_numpy()
+        self.exits = (self.ts['close'] == self.ts['period_high']).to_numpy()
+
+    def tearDown(self):
+        pf.TradeLog.margin = pf.Margin.CASH
+
+    def _assert_same(self, margin):
+        expected_tlog, expected_dbal = _loop_backtest(
+            self.ts, 10000, self.entries, self.exits, margin=margin)
+        tlog, dbal = pf.vectorized_backtest(
+            self.ts, 'TEST', 10000, self.entries, self.exits, margin=margin,
+            high_field='high', low_field='low')
+        self.assertGreater(len(tlog), 10)
+        pd.testing.assert_frame_equal(tlog, expected_tlog)
+        pd.testing.assert_frame_equal(dbal, expected_dbal)
+
+    def test_matches_trade_log_loop(self):
+        self._assert_same(margin=1)
+
+    def test_matches_trade_log_loop_with_margin(self):
+        self._assert_same(margin=2)
+
+    def test_open_at_end(self):
+        # No exits in the last 50 bars, so the last trade stays open.
+        exits = self.exits.copy()
+        exits[-50:] = False
+        self.assertTrue(self.entries[:-50].any())
+        expected_tlog, expected_dbal = _loop_backtest(
+            self.ts, 10000, self.entries, exits, close_at_end=False)
+        tlog, dbal = pf.vectorized_backtest(
+            self.ts, 'TEST', 10000, self.entries, exits, high_field='high',
+            low_field='low', close_at_end=False)
+        self.assertGreater(dbal['shares'].iloc[-1], 0)
+        pd.testing.assert_frame_equal(tlog, expected_tlog)
+        pd.testing.assert_frame_equal(dbal, expected_dbal)
+
+    def test_fixed_shares(self):
+        tlog, dbal = pf.vectorized_backtest(
+            self.ts, 'TEST', 10000, self.entries, self.exits, shares=10)
+        self.assertTrue((tlog['qty'] == 10).all())
+        self.assertEqual(dbal['shares'].iloc[-1], 0)
+
+    def test_no_trades(self):
+        no_signal = np.zeros(len(self.ts), dtype=bool)
+        tlog, dbal = pf.vectorized_backtest(
+            self.ts, 'TEST', 10000, no_signal, no_signal)
+        self.assertTrue(tlog.empty)
+        self.assertTrue((dbal['close'] == 10000).all())
+        self.assertTrue((dbal['state'] == pf.TradeState.HOLD).all())
+
+    def test_signal_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            pf.vectorized_backtest(self.ts, 'TEST', 10000,
+                                   self.entries[:-1], self.exits)
+
+
+if __name__ == '__main__':
+    unittest.main()